@@ -94,9 +94,9 @@ cleanup() {
 
 trap cleanup SIGINT SIGTERM
 
-# Démarrer le serveur de contrôle
+# Démarrer le serveur de contrôle via le superviseur (secours préchargé, bascule automatique)
 echo -e "${BLUE}1⃣  Démarrage du serveur de contrôle...${NC}"
-cd ~/jean_test/car_control && python3 -m src.control_server &
+cd ~/jean_test/car_control && python3 -m src.supervisor &
 PID_CONTROL=$!
 sleep 3
 
@@ -104,7 +104,7 @@ if ! kill -0 $PID_CONTROL 2>/dev/null; then
     echo -e "${RED}❌ Échec du démarrage du serveur de contrôle${NC}"
     exit 1
 fi
-echo -e "${GREEN}✓${NC} Serveur de contrôle démarré (PID: $PID_CONTROL)"
+echo -e "${GREEN}✓${NC} Serveur de contrôle démarré (superviseur PID: $PID_CONTROL)"
 echo ""
 
 # Démarrer le proxy caméra
@@ -28,6 +28,7 @@ if [ -f "logs/robot.pid" ]; then
 else
     echo -e "${RED}❌ Aucun processus en cours trouvé${NC}"
     echo "Tentative d'arrêt forcé..."
+    pkill -f "src.supervisor"
     pkill -f "src.control_server"
     pkill -f "src.camera_proxy"
 fi
@@ -0,0 +1,253 @@
+"""
+Régulation adaptative de la qualité du stream IP Webcam
+Ajuste qualité JPEG et résolution selon le débit réellement livré aux clients
+"""
+
+import requests
+import logging
+import time
+from collections import deque
+from threading import Thread, Lock
+
+logger = logging.getLogger(__name__)
+
+
+def level_cost(level):
+    """
+    Coût relatif d'un niveau (pixels x qualité), pour estimer le débit
+
+    Args:
+        level (dict): Niveau {quality, resolution}
+
+    Returns:
+        float: Coût relatif
+    """
+    width, height = (int(v) for v in level['resolution'].split('x'))
+    return width * height * level['quality']
+
+
+class AdaptiveQualityController:
+    """Boucle de régulation qualité/résolution pour une caméra IP Webcam"""
+
+    def __init__(self, camera_config, android_ip, android_port, clock=time.monotonic):
+        """
+        Initialise le régulateur
+
+        Args:
+            camera_config (dict): Section 'camera' de config.yaml
+            android_ip (str): IP du téléphone Android
+            android_port (str): Port IP Webcam
+            clock (callable): Horloge monotone (simulée dans les tests)
+        """
+        aq_config = camera_config['adaptive_quality']
+
+        self.base_url = f"http://{android_ip}:{android_port}"
+        self.target_fps = camera_config['target_fps']
+        self.timeout = camera_config['connection_timeout']
+
+        self.levels = aq_config['levels']
+        self.level = min(aq_config['start_level'], len(self.levels) - 1)
+        self.interval = aq_config['interval']
+        self.degrade_ratio = aq_config['degrade_ratio']
+        self.upgrade_ratio = aq_config['upgrade_ratio']
+        self.degrade_after = aq_config['degrade_after']
+        self.upgrade_after = aq_config['upgrade_after']
+        self.settle_time = aq_config['settle_time']
+        self.capacity_ttl = aq_config['capacity_ttl']
+        self.capacity_ttl_max = aq_config['capacity_ttl_max']
+        self.clock = clock
+
+        self.viewers = set()
+        self.lock = Lock()
+        self.thread = None
+
+        # Compteurs d'hystérésis
+        self.low_count = 0
+        self.high_count = 0
+        self.settle_until = 0.0
+
+        # Débit total mesuré lors de la dernière dégradation (capacité estimée du lien)
+        self.capacity = None
+        self.capacity_time = 0.0
+        
+        # Montée d'essai au-delà de la capacité estimée : un seul niveau, et
+        # durée de validité de l'estimation doublée à chaque essai raté
+        self.probe_level = None
+        self.ttl = self.capacity_ttl
+        
+        # Meilleur débit d'images observé : référence des seuils (caméra
+        # réglée en dessous de target_fps)
+        self.peak_fps = 0.0
+
+        self.history = deque(maxlen=20)
+
+    def add_viewer(self, meter):
+        """
+        Ajoute un client à surveiller (démarre la boucle si besoin)
+
+        Args:
+            meter (StreamMeter): Compteur de débit du client
+        """
+        with self.lock:
+            self.viewers.add(meter)
+            if self.thread is None:
+                self.thread = Thread(target=self._control_loop, daemon=True)
+                self.thread.start()
+
+    def remove_viewer(self, meter):
+        """
+        Retire un client
+
+        Args:
+            meter (StreamMeter): Compteur de débit du client
+        """
+        with self.lock:
+            self.viewers.discard(meter)
+
+    def _control_loop(self):
+        """Évalue périodiquement les débits tant qu'il reste des clients"""
+        self._apply(self.level, "démarrage")
+
+        while True:
+            time.sleep(self.interval)
+
+            with self.lock:
+                viewers = list(self.viewers)
+                if not viewers:
+                    self.thread = None
+                    return
+
+            self.evaluate(viewers)
+
+    def evaluate(self, viewers):
+        """
+        Décide d'une montée ou d'une descente de niveau
+
+        Args:
+            viewers (list): Compteurs de débit des clients
+        """
+        now = self.clock()
+        if now < self.settle_until:
+            return
+
+        # Ignorer les clients qui viennent de se connecter
+        rates = [m.rates() for m in viewers if m.age() >= self.settle_time]
+        if not rates:
+            return
+
+        worst_fps = min(fps for fps, _ in rates)
+        total_bps = sum(bps for _, bps in rates)
+        self.peak_fps = max(self.peak_fps, worst_fps)
+        reference_fps = min(self.target_fps, self.peak_fps)
+
+        if worst_fps < reference_fps * self.degrade_ratio:
+            self.low_count += 1
+            self.high_count = 0
+        elif worst_fps >= reference_fps * self.upgrade_ratio:
+            self.high_count += 1
+            self.low_count = 0
+        else:
+            self.low_count = 0
+            self.high_count = 0
+
+        if self.low_count >= self.degrade_after and self.level > 0:
+            if self.probe_level == self.level:
+                # Essai raté : le lien n'a pas changé, réessayer moins souvent
+                self.ttl = min(self.ttl * 2, self.capacity_ttl_max)
+            self.probe_level = None
+            self.capacity = total_bps
+            self.capacity_time = now
+            self._apply(self.level - 1, f"{worst_fps:.1f} img/s, {total_bps / 1024:.0f} Ko/s")
+        elif self.high_count >= self.upgrade_after:
+            if self.probe_level == self.level:
+                # Essai réussi : le lien s'est amélioré, capacité à remesurer
+                self.probe_level = None
+                self.capacity = None
+                self.ttl = self.capacity_ttl
+            if self.level < len(self.levels) - 1 and self._has_headroom(total_bps, now):
+                probe = self.capacity is not None and now - self.capacity_time > self.ttl
+                if self._apply(self.level + 1, f"{worst_fps:.1f} img/s, {total_bps / 1024:.0f} Ko/s") and probe:
+                    self.probe_level = self.level
+
+    def _has_headroom(self, total_bps, now):
+        """
+        Vérifie que le niveau supérieur tient dans la capacité estimée du lien
+
+        Args:
+            total_bps (float): Débit total actuel (octets/s)
+            now (float): Horodatage monotone
+
+        Returns:
+            bool: True si la montée de niveau est autorisée
+        """
+        if self.capacity is None:
+            return True
+
+        # Estimation trop ancienne : un seul niveau d'essai, pas deux à la suite
+        if now - self.capacity_time > self.ttl:
+            return self.probe_level is None
+
+        ratio = level_cost(self.levels[self.level + 1]) / level_cost(self.levels[self.level])
+        return total_bps * ratio <= self.capacity * 0.9
+
+    def _apply(self, level, reason):
+        """
+        Envoie qualité et résolution à IP Webcam
+
+        Args:
+            level (int): Index du niveau
+            reason (str): Raison du changement (logs)
+
+        Returns:
+            bool: True si la caméra a accepté les réglages
+        """
+        settings = self.levels[level]
+        try:
+            for name, value in (("quality", settings['quality']), ("video_size", settings['resolution'])):
+                r = requests.get(
+                    f"{self.base_url}/settings/{name}",
+                    params={"set": value},
+                    timeout=self.timeout
+                )
+                if r.status_code != 200:
+                    logger.warning(f"IP Webcam a refusé {name}={value}: {r.status_code}")
+                    return False
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Impossible de régler la caméra: {e}")
+            return False
+
+        if level != self.level:
+            arrow = "⬆" if level > self.level else "⬇"
+            logger.info(f"🎚  Qualité caméra {arrow} {settings['resolution']} q{settings['quality']} ({reason})")
+
+        self.level = level
+        self.low_count = 0
+        self.high_count = 0
+        self.settle_until = self.clock() + self.settle_time
+        self.history.append({"time": time.time(), "level": level, "reason": reason})
+        return True
+
+    def status(self):
+        """
+        État courant du régulateur
+
+        Returns:
+            dict: Niveau, réglages et débits des clients
+        """
+        with self.lock:
+            viewers = list(self.viewers)
+
+        return {
+            "level": self.level,
+            "quality": self.levels[self.level]['quality'],
+            "resolution": self.levels[self.level]['resolution'],
+            "capacity_bps": self.capacity,
+            "capacity_ttl": self.ttl,
+            "probing": self.probe_level is not None,
+            "reference_fps": round(min(self.target_fps, self.peak_fps), 1),
+            "viewers": [
+                {"name": m.name, "fps": round(fps, 1), "bps": round(bps)}
+                for m, (fps, bps) in ((m, m.rates()) for m in viewers)
+            ],
+            "history": list(self.history)
+        }
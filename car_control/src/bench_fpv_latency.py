@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Comparaison de latence bout en bout FPV : MJPEG (HTTPS) contre WebRTC (UDP)
+
+Boucle locale : le faux IP Webcam (mode rendu) inscrit l'heure d'émission dans
+chaque image, le script la relit sur l'image reçue par chaque transport.
+Prérequis : control_server et camera_proxy lancés sur cette machine,
+avec camera.webrtc.enabled à true dans config.yaml
+
+Usage: python3 -m src.bench_fpv_latency --samples 300
+"""
+
+from PIL import Image
+import numpy as np
+import argparse
+import requests
+import urllib3
+import asyncio
+import sys
+import os
+import io
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.fake_ipwebcam import start_fake_camera, read_stamp, stamp_age_ms
+from src.mjpeg import extract_latest_frame
+
+# Images ignorées au début de chaque mesure (établissement des flux)
+WARMUP_FRAMES = 30
+
+# Au-delà, l'horodatage n'a pas été relu correctement (image dégradée par l'encodage)
+MAX_PLAUSIBLE_MS = 10000
+
+
+def summarize(name, latencies):
+    """Affiche les percentiles de latence (et les horodatages illisibles)"""
+    if not latencies:
+        print(f"{name:8s} aucune mesure")
+        return
+    values = sorted(v for v in latencies if v <= MAX_PLAUSIBLE_MS)
+    misread = len(latencies) - len(values)
+    if not values:
+        print(f"{name:8s} {misread} horodatage(s) illisible(s), aucune mesure")
+        return
+
+    def pct(p):
+        return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+    print(f"{name:8s} n={len(values):4d}  p50={pct(50):4d} ms  p95={pct(95):4d} ms  "
+          f"p99={pct(99):4d} ms  max={values[-1]:4d} ms  illisibles={misread}")
+
+
+def measure_mjpeg(proxy_url, camera_port, samples):
+    """Latence des images reçues via /stream du proxy caméra"""
+    urllib3.disable_warnings()
+    r = requests.get(f"{proxy_url}/stream", params={"ip": "127.0.0.1", "port": camera_port},
+                     stream=True, verify=False, timeout=5)
+
+    latencies = []
+    buffer = bytearray()
+    received = 0
+    for chunk in r.iter_content(chunk_size=4096):
+        buffer += chunk
+        frame = extract_latest_frame(buffer)
+        if frame is None:
+            continue
+        gray = np.asarray(Image.open(io.BytesIO(frame)).convert('L'))
+        age = stamp_age_ms(read_stamp(gray))
+        received += 1
+        if received > WARMUP_FRAMES:
+            latencies.append(age)
+        if len(latencies) >= samples:
+            break
+
+    r.close()
+    return latencies
+
+
+async def measure_webrtc(control_url, camera_port, samples):
+    """Latence des images reçues via une session WebRTC signalée par Socket.IO"""
+    from aiortc import RTCPeerConnection, RTCSessionDescription
+    import socketio
+
+    sio = socketio.AsyncClient(ssl_verify=False)
+    answer = asyncio.get_running_loop().create_future()
+
+    @sio.on("webrtc_answer")
+    async def on_answer(data):
+        if not answer.done():
+            answer.set_result(data)
+
+    @sio.on("webrtc_error")
+    async def on_error(data):
+        if not answer.done():
+            answer.set_exception(RuntimeError(data.get("error")))
+
+    await sio.connect(control_url, transports=["websocket"])
+
+    pc = RTCPeerConnection()
+    pc.addTransceiver("video", direction="recvonly")
+    track_ready = asyncio.get_running_loop().create_future()
+
+    @pc.on("track")
+    def on_track(track):
+        if not track_ready.done():
+            track_ready.set_result(track)
+
+    await pc.setLocalDescription(await pc.createOffer())
+    await sio.emit("webrtc_offer", {
+        "sdp": pc.localDescription.sdp,
+        "type": pc.localDescription.type,
+        "ip": "127.0.0.1",
+        "port": camera_port
+    })
+
+    data = await asyncio.wait_for(answer, timeout=10)
+    await pc.setRemoteDescription(RTCSessionDescription(sdp=data["sdp"], type=data["type"]))
+    track = await asyncio.wait_for(track_ready, timeout=10)
+
+    latencies = []
+    received = 0
+    while len(latencies) < samples:
+        frame = await asyncio.wait_for(track.recv(), timeout=5)
+        age = stamp_age_ms(read_stamp(frame.to_ndarray(format="gray")))
+        received += 1
+        if received > WARMUP_FRAMES:
+            latencies.append(age)
+
+    await sio.emit("webrtc_close")
+    await pc.close()
+    await sio.disconnect()
+    return latencies
+
+
+def main():
+    """Programme principal"""
+    parser = argparse.ArgumentParser(description="Latence FPV MJPEG vs WebRTC (boucle locale)")
+    parser.add_argument("--control", default="https://127.0.0.1:5007", help="URL du serveur de contrôle")
+    parser.add_argument("--proxy", default="https://127.0.0.1:5008", help="URL du proxy caméra")
+    parser.add_argument("--camera-port", type=int, default=8090, help="Port du faux IP Webcam")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--resolution", default="640x480",
+                        help="Résolution de la caméra (au-delà de camera.webrtc.max_width, WebRTC réduit l'image)")
+    parser.add_argument("--samples", type=int, default=300)
+    args = parser.parse_args()
+
+    server, _ = start_fake_camera(port=args.camera_port, fps=args.fps, resolution=args.resolution, render=True)
+
+    print("\n" + "=" * 60)
+    print("LATENCE FPV BOUT EN BOUT (boucle locale)")
+    print("=" * 60)
+    print(f"Faux IP Webcam: 127.0.0.1:{args.camera_port} ({args.fps} img/s, {args.resolution})\n")
+
+    summarize("MJPEG", measure_mjpeg(args.proxy, args.camera_port, args.samples))
+    summarize("WebRTC", asyncio.run(measure_webrtc(args.control, args.camera_port, args.samples)))
+
+    print("=" * 60 + "\n")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Gigue moteurs/capteur : pilotes dans le processus du serveur contre processus dédié
+
+La même HardwareLoop tourne soit dans un thread du processus "serveur"
+(avant), soit dans un processus dédié (après). Le serveur est simulé par des
+threads de charge Python (JSON, formatage de logs) ; le capteur par une
+attente active comme celle de UltrasonicSensor.measure_distance. Les pilotes
+sont simulés : le script tourne aussi hors du Raspberry Pi.
+
+Mesures :
+- latence commande -> PWM (publiée par la boucle matérielle)
+- retard de réveil de la boucle matérielle
+- retard d'un tick de 5 ms côté serveur (effet de l'attente active du capteur)
+
+Usage: python3 -m src.bench_hardware_jitter --seconds 10 --load-threads 2
+"""
+
+from threading import Thread, Event
+import multiprocessing
+import argparse
+import json
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.hardware import HardwareLoop, COMMAND_RECORD, STATE_RECORD, CMD_UPDATE
+from src.shared_state import SeqlockChannel
+from src.stream_stats import percentiles
+
+BENCH_COMMAND_CHANNEL = "fiara_bench_command"
+BENCH_STATE_CHANNEL = "fiara_bench_state"
+
+# Tick simulé côté serveur (secondes)
+WEB_TICK = 0.005
+
+
+class SimulatedHardware:
+    """Pilotes simulés : moteurs instantanés, capteur en attente active"""
+
+    def __init__(self, echo_ms=6.0, period=0.1):
+        """
+        Args:
+            echo_ms (float): Durée de l'attente active par mesure (~1 m d'obstacle)
+            period (float): Période des mesures (secondes)
+        """
+        self.echo_ms = echo_ms
+        self.period = period
+        self.distance = None
+        self.readings = 0
+        self.forward_inhibited = False
+        self.stop_event = Event()
+
+    def _sensor_loop(self):
+        """Attente active comme GPIO.input() en boucle pendant l'écho"""
+        while not self.stop_event.is_set():
+            end = time.monotonic() + self.echo_ms / 1000
+            while time.monotonic() < end:
+                pass
+            self.distance = 100.0
+            self.readings += 1
+            time.sleep(self.period)
+
+    def start(self):
+        Thread(target=self._sensor_loop, daemon=True).start()
+
+    def command(self, joystick, gyro_enabled=False, gyro_x=0):
+        return {"motor_a": joystick['y'], "motor_b": joystick['x'], "inhibited": False, "source": "JOY"}
+
+    def stop_all(self):
+        pass
+
+    def pop_events(self):
+        return []
+
+    def close(self):
+        self.stop_event.set()
+
+
+def simulated_main(poll_interval, switch_interval, parent_pid):
+    """Processus matériel simulé (mode "après")"""
+    sys.setswitchinterval(switch_interval)
+    commands = SeqlockChannel(BENCH_COMMAND_CHANNEL, COMMAND_RECORD)
+    states = SeqlockChannel(BENCH_STATE_CHANNEL, STATE_RECORD)
+    hardware = SimulatedHardware()
+    hardware.start()
+    HardwareLoop(hardware, commands, states, poll_interval=poll_interval, parent_pid=parent_pid).run()
+
+
+def server_load(stop_event):
+    """Travail Python typique du serveur (décodage d'événements, logs)"""
+    payload = {"joystick": {"x": 0.25, "y": -0.5}, "gyro_enabled": False, "gyro_x": 0.0}
+    while not stop_event.is_set():
+        data = json.loads(json.dumps(payload))
+        _ = f"[{time.strftime('%H:%M:%S')}] 🎮 COMMANDE {data['joystick']['y']:+.2f} {data['joystick']['x']:+.2f}"
+
+
+def web_ticks(stop_event, lateness):
+    """Tick périodique côté serveur : retard de réveil mesuré"""
+    next_tick = time.monotonic()
+    while not stop_event.is_set():
+        next_tick += WEB_TICK
+        delay = next_tick - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        lateness.append((time.monotonic() - next_tick) * 1000)
+        next_tick = max(next_tick, time.monotonic())
+
+
+def run_mode(mode, seconds, load_threads, poll_interval, switch_interval):
+    """Mesure un mode ("thread" ou "process")"""
+    commands = SeqlockChannel(BENCH_COMMAND_CHANNEL, COMMAND_RECORD, create=True)
+    states = SeqlockChannel(BENCH_STATE_CHANNEL, STATE_RECORD, create=True)
+    stop_event = Event()
+
+    if mode == "thread":
+        hardware = SimulatedHardware()
+        hardware.start()
+        loop = HardwareLoop(hardware, SeqlockChannel(BENCH_COMMAND_CHANNEL, COMMAND_RECORD),
+                            SeqlockChannel(BENCH_STATE_CHANNEL, STATE_RECORD), poll_interval=poll_interval)
+        worker = Thread(target=loop.run, daemon=True)
+        worker.start()
+    else:
+        context = multiprocessing.get_context("spawn")
+        worker = context.Process(target=simulated_main, args=(poll_interval, switch_interval, os.getpid()),
+                                 daemon=True)
+        worker.start()
+
+    while states.read()[0] == 0:
+        time.sleep(0.01)
+
+    for _ in range(load_threads):
+        Thread(target=server_load, args=(stop_event,), daemon=True).start()
+    web_lateness = []
+    Thread(target=web_ticks, args=(stop_event, web_lateness), daemon=True).start()
+
+    latencies = []
+    jitters = []
+    end = time.monotonic() + seconds
+    y = 0.0
+    while time.monotonic() < end:
+        y = -y if y else 0.5
+        sequence = commands.write(time.monotonic(), CMD_UPDATE, 0.0, y, 0.0, False)
+
+        # Attendre l'application de la commande (20 commandes/s comme l'interface)
+        deadline = time.monotonic() + 0.05
+        while time.monotonic() < deadline:
+            _, values = states.read()
+            if values is not None and values[1] >= sequence:
+                latencies.append(values[11])
+                jitters.append(values[12])
+                break
+            time.sleep(0.001)
+        time.sleep(max(0.0, deadline - time.monotonic()))
+
+    stop_event.set()
+    if mode == "thread":
+        loop.stop()
+        hardware.close()
+        worker.join(timeout=1)
+    else:
+        worker.terminate()
+        worker.join(timeout=1)
+    commands.close()
+    states.close()
+    return latencies, jitters, web_lateness
+
+
+def format_row(name, values):
+    """Ligne de percentiles (ms)"""
+    if not values:
+        return f"  {name:24s} aucune mesure"
+    p = percentiles(values)
+    return f"  {name:24s} p50={p['p50']:6.2f}  p95={p['p95']:6.2f}  p99={p['p99']:6.2f}  max={max(values):6.2f} ms"
+
+
+def main():
+    """Programme principal"""
+    parser = argparse.ArgumentParser(description="Gigue du chemin moteurs/capteur (thread vs processus dédié)")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--load-threads", type=int, default=2, help="Threads de charge simulant le serveur")
+    parser.add_argument("--poll-interval", type=float, default=0.002)
+    parser.add_argument("--switch-interval", type=float, default=0.0005,
+                        help="Intervalle de bascule du GIL du processus dédié (hardware.switch_interval)")
+    args = parser.parse_args()
+
+    print("\n" + "=" * 70)
+    print("GIGUE MATÉRIEL : MÊME PROCESSUS (avant) vs PROCESSUS DÉDIÉ (après)")
+    print("=" * 70)
+    print(f"{args.seconds:.0f}s par mode, {args.load_threads} thread(s) de charge, "
+          f"lecture des commandes toutes les {args.poll_interval * 1000:.1f} ms\n")
+
+    for mode, title in (("thread", "Même processus (thread)"), ("process", "Processus dédié")):
+        latencies, jitters, web_lateness = run_mode(mode, args.seconds, args.load_threads,
+                                                      args.poll_interval, args.switch_interval)
+        print(title)
+        print(format_row("commande -> PWM", latencies))
+        print(format_row("retard boucle (max/s)", jitters))
+        print(format_row("retard tick serveur", web_lateness))
+        print()
+
+    print("=" * 70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
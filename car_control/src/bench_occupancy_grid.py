@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Coût de la grille d'occupation par mesure ultrason
+
+Une voiture simulée roule dans une pièce (murs + obstacles) en évitant ce
+qu'elle voit ; le capteur simulé renvoie l'obstacle le plus proche dans son
+cône, avec bruit et échos parasites. L'OccupancyMapper reçoit les mêmes
+états que dans le serveur de contrôle (toutes les 50 ms, une mesure sur deux).
+
+Mesures :
+- coût de mise à jour par mesure : cône borné (implémentation) contre mise à
+  jour de la fenêtre entière (référence)
+- coût d'une publication et volume envoyé : tuiles modifiées contre fenêtre complète
+
+Usage: python3 -m src.bench_occupancy_grid --readings 5000
+"""
+
+import argparse
+import random
+import math
+import time
+import yaml
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.occupancy_grid import OccupancyMapper
+from src.stream_stats import percentiles
+
+# Pièce simulée (cm) : murs et deux obstacles, segments (x1, y1, x2, y2)
+ROOM = [
+    (-300, -200, 300, -200), (300, -200, 300, 400), (300, 400, -300, 400), (-300, 400, -300, -200),
+    (-80, 150, 20, 150), (20, 150, 20, 200), (20, 200, -80, 200), (-80, 200, -80, 150),
+    (150, -50, 200, 0), (200, 0, 150, 50), (150, 50, 100, 0), (100, 0, 150, -50)
+]
+
+# Période de la boucle du serveur et du capteur (secondes)
+NOTIFIER_PERIOD = 0.05
+SENSOR_PERIOD = 0.1
+
+
+def ray_distance(x, y, angle, max_cm=400.0):
+    """Distance au premier segment de la pièce le long d'un rayon"""
+    dx, dy = math.cos(angle), math.sin(angle)
+    best = max_cm
+    for x1, y1, x2, y2 in ROOM:
+        ex, ey = x2 - x1, y2 - y1
+        denominator = dx * ey - dy * ex
+        if abs(denominator) < 1e-9:
+            continue
+        t = ((x1 - x) * ey - (y1 - y) * ex) / denominator
+        u = ((x1 - x) * dy - (y1 - y) * dx) / denominator
+        if 0 < t < best and 0 <= u <= 1:
+            best = t
+    return best
+
+
+class SimulatedCar:
+    """Voiture réelle simulée : glisse un peu par rapport au modèle de l'estime"""
+
+    def __init__(self, config, seed=1):
+        self.speed_cm_s = config['speed_cm_s'] * 0.95
+        self.turn_rate = math.radians(config['turn_rate_dps']) * 1.05
+        self.half_angle = math.radians(config['beam_angle_deg']) / 2
+        self.sensor_offset = config['sensor_offset_cm']
+        self.x, self.y, self.heading = 0.0, 0.0, math.pi / 2
+        self.motor_a, self.motor_b = 0.5, 0.0
+        self.random = random.Random(seed)
+
+    def measure(self):
+        """Obstacle le plus proche dans le cône, bruit gaussien et échos parasites"""
+        sx = self.x + self.sensor_offset * math.cos(self.heading)
+        sy = self.y + self.sensor_offset * math.sin(self.heading)
+        distance = min(ray_distance(sx, sy, self.heading + self.half_angle * k / 3) for k in range(-3, 4))
+        if self.random.random() < 0.05:
+            return None if self.random.random() < 0.5 else self.random.uniform(2, 400)
+        return max(2.0, distance + self.random.gauss(0, 1.5))
+
+    def drive(self, distance, dt):
+        """Avance, tourne à droite devant un obstacle"""
+        if distance is not None and distance < 60:
+            self.motor_a, self.motor_b = 0.3, 1.0
+        elif distance is not None:
+            self.motor_a, self.motor_b = 0.5, 0.0
+        speed = self.motor_a * self.speed_cm_s
+        turn = -self.motor_b * self.turn_rate * dt
+        self.x += speed * dt * math.cos(self.heading + turn / 2)
+        self.y += speed * dt * math.sin(self.heading + turn / 2)
+        self.heading += turn
+
+
+def run(config, readings, full_window, seed):
+    """
+    Simule un parcours et mesure le coût de la cartographie
+
+    Returns:
+        dict: Coûts par mesure et par publication (µs), tuiles et octets publiés
+    """
+    mapper = OccupancyMapper(config)
+    grid = mapper.grid
+    if full_window:
+        # Référence : chaque mesure met à jour la fenêtre entière
+        grid._beam_bounds = lambda *args: (0, grid.size, 0, grid.size)
+
+    car = SimulatedCar(config, seed)
+    update_us, publish_us, tiles, sizes = [], [], [], []
+    count = 0
+    distance = None
+    now = 0.0
+    next_sensor = 0.0
+    next_publish = 0.0
+
+    while count < readings:
+        now += NOTIFIER_PERIOD
+        if now >= next_sensor:
+            next_sensor += SENSOR_PERIOD
+            distance = car.measure()
+            count += 1
+            new_reading = True
+        else:
+            new_reading = False
+        car.drive(distance, NOTIFIER_PERIOD)
+
+        motion = {"motor_a": car.motor_a, "motor_b": car.motor_b, "distance": distance, "readings": count}
+        start = time.perf_counter()
+        mapper.update(motion, now)
+        elapsed = (time.perf_counter() - start) * 1e6
+        if new_reading and distance is not None:
+            update_us.append(elapsed)
+
+        if now >= next_publish:
+            next_publish = now + config['publish_interval']
+            start = time.perf_counter()
+            message = mapper.publish()
+            publish_us.append((time.perf_counter() - start) * 1e6)
+            if message:
+                tiles.append(len(message['tiles']))
+                sizes.append(sum(len(tile['data']) for tile in message['tiles']))
+
+    window_tiles = (grid.size // grid.tile) ** 2
+    return {
+        "update_us": update_us,
+        "publish_us": publish_us,
+        "tiles": tiles,
+        "sizes": sizes,
+        "full_bytes": window_tiles * grid.tile ** 2,
+        "window_tiles": window_tiles,
+        "drift_cm": math.hypot(car.x - mapper.odometry.x, car.y - mapper.odometry.y),
+        "grid_bytes": grid.grid.nbytes
+    }
+
+
+def format_row(name, values, unit="µs"):
+    """Ligne de percentiles"""
+    if not values:
+        return f"  {name:28s} aucune mesure"
+    p = percentiles(values)
+    return (f"  {name:28s} p50={p['p50']:8.1f}  p95={p['p95']:8.1f}  p99={p['p99']:8.1f}  "
+            f"max={max(values):8.1f} {unit}")
+
+
+def main():
+    """Programme principal"""
+    parser = argparse.ArgumentParser(description="Coût de la grille d'occupation par mesure ultrason")
+    parser.add_argument("--readings", type=int, default=5000)
+    parser.add_argument("--config", default="config/config.yaml")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        config = yaml.safe_load(f)['mapping']
+
+    print("\n" + "=" * 78)
+    print("GRILLE D'OCCUPATION : COÛT PAR MESURE ULTRASON")
+    print("=" * 78)
+
+    results = {}
+    for full_window, title in ((True, "Fenêtre entière (référence)"), (False, "Cône borné par tuiles")):
+        result = run(config, args.readings, full_window, args.seed)
+        results[full_window] = result
+        print(title)
+        print(format_row("mise à jour par mesure", result['update_us']))
+        print(format_row("publication", result['publish_us']))
+        print()
+
+    result = results[False]
+    sent = sum(result['sizes'])
+    full = result['full_bytes'] * len(result['publish_us'])
+    print(f"Fenêtre: {result['window_tiles']} tuiles, grille {result['grid_bytes'] / 1024:.0f} Kio "
+          f"(constante), dérive de l'estime en fin de parcours {result['drift_cm']:.0f} cm")
+    print(format_row("tuiles par publication", result['tiles'], "tuiles"))
+    print(f"  Volume publié: {sent / 1024:.0f} Kio (tuiles modifiées) contre {full / 1024:.0f} Kio "
+          f"(fenêtre complète à chaque publication), {sent / full * 100:.1f}%")
+    print("=" * 78 + "\n")
+
+
+if __name__ == "__main__":
+    main()
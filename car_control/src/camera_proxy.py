@@ -5,13 +5,23 @@ Proxy caméra HTTPS optimisé pour faible latence
 from flask import Flask, Response, request, jsonify
 import requests
 from datetime import datetime
+from threading import Lock
+import itertools
 import logging
+import time
 import yaml
 import sys
 import os
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from src.control_link import ControlLink
+from src.adaptive_quality import AdaptiveQualityController
+from src.mjpeg import count_frames
+from src.stream_stats import StreamMeter, UpstreamStats
+from src.system_stats import system_snapshot
+from src.sampling_profiler import profile_response
+
 logger = logging.getLogger(__name__)
 
 
@@ -39,6 +49,37 @@ class CameraProxy:
         # Configuration caméra
         self.camera_config = self.config['camera']
         
+        # Identifiants des streams en cours
+        self._stream_ids = itertools.count()
+        
+        # Régulateurs de qualité par caméra (ip, port)
+        self.quality_controllers = {}
+        self.quality_lock = Lock()
+        
+        # Diagnostics : connexions par caméra et compteurs des streams actifs
+        self.upstreams = {}
+        self.active_streams = {}
+        self.stats_lock = Lock()
+        
+        # Liaison vers le serveur de contrôle
+        self.control_link = ControlLink(self.config)
+        
+        # Analyse d'obstacles par vision (optionnelle)
+        self.vision = None
+        if self.config['vision']['enabled']:
+            from src.vision_obstacle import VisionObstacleDetector
+            self.vision = VisionObstacleDetector(self.config['vision'], publish=self._publish_vision)
+            self.vision.start()
+        
+        # Transport WebRTC (optionnel), signalisation via le serveur de contrôle
+        self.webrtc = None
+        if self.camera_config['webrtc']['enabled']:
+            from src.webrtc_transport import WebRTCTransport
+            self.webrtc = WebRTCTransport(self.camera_config, self.camera_config['webrtc'])
+            self.webrtc.start()
+            self.control_link.on("webrtc_offer", lambda data: self.webrtc.handle_offer(data, self.control_link.emit))
+            self.control_link.on("webrtc_close", self.webrtc.handle_close)
+        
         # Initialiser Flask
         self.app = Flask(__name__)
         
@@ -68,6 +109,63 @@ class CameraProxy:
             ]
         )
     
+    def _publish_vision(self, result):
+        """Publie le score d'obstacle vision vers le serveur de contrôle"""
+        self.control_link.emit("vision_obstacle", {
+            "score": result['score'],
+            "obstacle": result['obstacle'],
+            "edge_density": result['edge_density'],
+            "looming": result['looming'],
+            "timestamp": result['timestamp']
+        })
+    
+    def _quality_controller(self, android_ip, android_port):
+        """Retourne le régulateur de qualité de la caméra (créé au premier stream)"""
+        key = (android_ip, android_port)
+        with self.quality_lock:
+            if key not in self.quality_controllers:
+                self.quality_controllers[key] = AdaptiveQualityController(
+                    self.camera_config, android_ip, android_port
+                )
+            return self.quality_controllers[key]
+    
+    def _upstream_stats(self, android_ip, android_port):
+        """Retourne les statistiques de connexion de la caméra (créées au premier stream)"""
+        key = f"{android_ip}:{android_port}"
+        with self.stats_lock:
+            if key not in self.upstreams:
+                self.upstreams[key] = UpstreamStats(key)
+            return self.upstreams[key]
+    
+    def diagnostics(self):
+        """
+        État détaillé des streams (peu coûteux, interrogeable chaque seconde)
+        
+        Returns:
+            dict: Caméras, spectateurs, threads et état du Pi
+        """
+        with self.stats_lock:
+            streams = list(self.active_streams.items())
+            upstreams = list(self.upstreams.items())
+        
+        cameras = {}
+        for key, stats in upstreams:
+            cameras[key] = stats.snapshot()
+            cameras[key]['streams'] = {}
+        
+        viewers = {}
+        for stream_id, entry in streams:
+            cameras[entry['camera']]['streams'][stream_id] = entry['upstream'].snapshot()
+            viewers[stream_id] = dict(entry['viewer'].snapshot(), camera=entry['camera'])
+        
+        return {
+            "timestamp": time.time(),
+            "cameras": cameras,
+            "viewers": viewers,
+            "webrtc_sessions": len(self.webrtc.peers) if self.webrtc else 0,
+            "system": system_snapshot()
+        }
+    
     def _register_routes(self):
         """Enregistre les routes HTTP"""
         
@@ -85,11 +183,14 @@ class CameraProxy:
             
             logger.info(f"[{datetime.now().strftime('%H:%M:%S')}] 📡 Streaming depuis: {stream_url}")
             
+            upstream_stats = self._upstream_stats(android_ip, android_port)
+            
             try:
                 # Session requests avec keep-alive pour réduire la latence
                 session = requests.Session()
                 
                 # Requête vers IP Webcam avec timeout court
+                connect_start = time.monotonic()
                 r = session.get(
                     stream_url,
                     stream=True,
@@ -98,17 +199,55 @@ class CameraProxy:
                 )
                 
                 if r.status_code != 200:
+                    upstream_stats.failed()
                     logger.error(f"Erreur de connexion caméra: {r.status_code}")
                     return jsonify({"error": f"Camera error: {r.status_code}"}), 502
                 
+                connect_time = time.monotonic() - connect_start
+                stream_id = next(self._stream_ids)
+                
+                # Débit reçu de la caméra et débit livré à ce client
+                upstream = StreamMeter(f"upstream-{stream_id}", window=2.0)
+                meter = StreamMeter(f"viewer-{stream_id}", window=2.0)
+                
                 # Générateur pour streaming avec chunk size optimisé
                 def generate():
+                    # Enregistrement au premier tour : un client parti avant ne laisse rien derrière lui
+                    with self.stats_lock:
+                        upstream_stats.connected(connect_time)
+                        self.active_streams[stream_id] = {
+                            "camera": upstream_stats.name,
+                            "upstream": upstream,
+                            "viewer": meter
+                        }
+                    
+                    # Le débit client est suivi par le régulateur de qualité
+                    controller = None
+                    if self.camera_config['adaptive_quality']['enabled']:
+                        controller = self._quality_controller(android_ip, android_port)
+                        controller.add_viewer(meter)
+                    
                     try:
                         for chunk in r.iter_content(chunk_size=self.camera_config['chunk_size']):
                             if chunk:
+                                frames = count_frames(chunk)
+                                upstream.add(len(chunk), frames)
+                                # Copie non bloquante vers l'analyse vision
+                                if self.vision:
+                                    self.vision.feed(stream_id, chunk)
                                 yield chunk
+                                meter.add(len(chunk), frames)
                     except Exception as e:
                         logger.error(f"Erreur pendant le streaming: {e}")
+                    finally:
+                        r.close()
+                        with self.stats_lock:
+                            self.active_streams.pop(stream_id, None)
+                            upstream_stats.ended()
+                        if controller:
+                            controller.remove_viewer(meter)
+                        if self.vision:
+                            self.vision.close_stream(stream_id)
                 
                 # Retourner le stream avec headers optimisés
                 response = Response(
@@ -122,14 +261,18 @@ class CameraProxy:
                 response.headers['Pragma'] = 'no-cache'
                 response.headers['Expires'] = '0'
                 response.headers['X-Accel-Buffering'] = 'no'  # Désactiver le buffering nginx
+                # Générateur jamais démarré (client parti) : sa clause finally ne ferme rien
+                response.call_on_close(r.close)
                 
                 return response
             
             except requests.exceptions.Timeout:
+                upstream_stats.failed()
                 logger.error(f"Timeout lors de la connexion à {stream_url}")
                 return jsonify({"error": "Connection timeout"}), 504
             
             except requests.exceptions.RequestException as e:
+                upstream_stats.failed()
                 logger.error(f"Erreur de connexion: {e}")
                 return jsonify({"error": f"Cannot connect: {str(e)}"}), 503
         
@@ -162,8 +305,35 @@ class CameraProxy:
                 "config": {
                     "jpeg_quality": self.camera_config['jpeg_quality'],
                     "chunk_size": self.camera_config['chunk_size']
+                },
+                "adaptive_quality": {
+                    f"{ip}:{port}": controller.status()
+                    for (ip, port), controller in list(self.quality_controllers.items())
+                },
+                "webrtc": {
+                    "enabled": self.webrtc is not None,
+                    "sessions": len(self.webrtc.peers) if self.webrtc else 0
+                },
+                "vision": {
+                    "enabled": self.vision is not None,
+                    "last_result": self.vision.last_result if self.vision else None,
+                    "analyzed_frames": self.vision.analyzed_frames if self.vision else 0,
+                    "dropped_chunks": self.vision.dropped_chunks if self.vision else 0,
+                    "resyncs": self.vision.resyncs if self.vision else 0
                 }
             }), 200
+        
+        @self.app.route('/diagnostics')
+        def diagnostics():
+            """Diagnostics temps réel : débits, écarts entre images, connexions, état du Pi"""
+            response = jsonify(self.diagnostics())
+            response.headers['Cache-Control'] = 'no-store'
+            return response
+        
+        @self.app.route('/debug/profile')
+        def debug_profile():
+            """Profil par échantillonnage de tous les threads (piles "collapsed")"""
+            return profile_response(request, self.config)
     
     def run(self):
         """Lance le serveur proxy"""
@@ -178,15 +348,25 @@ class CameraProxy:
         logger.info("=" * 60)
         logger.info(f"🌐 HTTPS Proxy: https://{network_config['raspberry_pi_ip']}:{network_config['camera_proxy_port']}")
         logger.info("📹 Usage: /stream?ip=192.168.X.X&port=8080")
+        logger.info("📊 Diagnostics: /diagnostics")
         logger.info("=" * 60)
         logger.info("\n⏳ En attente de connexions...\n")
         
-        self.app.run(
-            host="0.0.0.0",
-            port=network_config['camera_proxy_port'],
-            ssl_context=(ssl_config['cert_path'], ssl_config['key_path']),
-            threaded=True
-        )
+        self.control_link.start()
+        
+        try:
+            self.app.run(
+                host="0.0.0.0",
+                port=network_config['camera_proxy_port'],
+                ssl_context=(ssl_config['cert_path'], ssl_config['key_path']),
+                threaded=True
+            )
+        finally:
+            self.control_link.stop()
+            if self.webrtc:
+                self.webrtc.stop()
+            if self.vision:
+                self.vision.stop()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,92 @@
+"""
+Liaison Socket.IO entre le proxy caméra et le serveur de contrôle
+"""
+
+import socketio
+import logging
+import time
+from threading import Thread, Event
+
+logger = logging.getLogger(__name__)
+
+
+class ControlLink:
+    """Client Socket.IO utilisé par le proxy caméra pour publier vers ControlServer"""
+
+    def __init__(self, config, retry_delay=3):
+        """
+        Initialise la liaison
+
+        Args:
+            config (dict): Configuration complète (config.yaml)
+            retry_delay (float): Délai entre deux tentatives de connexion (secondes)
+        """
+        network_config = config['network']
+        self.url = f"https://127.0.0.1:{network_config['control_port']}"
+        self.token = config['security']['auth_token']
+        self.retry_delay = retry_delay
+        self.stop_event = Event()
+
+        # Certificat auto-signé : pas de vérification en local
+        self.sio = socketio.Client(ssl_verify=False, reconnection=True)
+
+    def on(self, event, handler):
+        """
+        Enregistre un handler pour un événement reçu du serveur de contrôle
+
+        Args:
+            event (str): Nom de l'événement
+            handler: Fonction appelée avec les données reçues
+        """
+        self.sio.on(event, handler)
+
+    def start(self):
+        """Démarre la connexion en arrière-plan (avec nouvelles tentatives)"""
+        if not self.token:
+            # Refusé par le serveur de contrôle : inutile de réessayer
+            logger.warning("⚠️  security.auth_token vide - liaison avec le serveur de contrôle désactivée "
+                           "(vision et WebRTC indisponibles)")
+            return
+        Thread(target=self._connect_loop, daemon=True).start()
+
+    def _connect_loop(self):
+        """Tente de se connecter tant que la première connexion n'a pas abouti"""
+        while not self.stop_event.is_set():
+            try:
+                self.sio.connect(
+                    self.url,
+                    auth={"role": "camera_proxy", "token": self.token},
+                    transports=["websocket"],
+                    wait_timeout=5
+                )
+                logger.info(f"🔗 Liaison avec le serveur de contrôle établie ({self.url})")
+                return
+            except Exception as e:
+                logger.debug(f"Serveur de contrôle injoignable: {e}")
+                time.sleep(self.retry_delay)
+
+    def emit(self, event, data):
+        """
+        Envoie un événement au serveur de contrôle (ignoré si non connecté)
+
+        Args:
+            event (str): Nom de l'événement
+            data (dict): Données à envoyer
+
+        Returns:
+            bool: True si l'événement a été envoyé
+        """
+        if not self.sio.connected:
+            return False
+        try:
+            self.sio.emit(event, data)
+            return True
+        except Exception as e:
+            logger.debug(f"Échec d'envoi de {event}: {e}")
+            return False
+
+    def stop(self):
+        """Ferme la liaison"""
+        self.stop_event.set()
+        if self.sio.connected:
+            self.sio.disconnect()
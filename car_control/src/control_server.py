@@ -2,11 +2,16 @@
 Serveur de contrôle WebSocket pour robot
 """
 
-from flask import Flask, send_from_directory
-from flask_socketio import SocketIO
+from flask import Flask, send_from_directory, request, jsonify, got_request_exception
+from flask_socketio import SocketIO, join_room
 from datetime import datetime
-from ultrasonic_sensor import UltrasonicSensor
+import threading
 import logging
+import signal
+import struct
+import hmac
+import math
+import time
 import yaml
 import sys
 import os
@@ -14,20 +19,29 @@ import os
 # Ajouter le dossier parent au path pour les imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.motor_controller import MotorController
+from src.hardware import create_hardware, HardwareProcess
+from src.static_cache import StaticAssetCache
+from src.flight_recorder import FlightRecorder, COMMAND, STOP, EXCEPTION
+from src.sampling_profiler import profile_response, request_token
+from src.occupancy_grid import OccupancyMapper
 
 logger = logging.getLogger(__name__)
 
+# Erreurs levées par un message client mal formé (pas un crash : aucune sauvegarde)
+CLIENT_INPUT_ERRORS = (TypeError, ValueError, KeyError, AttributeError, struct.error)
+
 
 class ControlServer:
     """Serveur de contrôle du robot"""
     
-    def __init__(self, config_path='config/config.yaml'):
+    def __init__(self, config_path='config/config.yaml', standby=False):
         """
         Initialise le serveur de contrôle
         
         Args:
             config_path (str): Chemin vers le fichier de configuration
+            standby (bool): Serveur de secours du superviseur : tout est prêt
+                sauf les GPIO et l'enregistreur de vol, pris par activate()
         """
         # Charger la configuration
         with open(config_path, 'r') as f:
@@ -37,11 +51,43 @@ class ControlServer:
         self._setup_logging()
         
         logger.info("=" * 60)
-        logger.info("🤖 DÉMARRAGE DU SERVEUR DE CONTRÔLE ROBOT")
+        logger.info("🤖 DÉMARRAGE DU SERVEUR DE CONTRÔLE ROBOT" + (" (SECOURS)" if standby else ""))
         logger.info("=" * 60)
         
-        # Initialiser le contrôleur de moteurs
-        self.motor_controller = MotorController(self.config)
+        self.recorder = None
+        self.hardware = None
+        
+        # Bascule depuis un serveur défaillant (mode superviseur) et battement de cœur
+        self.failover = None
+        self.heartbeat = None
+        
+        # Contexte TLS chargé d'avance (pas de lecture des certificats à la bascule)
+        # SSLContext de gevent : sockets TLS coopératifs (celui de ssl bloquerait la boucle)
+        from gevent import ssl as gevent_ssl
+        ssl_config = self.config['ssl']
+        self.ssl_context = gevent_ssl.SSLContext(gevent_ssl.PROTOCOL_TLS_SERVER)
+        self.ssl_context.load_cert_chain(ssl_config['cert_path'], ssl_config['key_path'])
+        
+        if standby:
+            # Processus matériel lancé d'avance, GPIO pris seulement à la promotion
+            if self.config['hardware']['separate_process']:
+                self.hardware = HardwareProcess(self.config)
+                self.hardware.prepare()
+        else:
+            self.activate()
+        
+        # Clients proxy caméra (sid) et dernier score vision reçu
+        self.camera_proxy_sids = set()
+        self.vision_obstacle = None
+        
+        # Grille d'occupation (mesures ultrason + pose estimée)
+        mapping_config = self.config['mapping']
+        self.mapper = OccupancyMapper(mapping_config) if mapping_config['enabled'] else None
+        self.next_map_publish = 0.0
+        
+        # Fichiers de l'interface web chargés et précompressés en mémoire
+        self.static_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static")
+        self.static_cache = StaticAssetCache(self.static_dir, self.config['performance']['static_cache'])
         
         # Initialiser Flask et SocketIO
         self.app = Flask(__name__, static_folder="../static")
@@ -57,6 +103,16 @@ class ControlServer:
         
         logger.info("✅ Serveur de contrôle initialisé")
     
+    def activate(self):
+        """Prend l'enregistreur de vol et le matériel (démarrage ou promotion du secours)"""
+        # Enregistreur de vol (survit aux crashs, sauvegardé au démarrage suivant)
+        self.recorder = FlightRecorder("control", self.config['flight_recorder'])
+        self._install_crash_hooks()
+        
+        # Moteurs et capteur ultrason (processus dédié ou pilotes locaux selon config.yaml)
+        if self.hardware is None:
+            self.hardware = create_hardware(self.config, self.recorder)
+    
     def _setup_logging(self):
         """Configure le système de logs"""
         log_config = self.config['logging']
@@ -74,42 +130,157 @@ class ControlServer:
             ]
         )
     
+    def _install_crash_hooks(self):
+        """Sauvegarde l'enregistreur de vol sur exception non gérée ou sur SIGUSR1"""
+        previous_excepthook = sys.excepthook
+        previous_thread_excepthook = threading.excepthook
+        
+        def excepthook(exc_type, exc, tb):
+            self._dump_on_exception(exc)
+            previous_excepthook(exc_type, exc, tb)
+        
+        def thread_excepthook(args):
+            self._dump_on_exception(args.exc_value)
+            previous_thread_excepthook(args)
+        
+        sys.excepthook = excepthook
+        threading.excepthook = thread_excepthook
+        signal.signal(signal.SIGUSR1, lambda signum, frame: self._dump_recorder("signal"))
+    
+    def _dump_on_exception(self, exc):
+        """Enregistre une exception et sauvegarde l'enregistreur de vol"""
+        self.recorder.record(EXCEPTION)
+        path = self._dump_recorder("exception")
+        logger.error(f"💥 Exception non gérée: {exc!r} - enregistreur sauvegardé: {path}", exc_info=exc)
+    
+    def _dump_recorder(self, reason):
+        """Sauvegarde l'enregistreur de vol (sans jamais lever d'exception)"""
+        try:
+            return self.recorder.dump(reason)
+        except OSError as e:
+            logger.error(f"Sauvegarde de l'enregistreur impossible: {e}")
+            return None
+    
+    def _authorized(self):
+        """Vérifie le token (si l'authentification est activée dans config.yaml)"""
+        security = self.config['security']
+        if not security['require_auth']:
+            return True
+        token = request_token(request)
+        return bool(security['auth_token']) and hmac.compare_digest(token, str(security['auth_token']))
+    
     def _register_routes(self):
         """Enregistre les routes HTTP"""
         
         @self.app.route("/")
         def index():
-            logger.info(f"[{datetime.now().strftime('%H:%M:%S')}] 📄 Page index.html demandée")
-            return send_from_directory("../static", "index.html")
+            return self.static_cache.response(request, "index.html")
+        
+        @self.app.route("/v/<version>/<path:filename>")
+        def serve_versioned(filename, version):
+            response = self.static_cache.response(request, filename, version)
+            return response if response is not None else ("Not found", 404)
+        
+        @self.app.route("/metrics")
+        def metrics():
+            return jsonify({
+                "safety": self.hardware.metrics(),
+                "mapping": self.mapper.metrics() if self.mapper else None,
+                "failover": self.failover
+            })
+        
+        @self.app.route("/flight-recorder/dump", methods=["POST"])
+        def flight_recorder_dump():
+            if not self._authorized():
+                return jsonify({"error": "Unauthorized"}), 401
+            path = self._dump_recorder("request")
+            if path is None:
+                return jsonify({"error": "Dump failed"}), 500
+            logger.info(f"🛩  Enregistreur de vol sauvegardé: {path}")
+            return jsonify({"path": path})
+        
+        @self.app.route("/debug/profile")
+        def debug_profile():
+            # Attente via socketio.sleep : la boucle gevent continue pendant le profil
+            return profile_response(request, self.config, sleep=self.socketio.sleep)
+        
+        got_request_exception.connect(
+            lambda sender, exception, **extra: self._dump_on_exception(exception), self.app, weak=False
+        )
         
         @self.app.route("/<path:filename>")
         def serve_static(filename):
-            logger.debug(f"[{datetime.now().strftime('%H:%M:%S')}] 📄 Fichier demandé: {filename}")
-            return send_from_directory("../static", filename)
+            response = self.static_cache.response(request, filename)
+            if response is not None:
+                return response
+            return send_from_directory(self.static_dir, filename)
     
     def _register_socketio_events(self):
         """Enregistre les événements SocketIO"""
         
+        @self.socketio.on_error_default
+        def on_socketio_error(e):
+            if isinstance(e, CLIENT_INPUT_ERRORS):
+                # Message mal formé (éventuellement non authentifié) : pas de sauvegarde sur disque
+                self.recorder.record(EXCEPTION)
+                logger.warning(f"⚠️  Message Socket.IO invalide ({request.event['message']}): {e!r}",
+                               exc_info=e)
+                return
+            self._dump_on_exception(e)
+        
         @self.socketio.on("connect")
-        def on_connect():
+        def on_connect(auth=None):
+            if auth and auth.get("role") == "camera_proxy":
+                # Le proxy caméra s'authentifie avec le token de config.yaml (jamais sans token)
+                expected = str(self.config['security']['auth_token'])
+                token = str(auth.get("token", ""))
+                if not expected or not hmac.compare_digest(token, expected):
+                    logger.warning("⛔ Proxy caméra refusé (token absent ou invalide)")
+                    return False
+                self.camera_proxy_sids.add(request.sid)
+                join_room("camera_proxy")
+                logger.info(f"[{datetime.now().strftime('%H:%M:%S')}] 🔗 Proxy caméra connecté")
+                return
+            
             logger.info(f"\n[{datetime.now().strftime('%H:%M:%S')}] ✅ CLIENT CONNECTÉ")
             logger.info("=" * 60)
+            
+            # Carte déjà construite, ensuite seules les tuiles modifiées sont envoyées
+            join_room("browsers")
+            if self.mapper:
+                self.socketio.emit("map_tiles", self.mapper.snapshot(), to=request.sid)
         
         @self.socketio.on("disconnect")
         def on_disconnect():
+            if request.sid in self.camera_proxy_sids:
+                self.camera_proxy_sids.discard(request.sid)
+                logger.info(f"[{datetime.now().strftime('%H:%M:%S')}] 🔗 Proxy caméra déconnecté")
+                return
+            
             # Arrêter les moteurs lors de la déconnexion
-            self.motor_controller.stop_all()
+            self.hardware.stop_all()
+            self.recorder.record(STOP)
+            
+            # Fermer une éventuelle session WebRTC côté proxy
+            self.socketio.emit("webrtc_close", {"sid": request.sid}, to="camera_proxy")
             logger.info(f"\n[{datetime.now().strftime('%H:%M:%S')}] ❌ CLIENT DÉCONNECTÉ")
             logger.info("=" * 60)
         
         @self.socketio.on("control_update")
         def on_control(data):
+            # Seuls les navigateurs pilotent (le proxy n'arrête pas les moteurs en se déconnectant)
+            if request.sid in self.camera_proxy_sids:
+                return
+            
             joy = data.get("joystick", {"x": 0, "y": 0})
             gyro_enabled = data.get("gyro_enabled", False)
             gyro_x = data.get("gyro_x", 0)
+            self.recorder.record(COMMAND, joy.get("x", 0), joy.get("y", 0), gyro_x if gyro_enabled else math.nan)
             
-            # Mettre à jour les moteurs
-            state = self.motor_controller.update(joy, gyro_enabled, gyro_x)
+            # Mettre à jour les moteurs (en mode processus dédié : état connu avant application)
+            state = self.hardware.command(joy, gyro_enabled, gyro_x)
+            if state is None:
+                return
             
             # Log détaillé
             timestamp = datetime.now().strftime('%H:%M:%S')
@@ -117,16 +288,76 @@ class ControlServer:
             motor_a = state['motor_a']
             motor_b = state['motor_b']
             
-            # Symboles de direction
-            dir_a_symbol = "⬆" if motor_a['direction'] == "forward" else "⬇" if motor_a['direction'] == "backward" else "⏸"
-            dir_b_symbol = "⬅" if motor_b['direction'] == "backward" else "➡" if motor_b['direction'] == "forward" else "⏸"
+            # Directions et symboles (vitesses signées)
+            dir_a = "FORWARD" if motor_a > 0 else "BACKWARD" if motor_a < 0 else "STOP"
+            dir_b = "FORWARD" if motor_b > 0 else "BACKWARD" if motor_b < 0 else "STOP"
+            dir_a_symbol = "⬆" if motor_a > 0 else "⬇" if motor_a < 0 else "⏸"
+            dir_b_symbol = "⬅" if motor_b < 0 else "➡" if motor_b > 0 else "⏸"
             
             logger.info(f"\n[{timestamp}] 🎮 COMMANDE")
-            logger.info(f"   {motor_a['motor']}: {dir_a_symbol} {motor_a['direction'].upper():8s} | {motor_a['speed_percent']:3.0f}%")
-            logger.info(f"   {motor_b['motor']}: {dir_b_symbol} {motor_b['direction'].upper():8s} | {motor_b['speed_percent']:3.0f}% [{motor_b['source']}]")
+            logger.info(f"   Motor A (Avance/Recul): {dir_a_symbol} {dir_a:8s} | {abs(motor_a) * 100:3.0f}%"
+                        f"{' [avant bloqué]' if state['inhibited'] else ''}")
+            logger.info(f"   Motor B (Virage): {dir_b_symbol} {dir_b:8s} | {abs(motor_b) * 100:3.0f}% [{state['source']}]")
     
-    def run(self):
-        """Lance le serveur"""
+        @self.socketio.on("vision_obstacle")
+        def on_vision_obstacle(data):
+            # Score publié par l'analyse vision du proxy caméra
+            if request.sid not in self.camera_proxy_sids:
+                return
+            
+            previous = self.vision_obstacle
+            self.vision_obstacle = data
+            
+            if data.get("obstacle") and not (previous and previous.get("obstacle")):
+                logger.warning(f"👁  Obstacle visuel probable (score {data.get('score')})")
+            
+            # Relayé aux navigateurs avec la dernière mesure ultrason
+            payload = dict(data, distance=self.hardware.distance)
+            self.socketio.emit("vision_obstacle", payload, skip_sid=request.sid)
+    
+        # === Signalisation WebRTC (navigateur <-> proxy caméra) ===
+        
+        @self.socketio.on("webrtc_offer")
+        def on_webrtc_offer(data):
+            if not self.camera_proxy_sids:
+                self.socketio.emit("webrtc_error", {"error": "Proxy caméra non connecté"}, to=request.sid)
+                return
+            
+            logger.info(f"[{datetime.now().strftime('%H:%M:%S')}] 📡 Offre WebRTC ({data.get('ip')}:{data.get('port')})")
+            self.socketio.emit("webrtc_offer", {
+                "sid": request.sid,
+                "sdp": data.get("sdp"),
+                "type": data.get("type"),
+                "ip": data.get("ip"),
+                "port": data.get("port")
+            }, to="camera_proxy")
+        
+        @self.socketio.on("webrtc_close")
+        def on_webrtc_close():
+            self.socketio.emit("webrtc_close", {"sid": request.sid}, to="camera_proxy")
+        
+        def relay_to_browser(event):
+            # Réponses du proxy caméra renvoyées au navigateur concerné
+            def handler(data):
+                if request.sid not in self.camera_proxy_sids:
+                    return
+                payload = dict(data)
+                sid = payload.pop("sid", None)
+                if sid:
+                    self.socketio.emit(event, payload, to=sid)
+            self.socketio.on_event(event, handler)
+        
+        relay_to_browser("webrtc_answer")
+        relay_to_browser("webrtc_error")
+    
+    def run(self, listener=None, failover=None):
+        """
+        Lance le serveur
+        
+        Args:
+            listener (socket): Socket d'écoute hérité du superviseur (None : ouvert ici)
+            failover (dict): Défaillance ayant provoqué la promotion de ce serveur
+        """
         ssl_config = self.config['ssl']
         network_config = self.config['network']
         
@@ -140,40 +371,97 @@ class ControlServer:
         logger.info("=" * 60)
         logger.info("\n⏳ En attente de connexions...\n")
         
+        # Surveillance des obstacles et notifications différées
+        self.hardware.start()
+        logger.info("🚨 Système de détection d'obstacles activé")
+        self.socketio.start_background_task(self._safety_notifier)
+        
+        clean = False
         try:
-            self.socketio.run(
-                self.app,
-                host="0.0.0.0",
-                port=network_config['control_port'],
-                keyfile=ssl_config['key_path'],
-                certfile=ssl_config['cert_path'],
-                allow_unsafe_werkzeug=True
-            )
-        except keyboardInterrupt:
-        	logger.info("\n🛑 Arrêt du serveur...")
+            if listener is None:
+                self.socketio.run(
+                    self.app,
+                    host="0.0.0.0",
+                    port=network_config['control_port'],
+                    keyfile=ssl_config['key_path'],
+                    certfile=ssl_config['cert_path'],
+                    allow_unsafe_werkzeug=True
+                )
+            else:
+                self._serve(listener, failover)
+            clean = True
+        except KeyboardInterrupt:
+            logger.info("\n🛑 Arrêt du serveur...")
+            clean = True
         finally:
-            self.ultrasonic_sensor.cleanup()
-            logger.info("✅ Ressources ultrason libérées")
-            self.motor_controller.cleanup()
-            
-    def on_obstacle_detected(self, distance):
-        logger.warning(f"⚠️  OBSTACLE à {distance} cm - ARRÊT")
+            self.hardware.close()
+            self.recorder.close(clean)
     
-    	# Arrêter les moteurs
-        self.motor_controller.stop_all()
+    def _serve(self, listener, failover):
+        """Sert l'application sur le socket d'écoute du superviseur (gevent + WebSocket)"""
+        from gevent import pywsgi, socket as gevent_socket
+        from geventwebsocket.handler import WebSocketHandler
+        
+        sock = gevent_socket.socket(listener.family, listener.type, fileno=listener.detach())
+        server = pywsgi.WSGIServer(sock, self.app, handler_class=WebSocketHandler,
+                                   ssl_context=self.ssl_context, log=None)
+        server.start()
+        
+        if failover:
+            # Défaillance détectée par le superviseur -> connexions de nouveau acceptées ;
+            # le délai de détection lui-même est borné par heartbeat_age_ms
+            self.failover = dict(failover, measured_from="detection",
+                                 failover_ms=round((time.monotonic() - failover['detected_at']) * 1000, 1))
+            logger.warning(f"🔁 Bascule terminée en {self.failover['failover_ms']:.0f} ms "
+                           f"(PID {failover['failed_pid']}, code {failover['exit_code']})")
+        
+        server.serve_forever()
     
-    	# Notifier le client
-        self.socketio.emit("obstacle_detected", {
-            "distance": distance,
-            "message": f"Obstacle détecté à {distance} cm",
-            "action": "stop"
-        })
+    def _update_map(self, now):
+        """Intègre la dernière mesure et envoie les tuiles modifiées (au plus toutes les publish_interval)"""
+        self.mapper.update(self.hardware.motion(), now)
+        if now < self.next_map_publish:
+            return
+        self.next_map_publish = now + self.config['mapping']['publish_interval']
+        message = self.mapper.publish()
+        if message:
+            self.socketio.emit("map_tiles", message, to="browsers")
     
-        self.socketio.emit("suggest_direction_change", {
-            "message": "Changez de direction pour éviter l'obstacle",
-            "suggested_action": "reverse_or_turn"
-        })
-
+    def _safety_notifier(self):
+        """Notifie les clients des arrêts d'urgence (hors du chemin critique)"""
+        while True:
+            now = time.monotonic()
+            if self.heartbeat is not None:
+                self.heartbeat.value = now
+            self.hardware.check()
+            if self.mapper:
+                self._update_map(now)
+            for event in self.hardware.pop_events():
+                distance = event['distance']
+                
+                if event['type'] == "obstacle":
+                    logger.warning(f"⚠️  OBSTACLE à {distance} cm - ARRÊT "
+                                   f"(réaction {event['reaction_ms']:.2f} ms)")
+                    
+                    # En mode processus séparé, le processus matériel sauvegarde son propre anneau
+                    if not self.config['hardware']['separate_process']:
+                        self.recorder.dump_obstacle()
+                    
+                    self.socketio.emit("obstacle_detected", {
+                        "distance": distance,
+                        "message": f"Obstacle détecté à {distance} cm",
+                        "action": "stop"
+                    })
+                    
+                    self.socketio.emit("suggest_direction_change", {
+                        "message": "Changez de direction pour éviter l'obstacle",
+                        "suggested_action": "reverse_or_turn"
+                    })
+                else:
+                    logger.info(f"✅ Marche avant de nouveau autorisée ({distance} cm)")
+                    self.socketio.emit("obstacle_cleared", {"distance": distance})
+            
+            self.socketio.sleep(0.05)
 
 if __name__ == "__main__":
     server = ControlServer()
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Faux serveur IP Webcam pour les tests en local (sans téléphone)
+Sert un flux MJPEG dont la taille des images suit la qualité et la résolution
+réglées via /settings/quality et /settings/video_size, avec une bande passante
+limitable pour simuler un Wi-Fi dégradé
+
+En mode rendu (--render), chaque image est un vrai JPEG portant l'heure d'émission
+codée en 32 blocs noir/blanc en haut de l'image (mesure de latence bout en bout)
+"""
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from threading import Thread, Lock
+import argparse
+import json
+import time
+
+BOUNDARY = "--jpgboundary"
+
+# Horodatage visuel : 32 bits (millisecondes) codés en blocs sur le bandeau supérieur
+STAMP_BITS = 32
+STAMP_HEIGHT = 32
+
+
+def now_ms():
+    """Horloge murale en millisecondes sur 32 bits"""
+    return int(time.time() * 1000) & 0xFFFFFFFF
+
+
+def render_stamped_jpeg(width, height, quality):
+    """
+    Construit un JPEG portant l'heure courante en blocs noir/blanc
+
+    Args:
+        width (int): Largeur de l'image
+        height (int): Hauteur de l'image
+        quality (int): Qualité JPEG
+
+    Returns:
+        bytes: Image JPEG
+    """
+    from PIL import Image
+    import numpy as np
+    import io
+
+    pixels = np.full((height, width), 96, dtype=np.uint8)
+    block = width // STAMP_BITS
+    stamp = now_ms()
+    for bit in range(STAMP_BITS):
+        value = 255 if (stamp >> (STAMP_BITS - 1 - bit)) & 1 else 0
+        pixels[:STAMP_HEIGHT, bit * block:(bit + 1) * block] = value
+
+    output = io.BytesIO()
+    Image.fromarray(pixels).save(output, "JPEG", quality=quality)
+    return output.getvalue()
+
+
+def read_stamp(gray):
+    """
+    Lit l'horodatage visuel d'une image reçue
+
+    Args:
+        gray (np.ndarray): Image en niveaux de gris (hauteur x largeur)
+
+    Returns:
+        int: Horodatage en millisecondes sur 32 bits
+    """
+    width = gray.shape[1]
+    block = width // STAMP_BITS
+    # Ligne au quart du bandeau : reste lisible si l'image a été réduite de moitié
+    row = gray[STAMP_HEIGHT // 4]
+    stamp = 0
+    for bit in range(STAMP_BITS):
+        stamp = (stamp << 1) | int(row[bit * block + block // 2] > 127)
+    return stamp
+
+
+def stamp_age_ms(stamp):
+    """
+    Âge d'un horodatage visuel (gère le rebouclage 32 bits)
+
+    Args:
+        stamp (int): Horodatage lu dans l'image
+
+    Returns:
+        int: Latence en millisecondes
+    """
+    return (now_ms() - stamp) & 0xFFFFFFFF
+
+
+class FakeCameraState:
+    """Réglages et limite de bande passante partagés par toutes les connexions"""
+
+    def __init__(self, fps=30, quality=70, resolution="640x480", bandwidth=0, render=False):
+        """
+        Initialise l'état
+
+        Args:
+            fps (int): Images/s produites par la caméra
+            quality (int): Qualité JPEG initiale
+            resolution (str): Résolution initiale (LxH)
+            bandwidth (int): Bande passante en octets/s (0 = illimitée)
+            render (bool): Produire de vrais JPEG horodatés (nécessite Pillow et NumPy)
+        """
+        self.fps = fps
+        self.render = render
+        self.quality = quality
+        self.resolution = resolution
+        self.bandwidth = bandwidth
+        self.lock = Lock()
+        self.next_send = 0.0
+        self.frames_sent = 0
+
+    def frame_size(self):
+        """Taille approximative d'une image JPEG pour les réglages courants"""
+        width, height = (int(v) for v in self.resolution.split('x'))
+        return int(width * height * (0.02 + 0.15 * self.quality / 100))
+
+    def frame(self):
+        """Construit une image (factice, ou JPEG horodaté en mode rendu)"""
+        if self.render:
+            width, height = (int(v) for v in self.resolution.split('x'))
+            return render_stamped_jpeg(width, height, self.quality)
+        return b'\xff\xd8' + b'\x00' * self.frame_size() + b'\xff\xd9'
+
+    def throttle(self, nbytes):
+        """
+        Attend le temps nécessaire pour envoyer nbytes (lien partagé)
+
+        Args:
+            nbytes (int): Taille des données à envoyer
+        """
+        if not self.bandwidth:
+            return
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_send)
+            self.next_send = start + nbytes / self.bandwidth
+            delay = self.next_send - now
+        time.sleep(delay)
+
+
+class FakeCameraHandler(BaseHTTPRequestHandler):
+    """Endpoints IP Webcam : /video, /shot.jpg, /settings/*, /status.json"""
+
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, body, content_type="text/plain", status=200):
+        if isinstance(body, str):
+            body = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        value = parse_qs(url.query).get("set", [None])[0]
+        state = self.state
+
+        if url.path == "/video":
+            self._stream()
+        elif url.path == "/shot.jpg":
+            self._reply(state.frame(), "image/jpeg")
+        elif url.path == "/settings/quality" and value is not None:
+            state.quality = max(1, min(100, int(value)))
+            self._reply("Ok")
+        elif url.path == "/settings/video_size" and value is not None:
+            state.resolution = value
+            self._reply("Ok")
+        elif url.path == "/fake/bandwidth" and value is not None:
+            state.bandwidth = int(value)
+            self._reply("Ok")
+        elif url.path == "/status.json":
+            self._reply(json.dumps({
+                "curvals": {"quality": str(state.quality), "video_size": state.resolution},
+                "bandwidth": state.bandwidth,
+                "frames_sent": state.frames_sent
+            }), "application/json")
+        else:
+            self._reply("Not found", status=404)
+
+    def _stream(self):
+        """Flux MJPEG : la caméra avance à son rythme, un client lent perd des images"""
+        state = self.state
+        self.send_response(200)
+        self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+        self.end_headers()
+
+        period = 1.0 / state.fps
+        next_frame = time.monotonic()
+        try:
+            while True:
+                frame = state.frame()
+                part = (f"{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                        f"Content-Length: {len(frame)}\r\n\r\n").encode() + frame + b"\r\n"
+                state.throttle(len(part))
+                self.wfile.write(part)
+                state.frames_sent += 1
+
+                # Prochaine image du capteur (les images manquées sont sautées)
+                next_frame += period
+                now = time.monotonic()
+                if next_frame < now:
+                    next_frame = now
+                time.sleep(next_frame - now)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def start_fake_camera(port=8080, host="127.0.0.1", **settings):
+    """
+    Démarre le faux serveur en arrière-plan
+
+    Args:
+        port (int): Port d'écoute (0 = port libre)
+        host (str): Adresse d'écoute
+        **settings: Réglages initiaux (voir FakeCameraState)
+
+    Returns:
+        tuple: (serveur, état partagé)
+    """
+    state = FakeCameraState(**settings)
+    handler = type("Handler", (FakeCameraHandler,), {"state": state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Faux serveur IP Webcam")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--bandwidth", type=int, default=0, help="octets/s (0 = illimité)")
+    parser.add_argument("--render", action="store_true", help="JPEG réels horodatés (mesure de latence)")
+    args = parser.parse_args()
+
+    server, _ = start_fake_camera(args.port, args.host, fps=args.fps,
+                                  bandwidth=args.bandwidth, render=args.render)
+    print(f"📷 Faux IP Webcam sur http://{args.host}:{server.server_port}/video")
+    print("   Bande passante: /fake/bandwidth?set=<octets/s>")
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
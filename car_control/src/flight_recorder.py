@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Enregistreur de vol : anneau binaire des derniers événements en mémoire partagée
+
+Le segment (/dev/shm) survit à un crash du processus : il est sauvegardé au
+démarrage suivant, sauf s'il a été marqué propre à l'arrêt. Écriture en O(1) sans verrou ni allocation : horodatage
+monotone + type + 3 valeurs flottantes par enregistrement.
+
+Décodage d'une sauvegarde :
+    python3 -m src.flight_recorder logs/flight/control_obstacle_20250101_120000.bin --kind obstacle,motor
+    python3 -m src.flight_recorder --live control --last 50
+"""
+
+from multiprocessing import shared_memory, resource_tracker
+from datetime import datetime
+import itertools
+from threading import Thread
+import argparse
+import logging
+import struct
+import math
+import time
+import glob
+import os
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'FIAR'
+
+# En-tête : magic, taille d'enregistrement, capacité, compteur, références d'horloge
+HEADER = struct.Struct('<4sIIQdd')
+HEADER_SIZE = 64
+COUNT = struct.Struct('<Q')
+COUNT_OFFSET = 12
+# Indicateur d'arrêt propre, juste après l'en-tête (0 tant que le processus tourne)
+CLEAN = struct.Struct('<B')
+CLEAN_OFFSET = HEADER.size
+
+# Enregistrement : horodatage monotone, type, valeurs a/b/c
+RECORD = struct.Struct('<dB3xfff')
+
+# Types d'événements
+COMMAND = 1     # joystick x, joystick y, gyro x (NaN si gyro désactivé)
+MOTOR = 2       # Motor A signé, Motor B signé, marche avant bloquée (0/1)
+DISTANCE = 3    # distance (cm)
+OBSTACLE = 4    # distance (cm), temps de réaction (ms)
+CLEAR = 5       # distance (cm)
+STOP = 6        # arrêt de tous les moteurs
+DUMP = 7        # sauvegarde demandée
+EXCEPTION = 8   # exception non gérée
+
+KIND_NAMES = {
+    COMMAND: "command", MOTOR: "motor", DISTANCE: "distance", OBSTACLE: "obstacle",
+    CLEAR: "clear", STOP: "stop", DUMP: "dump", EXCEPTION: "exception"
+}
+
+
+def _untrack(shm):
+    """Empêche le resource_tracker de supprimer le segment à la sortie (il doit survivre)"""
+    try:
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+
+
+class FlightRecorder:
+    """Anneau d'événements en mémoire partagée"""
+
+    def __init__(self, name, recorder_config):
+        """
+        Ouvre (ou crée) le segment de l'enregistreur
+
+        Args:
+            name (str): Nom du processus enregistré (ex: "control")
+            recorder_config (dict): Section 'flight_recorder' de config.yaml
+        """
+        self.name = name
+        self.capacity = recorder_config['capacity']
+        self.dump_dir = recorder_config['dump_dir']
+        self.keep_dumps = recorder_config['keep_dumps']
+        self.keep_obstacle_dumps = recorder_config['keep_obstacle_dumps']
+        self.obstacle_dump_interval = recorder_config['obstacle_dump_interval']
+        self.last_obstacle_dump = None
+        self.size = HEADER_SIZE + self.capacity * RECORD.size
+        self.shm_name = f"fiara_flight_{name}"
+
+        os.makedirs(self.dump_dir, exist_ok=True)
+
+        # Segment laissé par une exécution précédente (sauvegardé sauf arrêt propre)
+        previous = self._attach_previous()
+        if previous is not None:
+            self.shm = previous
+            if self._recorded_count() > 0 and not CLEAN.unpack_from(self.shm.buf, CLEAN_OFFSET)[0]:
+                path = self.dump("previous")
+                logger.warning(f"🛩  Enregistrement de l'exécution précédente sauvegardé: {path}")
+        else:
+            self.shm = shared_memory.SharedMemory(name=self.shm_name, create=True, size=self.size)
+            _untrack(self.shm)
+
+        self.buf = self.shm.buf
+        self._reset()
+        self._counter = itertools.count()
+
+        logger.info(f"🛩  Enregistreur de vol: {self.capacity} événements (/dev/shm/{self.shm_name})")
+
+    def _attach_previous(self):
+        """Rattache un segment existant compatible (le supprime s'il ne l'est pas)"""
+        try:
+            shm = shared_memory.SharedMemory(name=self.shm_name)
+        except FileNotFoundError:
+            return None
+        _untrack(shm)
+
+        magic, record_size, capacity = HEADER.unpack_from(shm.buf, 0)[:3]
+        if magic == MAGIC and record_size == RECORD.size and capacity == self.capacity and shm.size >= self.size:
+            return shm
+
+        shm.close()
+        shm.unlink()
+        return None
+
+    def _recorded_count(self):
+        """Nombre d'événements écrits depuis la dernière remise à zéro"""
+        return COUNT.unpack_from(self.shm.buf, COUNT_OFFSET)[0]
+
+    def _reset(self):
+        """Vide l'anneau et écrit l'en-tête"""
+        self.buf[:self.size] = bytes(self.size)
+        HEADER.pack_into(self.buf, 0, MAGIC, RECORD.size, self.capacity, 0, time.time(), time.monotonic())
+
+    def record(self, kind, a=0.0, b=0.0, c=0.0):
+        """
+        Enregistre un événement (chemin critique : aucune allocation ni verrou)
+
+        Args:
+            kind (int): Type d'événement
+            a, b, c (float): Valeurs associées
+        """
+        index = next(self._counter)
+        RECORD.pack_into(self.buf, HEADER_SIZE + (index % self.capacity) * RECORD.size,
+                         time.monotonic(), kind, a, b, c)
+        COUNT.pack_into(self.buf, COUNT_OFFSET, index + 1)
+
+    def dump(self, reason):
+        """
+        Sauvegarde le contenu de l'anneau sur disque
+
+        Args:
+            reason (str): Raison de la sauvegarde (incluse dans le nom du fichier)
+
+        Returns:
+            str: Chemin du fichier écrit
+        """
+        if reason != "previous":
+            self.record(DUMP)
+
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+        path = os.path.join(self.dump_dir, f"{self.name}_{reason}_{timestamp}.bin")
+        with open(path, 'wb') as f:
+            f.write(bytes(self.shm.buf[:self.size]))
+
+        # Ne garder que les sauvegardes les plus récentes, par raison : une rafale
+        # d'obstacles ne doit pas effacer les sauvegardes de crash
+        keep = self.keep_obstacle_dumps if reason == "obstacle" else self.keep_dumps
+        dumps = sorted(glob.glob(os.path.join(self.dump_dir, f"{self.name}_{reason}_*.bin")), key=os.path.getmtime)
+        for old in dumps[:-keep]:
+            os.remove(old)
+
+        return path
+
+    def dump_obstacle(self):
+        """
+        Sauvegarde l'anneau après un obstacle, dans un thread (écriture disque hors
+        de la boucle appelante) et au plus une fois par obstacle_dump_interval
+
+        Returns:
+            bool: True si une sauvegarde a été lancée
+        """
+        now = time.monotonic()
+        if self.last_obstacle_dump is not None and now - self.last_obstacle_dump < self.obstacle_dump_interval:
+            return False
+        self.last_obstacle_dump = now
+        Thread(target=self._dump_obstacle, daemon=True).start()
+        return True
+
+    def _dump_obstacle(self):
+        """Sauvegarde d'obstacle (thread dédié)"""
+        try:
+            path = self.dump("obstacle")
+        except OSError as e:
+            logger.error(f"Sauvegarde de l'enregistreur impossible: {e}")
+            return
+        logger.info(f"🛩  Enregistreur de vol sauvegardé: {path}")
+
+    def close(self, clean=False):
+        """
+        Détache le segment (il reste lisible avec --live jusqu'à l'exécution suivante)
+
+        Args:
+            clean (bool): Arrêt propre : l'exécution suivante ne sauvegarde pas l'anneau
+        """
+        if clean:
+            CLEAN.pack_into(self.buf, CLEAN_OFFSET, 1)
+        self.buf = None
+        self.shm.close()
+
+
+def decode(data):
+    """
+    Décode le contenu d'un anneau
+
+    Args:
+        data (bytes): Contenu brut (sauvegarde ou segment)
+
+    Returns:
+        tuple: (en-tête dict, liste des événements triés par date)
+    """
+    magic, record_size, capacity, count, wall_ref, mono_ref = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or record_size != RECORD.size:
+        raise ValueError("Format d'enregistreur de vol inconnu")
+
+    events = []
+    for offset in range(HEADER_SIZE, HEADER_SIZE + capacity * RECORD.size, RECORD.size):
+        mono, kind, a, b, c = RECORD.unpack_from(data, offset)
+        if mono > 0:
+            events.append({"mono": mono, "wall": wall_ref + (mono - mono_ref),
+                           "kind": KIND_NAMES.get(kind, str(kind)), "values": (a, b, c)})
+    events.sort(key=lambda e: e['mono'])
+
+    clean = bool(CLEAN.unpack_from(data, CLEAN_OFFSET)[0])
+    header = {"capacity": capacity, "count": count, "started": wall_ref, "clean": clean}
+    return header, events
+
+
+def format_event(event, end):
+    """Ligne lisible d'un événement (temps relatif au dernier événement)"""
+    a, b, c = event['values']
+    kind = event['kind']
+    if kind == "command":
+        gyro = "-" if math.isnan(c) else f"{c:+.2f}"
+        details = f"joy x={a:+.2f} y={b:+.2f} gyro={gyro}"
+    elif kind == "motor":
+        details = f"A={a:+.2f} B={b:+.2f}{' [avant bloqué]' if c else ''}"
+    elif kind in ("distance", "clear"):
+        details = f"{a:.1f} cm"
+    elif kind == "obstacle":
+        details = f"{a:.1f} cm, réaction {b:.3f} ms"
+    else:
+        details = ""
+
+    clock = datetime.fromtimestamp(event['wall']).strftime('%H:%M:%S.%f')[:-3]
+    return f"{event['mono'] - end:+9.3f}s  {clock}  {kind.upper():9s} {details}"
+
+
+def main():
+    """Décodeur en ligne de commande"""
+    parser = argparse.ArgumentParser(description="Décode une sauvegarde de l'enregistreur de vol")
+    parser.add_argument("dump", nargs="?", help="Fichier .bin sauvegardé")
+    parser.add_argument("--live", metavar="NOM", help="Lire le segment en mémoire partagée (ex: control)")
+    parser.add_argument("--kind", help="Types à afficher, séparés par des virgules (ex: obstacle,motor)")
+    parser.add_argument("--since", type=float, help="Secondes avant le dernier événement")
+    parser.add_argument("--last", type=int, help="Nombre d'événements à afficher (les plus récents)")
+    args = parser.parse_args()
+
+    if args.live:
+        shm = shared_memory.SharedMemory(name=f"fiara_flight_{args.live}")
+        _untrack(shm)
+        data = bytes(shm.buf)
+        shm.close()
+    elif args.dump:
+        with open(args.dump, 'rb') as f:
+            data = f.read()
+    else:
+        parser.error("indiquez un fichier ou --live")
+
+    header, events = decode(data)
+    if not events:
+        print("Aucun événement")
+        return
+
+    end = events[-1]['mono']
+    if args.kind:
+        kinds = set(args.kind.split(','))
+        events = [e for e in events if e['kind'] in kinds]
+    if args.since is not None:
+        events = [e for e in events if e['mono'] >= end - args.since]
+    if args.last:
+        events = events[-args.last:]
+
+    print(f"Enregistreur démarré le {datetime.fromtimestamp(header['started'])}, "
+          f"{header['count']} événements écrits (capacité {header['capacity']})"
+          f"{', arrêt propre' if header['clean'] else ''}")
+    for event in events:
+        print(format_event(event, end))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,775 @@
+"""
+Accès au matériel du robot (moteurs + capteur ultrason)
+
+Deux modes, même interface pour le serveur de contrôle :
+- LocalHardware : pilotes dans le processus du serveur (mode historique)
+- HardwareProcess : pilotes dans un processus dédié ; le serveur et ce processus
+  échangent la dernière commande et le dernier état par mémoire partagée
+  (SeqlockChannel), sans verrou : ni la boucle gevent ni l'attente active du
+  capteur ne peuvent retarder l'autre côté
+"""
+
+import multiprocessing
+import logging
+import fcntl
+import signal
+import struct
+import math
+import time
+import sys
+import os
+
+from src.safety import SafetyStop, ReactionHistogram
+from src.shared_state import SeqlockChannel
+from src.flight_recorder import FlightRecorder, MOTOR, DISTANCE
+
+logger = logging.getLogger(__name__)
+
+# Segments suffixés par le PID du serveur (un serveur de secours a les siens)
+COMMAND_CHANNEL = "fiara_hw_command"
+STATE_CHANNEL = "fiara_hw_state"
+
+# Commande : instant d'envoi (monotone), type, joystick x/y, gyro x, gyro activé
+COMMAND_RECORD = struct.Struct('<dBfffB')
+CMD_UPDATE = 1
+CMD_STOP = 2
+
+# État : instant (monotone), commande appliquée, Motor A/B signés, marche avant
+# bloquée, source gyro, distance (NaN si aucune), nombre de mesures, compteurs
+# obstacle/dégagé, dernier temps de réaction (ms), latence commande -> PWM (ms),
+# retard max de la boucle sur la dernière seconde (ms)
+STATE_RECORD = struct.Struct('<dQffBBfIIIfff')
+
+# Attente du verrou GPIO par le serveur quand le processus matériel est mort
+# (le noyau l'a déjà libéré : quelques ms suffisent)
+CRASH_STOP_LOCK_TIMEOUT = 0.5
+
+
+def _finite(value):
+    """NaN (valeur absente sur le canal) -> None"""
+    return None if math.isnan(value) else value
+
+
+def _rounded(value, digits=3):
+    """Arrondi pour les métriques (None conservé)"""
+    return None if value is None else round(value, digits)
+
+
+def signed_speed(motor_state):
+    """Vitesse signée d'un moteur (négative en marche arrière)"""
+    direction = motor_state['direction']
+    return motor_state['speed'] if direction == "forward" else -motor_state['speed'] if direction == "backward" else 0.0
+
+
+def motion_sample(motor_a, motor_b, inhibited, distance, readings):
+    """
+    Mouvement effectif et dernière mesure (cartographie)
+
+    Args:
+        motor_a (float): Vitesse signée commandée de Motor A
+        motor_b (float): Vitesse signée de Motor B
+        inhibited (bool): Marche avant bloquée (Motor A coupé en avant)
+        distance (float): Dernière distance mesurée (cm), ou None
+        readings (int): Nombre de mesures depuis le démarrage
+
+    Returns:
+        dict: motor_a, motor_b, distance, readings
+    """
+    return {
+        "motor_a": 0.0 if inhibited and motor_a > 0 else motor_a,
+        "motor_b": motor_b,
+        "distance": distance,
+        "readings": readings
+    }
+
+
+def acquire_gpio_lock(path, timeout):
+    """
+    Verrou exclusif sur les GPIO, libéré par le noyau à la mort du processus
+
+    Un processus qui reprend les GPIO (serveur de secours, processus matériel
+    relancé) attend ainsi que l'ancien propriétaire ait arrêté les moteurs et
+    soit sorti.
+
+    Args:
+        path (str): Fichier de verrou
+        timeout (float): Attente maximale (secondes)
+
+    Returns:
+        int: Descripteur du fichier verrouillé (à garder ouvert)
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return fd
+        except BlockingIOError:
+            if time.monotonic() > deadline:
+                os.close(fd)
+                raise RuntimeError(f"GPIO toujours utilisés par un autre processus ({path})")
+            time.sleep(0.002)
+
+
+def hold_motor_pins_low(config):
+    """
+    Force à 0 les broches des deux moteurs (PWM et directions)
+
+    Utilisé par le serveur quand le processus matériel est mort : ses GPIO
+    gardent leur dernier niveau. Appeler avec le verrou GPIO pris.
+
+    Args:
+        config (dict): Configuration complète (config.yaml)
+
+    Returns:
+        list: Sorties à fermer pour rendre les broches (close())
+    """
+    # Importé ici : en mode processus dédié, le serveur ne touche aux GPIO qu'après un crash
+    from gpiozero import DigitalOutputDevice
+
+    devices = []
+    try:
+        for motor in ('motor_a', 'motor_b'):
+            for pin in ('enable_pin', 'input1_pin', 'input2_pin'):
+                devices.append(DigitalOutputDevice(config['gpio'][motor][pin], initial_value=False))
+    except Exception:
+        for device in devices:
+            device.close()
+        raise
+    return devices
+
+
+class LocalHardware:
+    """Moteurs, capteur ultrason et arrêt d'urgence dans le processus courant"""
+
+    def __init__(self, config, recorder, gpio_lock=None):
+        """
+        Initialise les pilotes
+
+        Args:
+            config (dict): Configuration complète (config.yaml)
+            recorder (FlightRecorder): Enregistreur de vol du processus
+            gpio_lock (int): Verrou GPIO déjà pris (sinon pris ici)
+        """
+        # Importés ici : en mode processus dédié, le serveur ne touche pas aux GPIO
+        from src.motor_controller import MotorController
+        from src.ultrasonic_sensor import UltrasonicSensor
+
+        hardware_config = config['hardware']
+        if gpio_lock is None:
+            gpio_lock = acquire_gpio_lock(hardware_config['lock_file'], hardware_config['startup_timeout'])
+        self.gpio_lock = gpio_lock
+
+        self.recorder = recorder
+        self.motor_controller = MotorController(config)
+        self.motor_state = {"motor_a": 0.0, "motor_b": 0.0}
+        self.readings = 0
+
+        # Capteur ultrason branché directement sur le chemin d'arrêt d'urgence
+        ultrasonic_config = config['ultrasonic']
+        self.safety = SafetyStop(self.motor_controller, recorder)
+        self.ultrasonic_sensor = UltrasonicSensor(
+            trig_pin=ultrasonic_config['trig_pin'],
+            echo_pin=ultrasonic_config['echo_pin'],
+            threshold_cm=ultrasonic_config['threshold_cm'],
+            clear_margin_cm=ultrasonic_config['clear_margin_cm'],
+            clear_readings=ultrasonic_config['clear_readings']
+        )
+        self.ultrasonic_sensor.set_obstacle_callback(self.safety.on_obstacle)
+        self.ultrasonic_sensor.set_clear_callback(self.safety.on_clear)
+        self.ultrasonic_sensor.set_distance_callback(self._on_distance)
+
+    def _on_distance(self, distance):
+        """Mesure valide du capteur (thread du capteur)"""
+        self.readings += 1
+        self.recorder.record(DISTANCE, distance)
+
+    def start(self):
+        """Démarre la surveillance des obstacles"""
+        self.ultrasonic_sensor.start_monitoring()
+
+    def command(self, joystick, gyro_enabled=False, gyro_x=0):
+        """
+        Applique une commande aux moteurs
+
+        Args:
+            joystick (dict): Commandes joystick {x, y}
+            gyro_enabled (bool): Gyroscope activé
+            gyro_x (float): Valeur gyroscope X
+
+        Returns:
+            dict: État des moteurs (vitesses signées, blocage, source)
+        """
+        state = self.motor_controller.update(joystick, gyro_enabled, gyro_x)
+        motor_a = signed_speed(state['motor_a'])
+        motor_b = signed_speed(state['motor_b'])
+        self.motor_state = {"motor_a": motor_a, "motor_b": motor_b}
+        self.recorder.record(MOTOR, motor_a, motor_b, state['motor_a']['inhibited'])
+        return {
+            "motor_a": motor_a,
+            "motor_b": motor_b,
+            "inhibited": state['motor_a']['inhibited'],
+            "source": state['motor_b']['source']
+        }
+
+    def stop_all(self):
+        """Arrête tous les moteurs"""
+        self.motor_controller.stop_all()
+        self.motor_state = {"motor_a": 0.0, "motor_b": 0.0}
+
+    @property
+    def distance(self):
+        """Dernière distance mesurée (cm), ou None"""
+        return self.ultrasonic_sensor.current_distance
+
+    @property
+    def forward_inhibited(self):
+        """Marche avant bloquée par un obstacle"""
+        return self.motor_controller.forward_inhibited
+
+    def motion(self):
+        """Mouvement effectif et dernière mesure (voir motion_sample)"""
+        return motion_sample(self.motor_state['motor_a'], self.motor_state['motor_b'],
+                             self.forward_inhibited, self.distance, self.readings)
+
+    def pop_events(self):
+        """Événements d'arrêt d'urgence en attente de notification"""
+        return self.safety.pop_events()
+
+    def check(self):
+        """Rien à surveiller : les pilotes vivent dans ce processus"""
+
+    def metrics(self):
+        """
+        Métriques de sécurité
+
+        Returns:
+            dict: Temps de réaction, blocage, distance
+        """
+        return {
+            "mode": "local",
+            "reaction_time": self.safety.histogram.snapshot(),
+            "forward_inhibited": self.forward_inhibited,
+            "distance_cm": self.distance
+        }
+
+    def close(self):
+        """Libère les GPIO (moteurs arrêtés)"""
+        self.ultrasonic_sensor.cleanup()
+        logger.info("✅ Ressources ultrason libérées")
+        self.motor_controller.cleanup()
+        os.close(self.gpio_lock)
+
+
+class HardwareLoop:
+    """Boucle du processus matériel : lit les commandes, publie l'état"""
+
+    def __init__(self, hardware, commands, states, poll_interval=0.002, heartbeat=0.1,
+                 parent_pid=None, recorder=None, server_heartbeat=None, server_timeout=0.5):
+        """
+        Initialise la boucle
+
+        Args:
+            hardware: Pilotes (LocalHardware ou équivalent)
+            commands (SeqlockChannel): Canal des commandes (lecture)
+            states (SeqlockChannel): Canal de l'état (écriture)
+            poll_interval (float): Période de lecture des commandes (secondes)
+            heartbeat (float): Période maximale entre deux publications d'état (secondes)
+            parent_pid (int): Processus serveur ; moteurs arrêtés s'il disparaît
+            recorder (FlightRecorder): Enregistreur sauvegardé à chaque obstacle
+            server_heartbeat (RawValue): Battement de cœur du serveur (horloge monotone)
+            server_timeout (float): Moteurs arrêtés sans battement ni commande pendant ce délai
+        """
+        self.hardware = hardware
+        self.commands = commands
+        self.states = states
+        self.poll_interval = poll_interval
+        self.heartbeat = heartbeat
+        self.parent_pid = parent_pid
+        self.recorder = recorder
+        self.server_heartbeat = server_heartbeat
+        self.server_timeout = server_timeout
+        self.server_stalled = False
+        # Délai compté au plus tôt depuis le démarrage de la boucle (chargement de l'interpréteur)
+        self.last_command_sent = time.monotonic()
+        self.running = True
+
+        # Commandes publiées avant le démarrage ignorées : moteurs à l'arrêt
+        self.applied_sequence = commands.read()[0]
+        self.motor_state = {"motor_a": 0.0, "motor_b": 0.0, "inhibited": False, "source": "JOY"}
+        # Compteurs repris de l'état publié par un processus précédent (relance) : le
+        # serveur en déduit les événements, ils ne doivent ni rejouer ni perdre d'obstacle
+        _, state = states.read()
+        self.obstacle_count, self.clear_count = state[8:10] if state is not None else (0, 0)
+        # Obstacle en cours au crash : la nouvelle boucle démarre marche avant autorisée
+        # (dégagé) et le capteur le détectera de nouveau s'il est toujours là
+        self.clear_count = max(self.clear_count, self.obstacle_count)
+        self.reaction_ms = math.nan
+        self.command_latency_ms = math.nan
+        self.jitter_ms = 0.0
+        self.window_jitter_ms = 0.0
+        self.window_start = time.monotonic()
+
+    def _apply(self, values):
+        """Applique une commande lue sur le canal"""
+        sent, kind, joy_x, joy_y, gyro_x, gyro_enabled = values
+        if kind == CMD_STOP:
+            self.hardware.stop_all()
+            self.motor_state = dict(self.motor_state, motor_a=0.0, motor_b=0.0)
+        else:
+            self.motor_state = self.hardware.command({"x": joy_x, "y": joy_y}, bool(gyro_enabled), gyro_x)
+        self.last_command_sent = sent
+        self.command_latency_ms = (time.monotonic() - sent) * 1000
+
+    def _check_server(self, now):
+        """
+        Arrête les moteurs si le serveur vit mais ne répond plus (boucle bloquée)
+
+        Returns:
+            bool: Moteurs arrêtés à l'instant (état à publier)
+        """
+        if self.server_heartbeat is None:
+            return False
+        last = max(self.server_heartbeat.value, self.last_command_sent)
+        stalled = now - last > self.server_timeout
+        if stalled == self.server_stalled:
+            return False
+
+        self.server_stalled = stalled
+        if not stalled:
+            logger.info("💓 Serveur de contrôle de nouveau actif")
+            return False
+        logger.error(f"💤 Serveur de contrôle muet depuis {(now - last) * 1000:.0f} ms - arrêt des moteurs")
+        self.hardware.stop_all()
+        self.motor_state = dict(self.motor_state, motor_a=0.0, motor_b=0.0)
+        return True
+
+    def _handle_events(self):
+        """Compte les arrêts d'urgence (le serveur les notifie aux clients)"""
+        events = self.hardware.pop_events()
+        for event in events:
+            if event['type'] == "obstacle":
+                self.obstacle_count += 1
+                self.reaction_ms = event['reaction_ms']
+                if self.recorder:
+                    self.recorder.dump_obstacle()
+            else:
+                self.clear_count += 1
+        return bool(events)
+
+    def _publish(self, now):
+        """Publie l'état courant"""
+        distance = self.hardware.distance
+        self.states.write(
+            now, self.applied_sequence,
+            self.motor_state['motor_a'], self.motor_state['motor_b'],
+            self.hardware.forward_inhibited, self.motor_state['source'] == "GYRO",
+            math.nan if distance is None else distance, self.hardware.readings,
+            self.obstacle_count, self.clear_count, self.reaction_ms,
+            self.command_latency_ms, self.jitter_ms
+        )
+
+    def _parent_alive(self):
+        """Le processus serveur est-il toujours là ?"""
+        return self.parent_pid is None or os.getppid() == self.parent_pid
+
+    def run(self):
+        """Boucle principale (jusqu'à stop() ou disparition du serveur)"""
+        next_tick = time.monotonic()
+        last_publish = 0.0
+        last_readings = None
+
+        while self.running:
+            now = time.monotonic()
+
+            # Retard du réveil par rapport à l'échéance prévue
+            self.window_jitter_ms = max(self.window_jitter_ms, (now - next_tick) * 1000)
+            if now - self.window_start >= 1.0:
+                self.jitter_ms = self.window_jitter_ms
+                self.window_jitter_ms = 0.0
+                self.window_start = now
+
+            changed = False
+            sequence, values = self.commands.read()
+            if sequence > self.applied_sequence and values is not None:
+                self._apply(values)
+                self.applied_sequence = sequence
+                changed = True
+
+            changed |= self._check_server(now)
+            changed |= self._handle_events()
+            # Chaque mesure est publiée (cartographie), même à distance égale
+            if self.hardware.readings != last_readings:
+                last_readings = self.hardware.readings
+                changed = True
+
+            if changed or now - last_publish >= self.heartbeat:
+                self._publish(now)
+                last_publish = now
+
+            if not self._parent_alive():
+                logger.error("💀 Serveur de contrôle disparu - arrêt des moteurs")
+                self.hardware.stop_all()
+                break
+
+            next_tick += self.poll_interval
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.monotonic()
+
+    def stop(self):
+        """Demande l'arrêt de la boucle"""
+        self.running = False
+
+
+def hardware_main(config, parent_pid, channel_suffix, go, claiming, server_heartbeat):
+    """
+    Point d'entrée du processus matériel
+
+    Args:
+        config (dict): Configuration complète (config.yaml)
+        parent_pid (int): Processus serveur
+        channel_suffix (str): Suffixe des segments partagés du serveur
+        go (Event): Autorisation de prendre les GPIO (serveur de secours promu)
+        claiming (Event): Levé juste avant de prendre le verrou GPIO (le serveur
+            qui maintient les moteurs à l'arrêt après un crash le rend alors)
+        server_heartbeat (RawValue): Battement de cœur du serveur (horloge monotone)
+    """
+    log_config = config['logging']
+    logging.basicConfig(
+        level=getattr(logging, log_config['level']),
+        format=log_config['format'],
+        handlers=[
+            logging.FileHandler(log_config['file']),
+            logging.StreamHandler() if log_config['console'] else logging.NullHandler()
+        ]
+    )
+
+    # Ctrl+C est géré par le serveur, qui arrête ce processus proprement
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    # Pilotes importés d'avance : seule l'initialisation des GPIO reste à faire
+    import src.motor_controller
+    import src.ultrasonic_sensor
+
+    # Processus préparé par un serveur de secours : attendre sa promotion
+    while not go.wait(timeout=0.5):
+        if os.getppid() != parent_pid:
+            return
+
+    hardware_config = config['hardware']
+    claiming.set()
+    gpio_lock = acquire_gpio_lock(hardware_config['lock_file'], hardware_config['startup_timeout'])
+    commands = SeqlockChannel(f"{COMMAND_CHANNEL}_{channel_suffix}", COMMAND_RECORD)
+    states = SeqlockChannel(f"{STATE_CHANNEL}_{channel_suffix}", STATE_RECORD)
+    recorder = FlightRecorder("hardware", config['flight_recorder'])
+    hardware = LocalHardware(config, recorder, gpio_lock)
+    loop = HardwareLoop(hardware, commands, states,
+                        poll_interval=hardware_config['poll_interval'],
+                        heartbeat=hardware_config['heartbeat'],
+                        parent_pid=parent_pid, recorder=recorder,
+                        server_heartbeat=server_heartbeat,
+                        server_timeout=hardware_config['server_timeout'])
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: loop.stop())
+
+    # L'attente active du capteur ne garde le GIL que brièvement face à la boucle
+    sys.setswitchinterval(hardware_config['switch_interval'])
+
+    logger.info(f"🔧 Processus matériel démarré (PID {os.getpid()})")
+    hardware.start()
+    try:
+        loop.run()
+    finally:
+        hardware.close()
+        # Arrêt demandé par le serveur : rien à sauvegarder au prochain démarrage
+        recorder.close(clean=not loop.running)
+        commands.close()
+        states.close()
+        logger.info("🔧 Processus matériel arrêté")
+
+
+class HardwareProcess:
+    """Pilotes dans un processus dédié, vus depuis le serveur de contrôle"""
+
+    def __init__(self, config):
+        """
+        Crée les canaux partagés (le processus démarre avec start())
+
+        Args:
+            config (dict): Configuration complète (config.yaml)
+        """
+        self.config = config
+        self.hardware_config = config['hardware']
+        self.channel_suffix = str(os.getpid())
+        self.commands = SeqlockChannel(f"{COMMAND_CHANNEL}_{self.channel_suffix}", COMMAND_RECORD, create=True)
+        self.states = SeqlockChannel(f"{STATE_CHANNEL}_{self.channel_suffix}", STATE_RECORD, create=True)
+
+        # "spawn" : interpréteur neuf, sans gevent ni Flask chargés
+        self.context = multiprocessing.get_context("spawn")
+        self.go = self.context.Event()
+        self.claiming = self.context.Event()
+        # Rafraîchi par check() : le processus matériel arrête les moteurs s'il vieillit
+        self.server_heartbeat = self.context.RawValue('d', 0.0)
+        # Verrou GPIO et sorties tenus par le serveur entre un crash et la relance
+        self.crash_hold = None
+
+        self.histogram = ReactionHistogram()
+        self.process = None
+        self.spawned_at = None
+        self.restarts = 0
+        # Relances rapprochées (processus mort moins de min_uptime après son lancement)
+        self.fast_failures = 0
+        # Instant de la prochaine relance (None : pas de relance en attente, inf : abandon)
+        self.respawn_at = None
+        self.seen_obstacles = 0
+        self.seen_clears = 0
+
+    def _spawn(self):
+        """Lance un nouveau processus matériel"""
+        self.process = self.context.Process(target=hardware_main,
+                                            args=(self.config, os.getpid(), self.channel_suffix, self.go,
+                                                  self.claiming, self.server_heartbeat),
+                                            name="hardware", daemon=True)
+        self.claiming.clear()
+        self.spawned_at = time.monotonic()
+        self.process.start()
+
+    def prepare(self):
+        """
+        Lance le processus matériel sans toucher aux GPIO (serveur de secours)
+
+        Interpréteur et pilotes sont chargés d'avance ; start() n'a plus qu'à
+        initialiser les GPIO
+        """
+        if self.process is None:
+            self._spawn()
+
+    def start(self):
+        """Démarre le processus (si besoin) et attend sa première publication d'état"""
+        self.server_heartbeat.value = time.monotonic()
+        self.go.set()
+        if self.process is None:
+            self._spawn()
+        # Processus préparé d'avance (secours) : la durée de vie compte à partir d'ici
+        self.spawned_at = time.monotonic()
+        deadline = time.monotonic() + self.hardware_config['startup_timeout']
+        while self.states.read()[0] == 0:
+            if not self.process.is_alive():
+                raise RuntimeError(f"Processus matériel terminé au démarrage (code {self.process.exitcode})")
+            if time.monotonic() > deadline:
+                raise RuntimeError("Processus matériel sans réponse au démarrage")
+            time.sleep(0.01)
+        logger.info(f"🔧 Processus matériel prêt (PID {self.process.pid})")
+
+    def check(self):
+        """
+        Relance le processus matériel s'il s'est arrêté
+
+        Les GPIO gardent leur dernier niveau à la mort du processus : le serveur
+        force les moteurs à 0 avant la relance et les tient jusqu'à ce que le
+        nouveau processus réclame le verrou GPIO (interpréteur chargé). Seuls
+        l'attente du verrou (2 ms) et l'initialisation des pilotes séparent
+        ensuite les deux propriétaires.
+
+        Un processus mort moins de min_uptime secondes après son lancement n'est
+        relancé qu'après restart_backoff secondes, et plus du tout après
+        max_fast_restarts relances rapprochées : les moteurs restent tenus à 0.
+
+        Appelé périodiquement par le serveur : sert aussi de battement de cœur.
+        """
+        now = time.monotonic()
+        self.server_heartbeat.value = now
+        if self.crash_hold is not None and self.claiming.is_set():
+            self._release_motors()
+        if self.process is None or self.process.is_alive():
+            return
+
+        if self.respawn_at is None:
+            self._schedule_respawn(now)
+        if now < self.respawn_at:
+            return
+        self.respawn_at = None
+        self.restarts += 1
+        self._spawn()
+
+    def _schedule_respawn(self, now):
+        """Tient les moteurs à 0 et fixe l'instant de relance du processus mort"""
+        # Moteurs déjà tenus si le processus est mort avant de réclamer le verrou
+        if self.crash_hold is None:
+            self._hold_motors()
+
+        uptime = now - self.spawned_at
+        if uptime >= self.hardware_config['min_uptime']:
+            self.fast_failures = 0
+            logger.error(f"💥 Processus matériel arrêté (code {self.process.exitcode}) - redémarrage")
+            self.respawn_at = now
+            return
+
+        self.fast_failures += 1
+        if self.fast_failures > self.hardware_config['max_fast_restarts']:
+            logger.critical(f"💥 Processus matériel arrêté (code {self.process.exitcode}) après "
+                            f"{uptime:.1f}s, {self.fast_failures} fois de suite - relance abandonnée, "
+                            f"moteurs tenus à l'arrêt")
+            self.respawn_at = math.inf
+            return
+
+        backoff = self.hardware_config['restart_backoff']
+        logger.error(f"💥 Processus matériel arrêté (code {self.process.exitcode}) après {uptime:.1f}s - "
+                     f"redémarrage dans {backoff}s")
+        self.respawn_at = now + backoff
+
+    def _hold_motors(self):
+        """Prend le verrou GPIO du processus mort et force les moteurs à 0"""
+        gpio_lock = None
+        try:
+            gpio_lock = acquire_gpio_lock(self.hardware_config['lock_file'], CRASH_STOP_LOCK_TIMEOUT)
+            self.crash_hold = (gpio_lock, hold_motor_pins_low(self.config))
+        except Exception as e:
+            if gpio_lock is not None:
+                os.close(gpio_lock)
+            logger.error(f"Arrêt des moteurs impossible depuis le serveur: {e}")
+            return
+        logger.warning("⏸ Moteurs forcés à l'arrêt par le serveur jusqu'à la relance")
+
+    def _release_motors(self):
+        """Rend les broches et le verrou GPIO au processus matériel"""
+        gpio_lock, devices = self.crash_hold
+        self.crash_hold = None
+        for device in devices:
+            device.close()
+        os.close(gpio_lock)
+
+    def _state(self):
+        """Dernier état publié (dict), ou None"""
+        _, values = self.states.read()
+        if values is None:
+            return None
+        (timestamp, applied, motor_a, motor_b, inhibited, gyro, distance, readings, obstacles, clears,
+         reaction_ms, latency_ms, jitter_ms) = values
+        return {
+            "timestamp": timestamp,
+            "applied_command": applied,
+            "motor_a": motor_a,
+            "motor_b": motor_b,
+            "inhibited": bool(inhibited),
+            "source": "GYRO" if gyro else "JOY",
+            "distance": None if math.isnan(distance) else round(distance, 2),
+            "readings": readings,
+            "obstacles": obstacles,
+            "clears": clears,
+            "reaction_ms": _finite(reaction_ms),
+            "command_latency_ms": _finite(latency_ms),
+            "loop_jitter_ms": jitter_ms
+        }
+
+    def command(self, joystick, gyro_enabled=False, gyro_x=0):
+        """
+        Publie une commande (appliquée par le processus matériel)
+
+        Returns:
+            dict: Dernier état connu des moteurs (avant application de cette commande)
+        """
+        self.commands.write(time.monotonic(), CMD_UPDATE, joystick.get('x', 0), joystick.get('y', 0),
+                            gyro_x, gyro_enabled)
+        return self._state()
+
+    def stop_all(self):
+        """Demande l'arrêt de tous les moteurs"""
+        self.commands.write(time.monotonic(), CMD_STOP, 0.0, 0.0, 0.0, False)
+
+    @property
+    def distance(self):
+        """Dernière distance mesurée (cm), ou None"""
+        state = self._state()
+        return state['distance'] if state else None
+
+    @property
+    def forward_inhibited(self):
+        """Marche avant bloquée par un obstacle"""
+        state = self._state()
+        return state['inhibited'] if state else False
+
+    def motion(self):
+        """Mouvement effectif et dernière mesure (voir motion_sample)"""
+        state = self._state()
+        if state is None:
+            return motion_sample(0.0, 0.0, False, None, 0)
+        return motion_sample(state['motor_a'], state['motor_b'], state['inhibited'],
+                             state['distance'], state['readings'])
+
+    def pop_events(self):
+        """
+        Événements d'arrêt d'urgence depuis le dernier appel (déduits des compteurs)
+
+        Returns:
+            list: Événements dans l'ordre (obstacle et dégagé alternent)
+        """
+        state = self._state()
+        if state is None:
+            return []
+
+        events = []
+        while self.seen_obstacles < state['obstacles'] or self.seen_clears < state['clears']:
+            if self.seen_obstacles <= self.seen_clears and self.seen_obstacles < state['obstacles']:
+                self.seen_obstacles += 1
+                self.histogram.record(state['reaction_ms'])
+                events.append({"type": "obstacle", "distance": state['distance'],
+                               "reaction_ms": round(state['reaction_ms'], 3)})
+            else:
+                self.seen_clears += 1
+                events.append({"type": "clear", "distance": state['distance']})
+        return events
+
+    def metrics(self):
+        """
+        Métriques de sécurité et du canal partagé
+
+        Returns:
+            dict: Temps de réaction, blocage, distance, latence et gigue du processus matériel
+        """
+        state = self._state() or {}
+        return {
+            "mode": "process",
+            "pid": self.process.pid,
+            "alive": self.process.is_alive(),
+            "restarts": self.restarts,
+            "respawn_abandoned": self.respawn_at == math.inf,
+            "reaction_time": self.histogram.snapshot(),
+            "forward_inhibited": state.get('inhibited', False),
+            "distance_cm": state.get('distance'),
+            "command_latency_ms": _rounded(state.get('command_latency_ms')),
+            "loop_jitter_ms": _rounded(state.get('loop_jitter_ms')),
+            "state_age_ms": round((time.monotonic() - state['timestamp']) * 1000, 1) if state else None
+        }
+
+    def close(self):
+        """Arrête le processus matériel (moteurs arrêtés) et libère les canaux"""
+        self.stop_all()
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=2)
+        if self.crash_hold is not None:
+            self._release_motors()
+        self.commands.close()
+        self.states.close()
+        logger.info("✅ Processus matériel arrêté")
+
+
+def create_hardware(config, recorder):
+    """
+    Crée l'accès au matériel selon la configuration
+
+    Args:
+        config (dict): Configuration complète (config.yaml)
+        recorder (FlightRecorder): Enregistreur de vol du serveur (mode local)
+
+    Returns:
+        LocalHardware ou HardwareProcess
+    """
+    if config['hardware']['separate_process']:
+        return HardwareProcess(config)
+    return LocalHardware(config, recorder)
@@ -0,0 +1,45 @@
+"""
+Utilitaires de découpage du flux MJPEG (IP Webcam)
+"""
+
+# Marqueurs JPEG (début / fin d'image)
+JPEG_SOI = b'\xff\xd8'
+JPEG_EOI = b'\xff\xd9'
+
+# Taille max du tampon avant abandon (flux corrompu)
+MAX_BUFFER_BYTES = 1024 * 1024
+
+
+def count_frames(chunk):
+    """
+    Compte les débuts d'image JPEG dans un chunk
+
+    Args:
+        chunk (bytes): Données du flux MJPEG
+
+    Returns:
+        int: Nombre d'images commencées dans ce chunk
+    """
+    return chunk.count(JPEG_SOI)
+
+
+def extract_latest_frame(buffer):
+    """
+    Extrait la dernière image complète du tampon et purge les précédentes
+
+    Args:
+        buffer (bytearray): Tampon du stream (modifié sur place)
+
+    Returns:
+        bytes: Image JPEG, ou None si aucune image complète
+    """
+    end = buffer.rfind(JPEG_EOI)
+    if end < 0:
+        if len(buffer) > MAX_BUFFER_BYTES:
+            buffer.clear()
+        return None
+
+    start = buffer.rfind(JPEG_SOI, 0, end)
+    frame = bytes(buffer[start:end + 2]) if start >= 0 else None
+    del buffer[:end + 2]
+    return frame
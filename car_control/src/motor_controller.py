@@ -4,7 +4,9 @@ Gère les moteurs via GPIO
 """
 
 from gpiozero import PWMOutputDevice, DigitalOutputDevice
+from threading import Lock
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -32,19 +34,6 @@ class Motor:
         self.input2 = DigitalOutputDevice(input2_pin)
         
         logger.info(f"✓ {name} initialisé: EN={enable_pin}, IN1={input1_pin}, IN2={input2_pin}, Max={max_speed*100}%")
-        
-        self.motor_controller = MotorController(self.config)
-    
-	    # AJOUT: Capteur ultrason
-        self.ultrasonic_sensor = UltrasonicSensor(
-            trig_pin=16,
-            echo_pin=24,
-            threshold_cm=20
-        )
-        self.ultrasonic_sensor.set_obstacle_callback(self.on_obstacle_detected)
-        self.ultrasonic_sensor.start_monitoring()
-        logger.info("🚨 Système de détection d'obstacles activé")
-    
     
     def set_speed(self, value):
         """
@@ -136,6 +125,10 @@ class MotorController:
             max_speed=motor_b_cfg['max_speed']
         )
         
+        # Marche avant bloquée par le chemin d'arrêt d'urgence (obstacle présent)
+        self.forward_inhibited = False
+        self.motor_a_lock = Lock()
+        
         logger.info("✅ Contrôleur de moteurs initialisé")
     
     def update(self, joystick, gyro_enabled=False, gyro_x=0):
@@ -150,9 +143,13 @@ class MotorController:
         Returns:
             dict: État des moteurs
         """
-        # Moteur A : avance/recul (joystick Y)
+        # Moteur A : avance/recul (joystick Y), marche avant bloquée si obstacle
         motor_a_value = joystick.get('y', 0)
-        state_a = self.motor_a.set_speed(motor_a_value)
+        with self.motor_a_lock:
+            if self.forward_inhibited and motor_a_value > 0:
+                motor_a_value = 0
+            state_a = self.motor_a.set_speed(motor_a_value)
+        state_a['inhibited'] = self.forward_inhibited
         
         # Moteur B : virage (joystick X ou gyroscope)
         if gyro_enabled:
@@ -170,6 +167,26 @@ class MotorController:
             'motor_b': state_b
         }
     
+    def emergency_stop(self):
+        """
+        Coupe Motor A et bloque la marche avant (chemin critique : aucun log)
+        
+        Returns:
+            float: Horodatage monotone de la mise à zéro du PWM
+        """
+        with self.motor_a_lock:
+            self.forward_inhibited = True
+            self.motor_a.enable.value = 0
+            pwm_zero = time.monotonic()
+            self.motor_a.input1.off()
+            self.motor_a.input2.off()
+        return pwm_zero
+    
+    def release_forward(self):
+        """Autorise de nouveau la marche avant (obstacle dégagé)"""
+        with self.motor_a_lock:
+            self.forward_inhibited = False
+    
     def stop_all(self):
         """Arrête tous les moteurs"""
         self.motor_a.stop()
@@ -0,0 +1,386 @@
+"""
+Grille d'occupation locale construite à partir du capteur ultrason
+
+Chaque mesure filtrée (médiane glissante) est projetée depuis la pose estimée
+à l'estime à partir des commandes moteurs, sous forme d'un cône : cellules
+libres avant l'écho, occupées autour de l'écho. La mise à jour en log-odds est
+vectorisée (NumPy) et limitée au rectangle englobant du cône.
+
+La mémoire reste bornée : la grille est une fenêtre de taille fixe centrée sur
+la voiture, recentrée par tuiles entières quand la voiture approche d'un bord.
+Seules les tuiles modifiées depuis la dernière publication sont envoyées à
+l'interface web.
+
+Repère : x vers la droite, y vers l'avant au démarrage (cm), cap en radians
+depuis l'axe x (pi/2 au démarrage).
+"""
+
+from collections import deque
+import statistics
+import logging
+import math
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class DistanceFilter:
+    """Médiane glissante des mesures ultrason (rejette les échos parasites isolés)"""
+
+    def __init__(self, window=3, min_cm=2.0, max_cm=400.0):
+        """
+        Args:
+            window (int): Nombre de mesures de la médiane
+            min_cm (float): Distance minimale fiable du capteur
+            max_cm (float): Distance maximale fiable du capteur
+        """
+        self.values = deque(maxlen=window)
+        self.min_cm = min_cm
+        self.max_cm = max_cm
+
+    def add(self, distance):
+        """
+        Ajoute une mesure
+
+        Args:
+            distance (float): Distance mesurée (cm), ou None
+
+        Returns:
+            float: Distance filtrée, ou None si la mesure est hors plage
+        """
+        if distance is None or not self.min_cm <= distance <= self.max_cm:
+            return None
+        self.values.append(distance)
+        return statistics.median(self.values)
+
+
+class DeadReckoning:
+    """Pose estimée à l'estime depuis les vitesses commandées des moteurs"""
+
+    def __init__(self, speed_cm_s, turn_rate_dps):
+        """
+        Args:
+            speed_cm_s (float): Vitesse de la voiture à Motor A = 1.0 (cm/s)
+            turn_rate_dps (float): Vitesse de rotation à Motor B = 1.0 en roulant (°/s)
+        """
+        self.speed_cm_s = speed_cm_s
+        self.turn_rate = math.radians(turn_rate_dps)
+        self.x = 0.0
+        self.y = 0.0
+        self.heading = math.pi / 2
+        self.distance_cm = 0.0
+        self.last = None
+
+    def update(self, motor_a, motor_b, now):
+        """
+        Intègre le mouvement depuis la mise à jour précédente
+
+        Args:
+            motor_a (float): Vitesse signée effective de Motor A (avance/recul)
+            motor_b (float): Vitesse signée de Motor B (virage, > 0 vers la droite)
+            now (float): Horloge monotone (secondes)
+        """
+        if self.last is None:
+            self.last = now
+            return
+        dt = now - self.last
+        self.last = now
+
+        speed = motor_a * self.speed_cm_s
+        if speed == 0 or dt <= 0:
+            return
+
+        # Direction avant : la voiture ne tourne qu'en roulant (sens inversé en marche arrière)
+        turn = -motor_b * self.turn_rate * dt * (1 if speed > 0 else -1)
+        heading = self.heading + turn / 2
+        self.x += speed * dt * math.cos(heading)
+        self.y += speed * dt * math.sin(heading)
+        self.heading = (self.heading + turn) % (2 * math.pi)
+        self.distance_cm += abs(speed) * dt
+
+    @property
+    def pose(self):
+        """Pose courante (x, y en cm, cap en radians)"""
+        return self.x, self.y, self.heading
+
+
+class OccupancyGrid:
+    """Fenêtre de log-odds (float32) autour de la voiture, découpée en tuiles"""
+
+    def __init__(self, config):
+        """
+        Args:
+            config (dict): Section 'mapping' de config.yaml
+        """
+        self.cell_cm = float(config['cell_cm'])
+        self.tile = config['tile_cells']
+        self.size = config['window_tiles'] * self.tile
+        self.margin = config['recenter_margin_tiles'] * self.tile
+        self.max_range = float(config['max_range_cm'])
+        self.half_angle = math.radians(config['beam_angle_deg']) / 2
+        self.cos_half = math.cos(self.half_angle)
+        self.thickness = float(config['hit_thickness_cm'])
+        self.l_occupied = np.float32(config['log_odds_occupied'])
+        self.l_free = np.float32(config['log_odds_free'])
+        self.l_min = np.float32(config['log_odds_min'])
+        self.l_max = np.float32(config['log_odds_max'])
+
+        # Cellules de la fenêtre et tuiles modifiées depuis la dernière publication
+        self.grid = np.zeros((self.size, self.size), dtype=np.float32)
+        tiles = self.size // self.tile
+        self.dirty = np.zeros((tiles, tiles), dtype=bool)
+
+        # Origine de la fenêtre en cellules globales (multiple de la taille de tuile)
+        self.origin_x = -self.size // 2
+        self.origin_y = -self.size // 2
+
+    def _cell(self, value):
+        """Coordonnée (cm) -> indice global de cellule"""
+        return math.floor(value / self.cell_cm)
+
+    def _align(self, cell):
+        """Indice global de cellule -> début de sa tuile"""
+        return cell - cell % self.tile
+
+    def follow(self, x, y):
+        """
+        Recentre la fenêtre si la voiture approche d'un bord
+
+        Le contenu commun aux deux positions est conservé, le reste est
+        remis à "inconnu". La mémoire utilisée ne change pas.
+
+        Args:
+            x, y (float): Position de la voiture (cm)
+
+        Returns:
+            bool: True si la fenêtre a été déplacée
+        """
+        col = self._cell(x) - self.origin_x
+        row = self._cell(y) - self.origin_y
+        if self.margin <= col < self.size - self.margin and self.margin <= row < self.size - self.margin:
+            return False
+
+        new_x = self._align(self._cell(x) - self.size // 2)
+        new_y = self._align(self._cell(y) - self.size // 2)
+        dx = new_x - self.origin_x
+        dy = new_y - self.origin_y
+
+        self.grid = self._shift(self.grid, dy, dx, 0.0)
+        self.dirty = self._shift(self.dirty, dy // self.tile, dx // self.tile, False)
+        self.origin_x = new_x
+        self.origin_y = new_y
+        return True
+
+    @staticmethod
+    def _shift(array, dy, dx, fill):
+        """Décale un tableau 2D (contenu hors fenêtre perdu, nouvelles cases à fill)"""
+        height, width = array.shape
+        shifted = np.full_like(array, fill)
+        if abs(dy) < height and abs(dx) < width:
+            shifted[max(0, -dy):height - max(0, dy), max(0, -dx):width - max(0, dx)] = \
+                array[max(0, dy):height - max(0, -dy), max(0, dx):width - max(0, -dx)]
+        return shifted
+
+    def _beam_bounds(self, sx, sy, heading, reach):
+        """Rectangle englobant du cône (indices locaux alignés sur les tuiles), ou None"""
+        angles = [heading - self.half_angle, heading + self.half_angle]
+        # Extrêmes de l'arc : directions cardinales comprises dans le cône
+        for k in range(-4, 5):
+            axis = k * math.pi / 2
+            if abs((axis - heading + math.pi) % (2 * math.pi) - math.pi) <= self.half_angle:
+                angles.append(axis)
+        xs = [sx] + [sx + reach * math.cos(a) for a in angles]
+        ys = [sy] + [sy + reach * math.sin(a) for a in angles]
+
+        col0 = max(0, self._align(self._cell(min(xs)) - self.origin_x))
+        row0 = max(0, self._align(self._cell(min(ys)) - self.origin_y))
+        col1 = min(self.size, self._align(self._cell(max(xs)) - self.origin_x) + self.tile)
+        row1 = min(self.size, self._align(self._cell(max(ys)) - self.origin_y) + self.tile)
+        if col0 >= col1 or row0 >= row1:
+            return None
+        return row0, row1, col0, col1
+
+    def integrate(self, sx, sy, heading, distance):
+        """
+        Intègre une mesure (mise à jour log-odds vectorisée sur le cône)
+
+        Args:
+            sx, sy (float): Position du capteur (cm)
+            heading (float): Direction du capteur (radians)
+            distance (float): Distance filtrée (cm) ; au-delà de max_range,
+                seul l'espace libre jusqu'à max_range est pris en compte
+
+        Returns:
+            int: Nombre de cellules modifiées
+        """
+        hit = distance <= self.max_range
+        free_until = min(distance, self.max_range) - (self.thickness / 2 if hit else 0)
+        reach = min(distance, self.max_range) + self.thickness / 2
+        bounds = self._beam_bounds(sx, sy, heading, reach)
+        if bounds is None:
+            return 0
+        row0, row1, col0, col1 = bounds
+
+        # Centres des cellules relatifs au capteur (diffusion ligne x colonne)
+        dx = ((np.arange(col0, col1, dtype=np.float32) + (self.origin_x + 0.5)) * self.cell_cm - sx)[np.newaxis, :]
+        dy = ((np.arange(row0, row1, dtype=np.float32) + (self.origin_y + 0.5)) * self.cell_cm - sy)[:, np.newaxis]
+        r = np.hypot(dx, dy)
+        in_beam = dx * math.cos(heading) + dy * math.sin(heading) >= r * self.cos_half
+
+        update = np.where(in_beam & (r < free_until), self.l_free, np.float32(0))
+        if hit:
+            update[in_beam & (np.abs(r - distance) <= self.thickness / 2)] = self.l_occupied
+
+        patch = self.grid[row0:row1, col0:col1]
+        updated = np.clip(patch + update, self.l_min, self.l_max)
+        changed = updated != patch
+        patch[...] = updated
+
+        # Tuiles touchées par au moins une cellule modifiée
+        tiles = changed.reshape((row1 - row0) // self.tile, self.tile, (col1 - col0) // self.tile, self.tile)
+        self.dirty[row0 // self.tile:row1 // self.tile, col0 // self.tile:col1 // self.tile] |= tiles.any(axis=(1, 3))
+        return int(np.count_nonzero(changed))
+
+    def _tile_bytes(self, row, col):
+        """Probabilités d'occupation d'une tuile (uint8, ligne du haut = y maximal)"""
+        cells = self.grid[row * self.tile:(row + 1) * self.tile, col * self.tile:(col + 1) * self.tile]
+        probability = 1.0 / (1.0 + np.exp(-cells))
+        return (probability[::-1] * 255).astype(np.uint8).tobytes()
+
+    def _tiles(self, rows, cols):
+        """Tuiles en coordonnées globales de tuile"""
+        tile_x = self.origin_x // self.tile
+        tile_y = self.origin_y // self.tile
+        return [{"tx": tile_x + int(col), "ty": tile_y + int(row), "data": self._tile_bytes(row, col)}
+                for row, col in zip(rows, cols)]
+
+    def pop_changed_tiles(self):
+        """
+        Tuiles modifiées depuis le dernier appel
+
+        Returns:
+            list: Tuiles {tx, ty, data}
+        """
+        rows, cols = np.nonzero(self.dirty)
+        self.dirty[:] = False
+        return self._tiles(rows, cols)
+
+    def known_tiles(self):
+        """
+        Tuiles contenant au moins une cellule observée (nouveau client)
+
+        Returns:
+            list: Tuiles {tx, ty, data}
+        """
+        tiles = self.size // self.tile
+        known = (self.grid != 0).reshape(tiles, self.tile, tiles, self.tile).any(axis=(1, 3))
+        rows, cols = np.nonzero(known)
+        return self._tiles(rows, cols)
+
+    def window(self):
+        """Fenêtre courante en coordonnées globales de tuile"""
+        return {"tx": self.origin_x // self.tile, "ty": self.origin_y // self.tile,
+                "tiles": self.size // self.tile}
+
+
+class OccupancyMapper:
+    """Filtre, estime la pose et met à jour la grille à partir de l'état du matériel"""
+
+    def __init__(self, config):
+        """
+        Args:
+            config (dict): Section 'mapping' de config.yaml
+        """
+        self.config = config
+        self.filter = DistanceFilter(config['median_window'], config['min_range_cm'], config['sensor_range_cm'])
+        self.odometry = DeadReckoning(config['speed_cm_s'], config['turn_rate_dps'])
+        self.grid = OccupancyGrid(config)
+        self.sensor_offset = config['sensor_offset_cm']
+        self.readings = None
+        self.integrated = 0
+        self.last_pose = None
+
+        grid_mb = self.grid.grid.nbytes / 1e6
+        logger.info(f"🗺  Grille d'occupation: {self.grid.size}x{self.grid.size} cellules de "
+                    f"{self.grid.cell_cm:g} cm ({grid_mb:.2f} Mo)")
+
+    def update(self, motion, now):
+        """
+        Avance la pose et intègre la dernière mesure si elle est nouvelle
+
+        Args:
+            motion (dict): État du matériel (motor_a, motor_b, distance, readings)
+            now (float): Horloge monotone (secondes)
+        """
+        self.odometry.update(motion['motor_a'], motion['motor_b'], now)
+        x, y, heading = self.odometry.pose
+        self.grid.follow(x, y)
+
+        # Mesure déjà intégrée (ou premier état reçu)
+        if motion['readings'] == self.readings:
+            return
+        first = self.readings is None
+        self.readings = motion['readings']
+        if first:
+            return
+
+        distance = self.filter.add(motion['distance'])
+        if distance is None:
+            return
+        sx = x + self.sensor_offset * math.cos(heading)
+        sy = y + self.sensor_offset * math.sin(heading)
+        self.grid.integrate(sx, sy, heading, distance)
+        self.integrated += 1
+
+    def _pose(self):
+        """Pose arrondie pour l'interface"""
+        x, y, heading = self.odometry.pose
+        return {"x": round(x, 1), "y": round(y, 1), "heading": round(heading, 3)}
+
+    def _message(self, tiles):
+        """Message Socket.IO 'map_tiles'"""
+        return {
+            "cell_cm": self.grid.cell_cm,
+            "tile_cells": self.grid.tile,
+            "window": self.grid.window(),
+            "pose": self._pose(),
+            "tiles": tiles
+        }
+
+    def publish(self):
+        """
+        Tuiles modifiées et pose, si quelque chose a changé
+
+        Returns:
+            dict: Message 'map_tiles', ou None
+        """
+        tiles = self.grid.pop_changed_tiles()
+        pose = self._pose()
+        if not tiles and pose == self.last_pose:
+            return None
+        self.last_pose = pose
+        return self._message(tiles)
+
+    def snapshot(self):
+        """
+        Carte complète (tuiles observées) pour un nouveau client
+
+        Returns:
+            dict: Message 'map_tiles'
+        """
+        return self._message(self.grid.known_tiles())
+
+    def metrics(self):
+        """
+        Métriques de cartographie
+
+        Returns:
+            dict: Pose, distance parcourue, mesures intégrées, fenêtre
+        """
+        return {
+            "pose": self._pose(),
+            "odometry_cm": round(self.odometry.distance_cm, 1),
+            "readings_integrated": self.integrated,
+            "window": self.grid.window(),
+            "grid_bytes": self.grid.grid.nbytes
+        }
@@ -0,0 +1,117 @@
+"""
+Chemin d'arrêt d'urgence sur obstacle
+Appelé directement par le thread du capteur ultrason : coupe Motor A sans passer
+par les logs ni Socket.IO, puis mémorise l'événement pour notification différée
+"""
+
+from bisect import bisect_left
+from collections import deque
+from threading import Lock
+
+from src.flight_recorder import OBSTACLE, CLEAR
+
+# Bornes des classes de l'histogramme de temps de réaction (ms)
+REACTION_BUCKETS_MS = [0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 50, 100]
+
+
+class ReactionHistogram:
+    """Histogramme des temps de réaction écho -> PWM à zéro"""
+
+    def __init__(self, bounds=REACTION_BUCKETS_MS):
+        """
+        Initialise l'histogramme
+
+        Args:
+            bounds (list): Bornes supérieures des classes (ms)
+        """
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.lock = Lock()
+
+    def record(self, value_ms):
+        """
+        Enregistre un temps de réaction
+
+        Args:
+            value_ms (float): Temps de réaction en millisecondes
+        """
+        with self.lock:
+            self.counts[bisect_left(self.bounds, value_ms)] += 1
+            self.count += 1
+            self.total_ms += value_ms
+            self.max_ms = max(self.max_ms, value_ms)
+
+    def snapshot(self):
+        """
+        Copie de l'histogramme pour les métriques
+
+        Returns:
+            dict: Classes, nombre, moyenne et maximum
+        """
+        with self.lock:
+            labels = [f"<={b}" for b in self.bounds] + [f">{self.bounds[-1]}"]
+            return {
+                "buckets_ms": dict(zip(labels, self.counts)),
+                "count": self.count,
+                "mean_ms": round(self.total_ms / self.count, 3) if self.count else None,
+                "max_ms": round(self.max_ms, 3)
+            }
+
+
+class SafetyStop:
+    """Arrêt d'urgence de Motor A et blocage de la marche avant"""
+
+    def __init__(self, motor_controller, recorder=None):
+        """
+        Initialise le chemin d'arrêt
+
+        Args:
+            motor_controller (MotorController): Contrôleur des moteurs
+            recorder (FlightRecorder): Enregistreur de vol (optionnel)
+        """
+        self.motor_controller = motor_controller
+        self.recorder = recorder
+        self.histogram = ReactionHistogram()
+        self.events = deque(maxlen=64)
+
+    def on_obstacle(self, distance, echo_time):
+        """
+        Obstacle détecté (thread du capteur) : arrêt immédiat
+
+        Args:
+            distance (float): Distance mesurée (cm)
+            echo_time (float): Instant monotone de fin de l'écho
+        """
+        pwm_zero = self.motor_controller.emergency_stop()
+        reaction_ms = (pwm_zero - echo_time) * 1000
+        self.histogram.record(reaction_ms)
+        if self.recorder:
+            self.recorder.record(OBSTACLE, distance, reaction_ms)
+        self.events.append({"type": "obstacle", "distance": distance, "reaction_ms": round(reaction_ms, 3)})
+
+    def on_clear(self, distance):
+        """
+        Obstacle dégagé (thread du capteur) : marche avant de nouveau autorisée
+
+        Args:
+            distance (float): Distance mesurée (cm)
+        """
+        self.motor_controller.release_forward()
+        if self.recorder:
+            self.recorder.record(CLEAR, distance)
+        self.events.append({"type": "clear", "distance": distance})
+
+    def pop_events(self):
+        """
+        Retire les événements en attente de notification
+
+        Returns:
+            list: Événements dans l'ordre d'arrivée
+        """
+        events = []
+        while self.events:
+            events.append(self.events.popleft())
+        return events
@@ -0,0 +1,214 @@
+"""
+Profileur par échantillonnage à la demande pour les serveurs en fonctionnement
+
+Un thread dédié relève périodiquement la pile de tous les threads
+(sys._current_frames) et des greenlets suspendus (repérés à leurs
+changements de contexte via greenlet.settrace), puis renvoie les piles
+agrégées au format "collapsed" (une ligne par pile, compatible flamegraph.pl
+et speedscope).
+
+Usage:
+    curl -k -H "Authorization: Bearer TOKEN" "https://PI:5007/debug/profile?seconds=10" > control.folded
+    flamegraph.pl control.folded > control.svg
+"""
+
+from collections import Counter, deque
+from threading import Lock, Event, Thread
+from flask import Response, jsonify
+import threading
+import weakref
+import logging
+import hmac
+import math
+import time
+import sys
+import os
+
+try:
+    import greenlet
+except ImportError:
+    greenlet = None
+
+logger = logging.getLogger(__name__)
+
+# Un seul profil à la fois par processus
+_profile_lock = Lock()
+
+
+def request_token(request):
+    """Token fourni par la requête (en-tête Authorization: Bearer ou paramètre ?token=)"""
+    return request.headers.get('Authorization', '').removeprefix('Bearer ') or request.args.get('token', '')
+
+
+class SamplingProfiler:
+    """Échantillonneur de piles de tous les threads et greenlets du processus"""
+
+    def __init__(self, interval=0.005, greenlets=True, names_refresh=1.0):
+        """
+        Initialise le profileur
+
+        Args:
+            interval (float): Intervalle entre deux échantillons (secondes)
+            greenlets (bool): Échantillonner aussi les greenlets suspendus
+            names_refresh (float): Intervalle de relecture des noms de threads (secondes)
+        """
+        self.interval = interval
+        self.greenlets = greenlets and greenlet is not None
+        self.names_refresh = names_refresh
+        # Greenlets vus par le traceur, transmis au thread d'échantillonnage
+        self.switched = deque()
+        self.previous_trace = None
+        self.stacks = Counter()
+        self.labels = {}
+        self.samples = 0
+        self.busy = 0.0
+        self.stop_event = Event()
+
+    def _label(self, code):
+        """Nom d'un cadre de pile (mis en cache par objet code)"""
+        label = self.labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            self.labels[code] = label
+        return label
+
+    def _add(self, root, frame):
+        """Ajoute la pile d'un cadre (de la racine vers la feuille)"""
+        stack = []
+        while frame is not None:
+            stack.append(self._label(frame.f_code))
+            frame = frame.f_back
+        stack.append(root)
+        stack.reverse()
+        self.stacks[tuple(stack)] += 1
+
+    def _trace(self, event, args):
+        """
+        Traceur greenlet : note les greenlets qui prennent ou cèdent la main
+
+        Un greenlet resté suspendu pendant tout le profil n'est pas vu (il
+        n'occupe pas la boucle) ; aucun parcours du GC n'est nécessaire.
+        """
+        if event in ('switch', 'throw'):
+            self.switched.extend(args)
+        if self.previous_trace is not None:
+            self.previous_trace(event, args)
+
+    def _sample_loop(self):
+        """Boucle d'échantillonnage (thread dédié)"""
+        own = threading.get_ident()
+        names = {}
+        greenlets = weakref.WeakSet()
+        next_refresh = 0.0
+
+        while not self.stop_event.is_set():
+            start = time.perf_counter()
+
+            if start >= next_refresh:
+                names = {t.ident: t.name for t in threading.enumerate()}
+                next_refresh = start + self.names_refresh
+
+            while self.switched:
+                greenlets.add(self.switched.popleft())
+
+            for ident, frame in sys._current_frames().items():
+                if ident != own:
+                    self._add(f"thread:{names.get(ident, ident)}", frame)
+
+            # gr_frame vaut None pour le greenlet en cours : il est vu via son thread
+            for g in list(greenlets):
+                frame = g.gr_frame
+                if frame is not None:
+                    self._add(f"greenlet:{getattr(g, 'name', None) or type(g).__name__}", frame)
+
+            self.samples += 1
+            self.busy += time.perf_counter() - start
+            self.stop_event.wait(self.interval)
+
+    def run(self, seconds, sleep=time.sleep):
+        """
+        Profile le processus pendant une durée donnée
+
+        Args:
+            seconds (float): Durée du profil
+            sleep (callable): Attente compatible avec le serveur appelant
+                (socketio.sleep pour ne pas bloquer la boucle gevent)
+
+        Returns:
+            dict: Piles "collapsed", nombre d'échantillons, durée et surcoût
+        """
+        # Le traceur greenlet est propre au thread appelant (boucle gevent du serveur)
+        if self.greenlets:
+            self.previous_trace = greenlet.settrace(self._trace)
+        thread = Thread(target=self._sample_loop, name="sampling-profiler", daemon=True)
+        started = time.perf_counter()
+        thread.start()
+        try:
+            sleep(seconds)
+        finally:
+            if self.greenlets:
+                greenlet.settrace(self.previous_trace)
+            self.stop_event.set()
+            thread.join()
+            self.switched.clear()
+        duration = time.perf_counter() - started
+
+        lines = [f"{';'.join(stack)} {count}" for stack, count in self.stacks.most_common()]
+        return {
+            "collapsed": "\n".join(lines) + "\n",
+            "samples": self.samples,
+            "duration": duration,
+            "overhead": self.busy / duration if duration else 0.0
+        }
+
+
+def profile_response(request, config, sleep=time.sleep):
+    """
+    Traite une requête /debug/profile (authentification, paramètres, profil)
+
+    Args:
+        request: Requête Flask (?seconds=, ?interval=, ?greenlets=0)
+        config (dict): Configuration complète (sections 'profiler' et 'security')
+        sleep (callable): Attente compatible avec le serveur appelant
+
+    Returns:
+        Response: Piles "collapsed" en text/plain, ou erreur JSON
+    """
+    profiler_config = config['profiler']
+    token = str(config['security']['auth_token'])
+
+    # Toujours authentifié, même si require_auth est désactivé
+    if not profiler_config['enabled'] or not token:
+        return jsonify({"error": "Profiler disabled"}), 403
+    if not hmac.compare_digest(request_token(request), token):
+        return jsonify({"error": "Unauthorized"}), 401
+
+    try:
+        seconds = float(request.args.get('seconds', profiler_config['default_seconds']))
+        interval = float(request.args.get('interval', profiler_config['interval']))
+        # nan, inf et valeurs négatives passeraient les bornes ci-dessous
+        if not (math.isfinite(seconds) and math.isfinite(interval) and seconds > 0 and interval > 0):
+            raise ValueError
+        seconds = min(seconds, profiler_config['max_seconds'])
+        interval = max(interval, profiler_config['min_interval'])
+    except ValueError:
+        return jsonify({"error": "Invalid seconds or interval"}), 400
+    greenlets = request.args.get('greenlets', '1' if profiler_config['greenlets'] else '0') != '0'
+
+    if not _profile_lock.acquire(blocking=False):
+        return jsonify({"error": "Profile already running"}), 409
+    try:
+        logger.info(f"🔬 Profil par échantillonnage: {seconds:.0f}s, intervalle {interval * 1000:.1f} ms")
+        result = SamplingProfiler(interval, greenlets).run(seconds, sleep)
+    finally:
+        _profile_lock.release()
+
+    logger.info(f"🔬 Profil terminé: {result['samples']} échantillons, "
+                f"surcoût {result['overhead'] * 100:.2f}%")
+
+    response = Response(result['collapsed'], mimetype='text/plain')
+    response.headers['X-Profile-Samples'] = str(result['samples'])
+    response.headers['X-Profile-Duration'] = f"{result['duration']:.3f}"
+    response.headers['X-Profile-Overhead'] = f"{result['overhead']:.4f}"
+    response.headers['Cache-Control'] = 'no-store'
+    return response
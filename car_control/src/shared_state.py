@@ -0,0 +1,121 @@
+"""
+Canal "dernière valeur" entre deux processus en mémoire partagée, sans verrou
+
+Un seul écrivain, un ou plusieurs lecteurs. Double tampon + numéro de
+séquence (seqlock) : l'écrivain remplit le tampon que les lecteurs n'utilisent
+pas, puis publie son numéro. Chaque tampon porte son numéro et un CRC32 ; un
+lecteur qui tombe sur un tampon en cours d'écriture (écrivain deux fois plus
+rapide que lui) le détecte et relit. Aucun côté ne peut bloquer l'autre.
+"""
+
+from multiprocessing import shared_memory
+import struct
+import zlib
+
+# Numéro de la dernière écriture publiée
+SEQUENCE = struct.Struct('<Q')
+
+# Tampon : numéro d'écriture, CRC32 (numéro + données), puis les données
+SLOT_HEADER = struct.Struct('<QI4x')
+
+# Relectures avant d'abandonner (écrivain qui publie en continu)
+MAX_READ_RETRIES = 8
+
+
+class SeqlockChannel:
+    """Dernière valeur d'un enregistrement struct, partagée entre processus"""
+
+    def __init__(self, name, record, create=False):
+        """
+        Crée ou rattache le segment du canal
+
+        Args:
+            name (str): Nom du segment (/dev/shm)
+            record (struct.Struct): Format de l'enregistrement
+            create (bool): Créer le segment (processus propriétaire)
+        """
+        self.name = name
+        self.record = record
+        self.slot_size = SLOT_HEADER.size + record.size
+        self.size = SEQUENCE.size + 2 * self.slot_size
+        self.owner = create
+
+        if create:
+            # Segment d'une exécution précédente interrompue
+            try:
+                stale = shared_memory.SharedMemory(name=name)
+                stale.close()
+                stale.unlink()
+            except FileNotFoundError:
+                pass
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=self.size)
+            self.shm.buf[:self.size] = bytes(self.size)
+        else:
+            # Rattaché depuis un processus lancé par le propriétaire : le
+            # resource_tracker est partagé, l'enregistrement est déjà le sien
+            self.shm = shared_memory.SharedMemory(name=name)
+
+        self.buf = self.shm.buf
+        self.sequence = SEQUENCE.unpack_from(self.buf, 0)[0]
+
+    def _slot_offset(self, sequence):
+        """Position du tampon d'un numéro d'écriture"""
+        return SEQUENCE.size + (sequence & 1) * self.slot_size
+
+    def write(self, *values):
+        """
+        Publie une nouvelle valeur (écrivain unique)
+
+        Args:
+            *values: Champs de l'enregistrement
+
+        Returns:
+            int: Numéro de l'écriture
+        """
+        sequence = self.sequence + 1
+        offset = self._slot_offset(sequence)
+        payload = self.record.pack(*values)
+        crc = zlib.crc32(payload, zlib.crc32(SEQUENCE.pack(sequence)))
+
+        self.buf[offset + SLOT_HEADER.size:offset + self.slot_size] = payload
+        SLOT_HEADER.pack_into(self.buf, offset, sequence, crc)
+        SEQUENCE.pack_into(self.buf, 0, sequence)
+        self.sequence = sequence
+        return sequence
+
+    def _read_slot(self, sequence):
+        """Lit un tampon, ou None s'il ne contient pas (intégralement) cette écriture"""
+        offset = self._slot_offset(sequence)
+        data = bytes(self.buf[offset:offset + self.slot_size])
+        slot_sequence, crc = SLOT_HEADER.unpack_from(data, 0)
+        payload = data[SLOT_HEADER.size:]
+        if slot_sequence != sequence or crc != zlib.crc32(payload, zlib.crc32(SEQUENCE.pack(sequence))):
+            return None
+        return self.record.unpack(payload)
+
+    def read(self):
+        """
+        Lit la dernière valeur publiée
+
+        Returns:
+            tuple: (numéro d'écriture, champs), numéro 0 et None si rien n'est publié
+        """
+        for _ in range(MAX_READ_RETRIES):
+            sequence = SEQUENCE.unpack_from(self.buf, 0)[0]
+            if sequence == 0:
+                return 0, None
+            values = self._read_slot(sequence)
+            if values is not None:
+                return sequence, values
+            # Tampon réécrit pendant la lecture : relire le dernier numéro publié
+        return 0, None
+
+    def close(self):
+        """Détache le segment (et le supprime côté propriétaire)"""
+        self.buf = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,190 @@
+"""
+Cache mémoire des fichiers statiques de l'interface web
+Chaque fichier est chargé une fois, précompressé (gzip, brotli) et servi avec
+un ETag basé sur son contenu. Les URLs versionnées (/v/<hash>/<fichier>) sont
+mises en cache sans revalidation par le navigateur
+"""
+
+from flask import Response
+import mimetypes
+import hashlib
+import logging
+import gzip
+import time
+import os
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Types de fichiers qui gagnent à être compressés
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+
+class StaticAsset:
+    """Fichier statique en mémoire avec ses variantes compressées"""
+
+    def __init__(self, name, content, mtime, gzip_level, brotli_quality):
+        """
+        Prépare un fichier
+
+        Args:
+            name (str): Chemin relatif du fichier
+            content (bytes): Contenu brut
+            mtime (float): Date de modification sur disque
+            gzip_level (int): Niveau de compression gzip
+            brotli_quality (int): Qualité de compression brotli
+        """
+        self.name = name
+        self.mtime = mtime
+        self.mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        self.version = hashlib.sha256(content).hexdigest()[:16]
+        self.variants = {'identity': content}
+
+        if self.mimetype.startswith(COMPRESSIBLE_TYPES):
+            compressed = gzip.compress(content, compresslevel=gzip_level, mtime=0)
+            if len(compressed) < len(content):
+                self.variants['gzip'] = compressed
+            if brotli is not None:
+                compressed = brotli.compress(content, quality=brotli_quality)
+                if len(compressed) < len(content):
+                    self.variants['br'] = compressed
+
+
+class StaticAssetCache:
+    """Cache des fichiers du dossier static, rechargé quand le disque change"""
+
+    def __init__(self, static_dir, cache_config):
+        """
+        Charge tous les fichiers statiques
+
+        Args:
+            static_dir (str): Dossier des fichiers statiques
+            cache_config (dict): Section 'performance.static_cache' de config.yaml
+        """
+        self.static_dir = os.path.abspath(static_dir)
+        self.check_interval = cache_config['check_interval']
+        self.gzip_level = cache_config['gzip_level']
+        self.brotli_quality = cache_config['brotli_quality']
+        self.assets = {}
+        self.last_check = 0.0
+
+        self._reload()
+        logger.info(f"📦 Cache statique: {len(self.assets)} fichier(s), "
+                    f"brotli {'actif' if brotli is not None else 'indisponible'}")
+
+    def _scan(self):
+        """Liste les fichiers du dossier avec leur date de modification"""
+        files = {}
+        for root, _, names in os.walk(self.static_dir):
+            for filename in names:
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, self.static_dir).replace(os.sep, '/')
+                files[name] = os.stat(path).st_mtime
+        return files
+
+    def _reload(self):
+        """Recharge les fichiers modifiés (et les pages HTML qui les référencent)"""
+        files = self._scan()
+        changed = {name for name, mtime in files.items()
+                   if name not in self.assets or self.assets[name].mtime != mtime}
+        removed = set(self.assets) - set(files)
+        if not changed and not removed:
+            return
+
+        assets = {name: asset for name, asset in self.assets.items() if name in files}
+        for name in changed:
+            if name.endswith('.html'):
+                continue
+            with open(os.path.join(self.static_dir, name), 'rb') as f:
+                content = f.read()
+            assets[name] = StaticAsset(name, content, files[name], self.gzip_level, self.brotli_quality)
+
+        # Les pages HTML pointent vers les URLs versionnées des autres fichiers
+        for name in files:
+            if name.endswith('.html'):
+                assets[name] = self._build_page(name, files[name], assets)
+
+        self.assets = assets
+        if self.last_check:
+            logger.info(f"📦 Cache statique rechargé: {', '.join(sorted(changed | removed))}")
+
+    def _build_page(self, name, mtime, assets):
+        """Réécrit les références d'une page HTML vers les URLs versionnées"""
+        with open(os.path.join(self.static_dir, name), 'rb') as f:
+            content = f.read()
+
+        for other, asset in assets.items():
+            if other.endswith('.html'):
+                continue
+            content = content.replace(f'"/{other}"'.encode(), f'"{self._url(asset)}"'.encode())
+
+        return StaticAsset(name, content, mtime, self.gzip_level, self.brotli_quality)
+
+    def _url(self, asset):
+        """URL versionnée d'un fichier"""
+        return f"/v/{asset.version}/{asset.name}"
+
+    def refresh(self):
+        """Vérifie les fichiers sur disque (au plus une fois par check_interval)"""
+        now = time.monotonic()
+        if now - self.last_check < self.check_interval:
+            return
+        self.last_check = now
+        try:
+            self._reload()
+        except OSError as e:
+            logger.warning(f"Rechargement du cache statique impossible: {e}")
+
+    def get(self, name):
+        """
+        Retourne un fichier du cache
+
+        Args:
+            name (str): Chemin relatif du fichier
+
+        Returns:
+            StaticAsset: Fichier, ou None s'il n'existe pas
+        """
+        self.refresh()
+        return self.assets.get(name)
+
+    def response(self, request, name, version=None):
+        """
+        Construit la réponse HTTP d'un fichier (compression négociée, ETag, 304)
+
+        Args:
+            request: Requête Flask
+            name (str): Chemin relatif du fichier
+            version (str): Version demandée dans l'URL (None si URL non versionnée)
+
+        Returns:
+            Response: Réponse Flask, ou None si le fichier n'existe pas
+        """
+        asset = self.get(name)
+        if asset is None:
+            return None
+
+        encoding = 'identity'
+        for candidate in ('br', 'gzip'):
+            if candidate in asset.variants and request.accept_encodings[candidate]:
+                encoding = candidate
+                break
+
+        response = Response(asset.variants[encoding], mimetype=asset.mimetype)
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+        response.headers['Vary'] = 'Accept-Encoding'
+
+        # Une URL versionnée ne change jamais de contenu
+        immutable = version is not None and version == asset.version
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE if immutable else REVALIDATE_CACHE
+
+        response.set_etag(f"{asset.version}-{encoding}")
+        return response.make_conditional(request)
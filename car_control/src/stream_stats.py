@@ -0,0 +1,184 @@
+"""
+Mesures des streams vidéo : débits (images/s, octets/s), écarts entre images
+et connexions aux caméras
+"""
+
+import time
+from collections import deque
+
+
+def percentiles(values, points=(50, 95, 99)):
+    """
+    Calcule des percentiles (méthode du rang le plus proche)
+
+    Args:
+        values (list): Valeurs mesurées
+        points (tuple): Percentiles demandés
+
+    Returns:
+        dict: {"p50": ..., "p95": ..., ...} (None si aucune valeur)
+    """
+    if not values:
+        return {f"p{p}": None for p in points}
+    ordered = sorted(values)
+    last = len(ordered) - 1
+    return {f"p{p}": ordered[min(last, int(p / 100 * len(ordered)))] for p in points}
+
+
+class StreamMeter:
+    """Débit glissant d'un stream (images/s, octets/s)"""
+
+    def __init__(self, name, window=5.0, resolution=0.25, gap_samples=256, clock=time.monotonic):
+        """
+        Initialise le compteur
+
+        Args:
+            name (str): Nom du stream (pour les diagnostics)
+            window (float): Fenêtre de calcul des débits (secondes)
+            resolution (float): Intervalle minimal entre deux échantillons (secondes)
+            gap_samples (int): Nombre d'écarts entre images conservés
+            clock (callable): Horloge monotone (simulée dans les tests)
+        """
+        self.name = name
+        self.window = window
+        self.resolution = resolution
+        self.clock = clock
+        self.started = clock()
+        self.total_bytes = 0
+        self.total_frames = 0
+        self.samples = deque()
+        self.last_sample = 0.0
+        self.gaps = deque(maxlen=gap_samples)
+        self.last_frame = None
+
+    def add(self, nbytes, frames=0):
+        """
+        Enregistre des données transmises
+
+        Args:
+            nbytes (int): Nombre d'octets
+            frames (int): Nombre d'images
+        """
+        now = self.clock()
+        self.total_bytes += nbytes
+        self.total_frames += frames
+
+        # Écart depuis la dernière image reçue
+        if frames:
+            if self.last_frame is not None:
+                self.gaps.append(now - self.last_frame)
+            self.last_frame = now
+
+        # Échantillons cumulés espacés d'au moins `resolution`
+        if now - self.last_sample >= self.resolution:
+            self.samples.append((now, self.total_bytes, self.total_frames))
+            self.last_sample = now
+            while len(self.samples) > 1 and now - self.samples[0][0] > self.window:
+                self.samples.popleft()
+
+    def rates(self):
+        """
+        Calcule les débits sur la fenêtre glissante
+
+        Returns:
+            tuple: (images/s, octets/s)
+        """
+        now = self.clock()
+        samples = list(self.samples)
+        if not samples:
+            return 0.0, 0.0
+
+        # Premier échantillon encore dans la fenêtre (ou le plus récent)
+        start = next((s for s in samples if now - s[0] <= self.window), samples[-1])
+        span = now - start[0]
+        if span <= 0:
+            return 0.0, 0.0
+
+        fps = (self.total_frames - start[2]) / span
+        bps = (self.total_bytes - start[1]) / span
+        return fps, bps
+
+    def age(self):
+        """Durée depuis la création du compteur (secondes)"""
+        return self.clock() - self.started
+
+    def snapshot(self):
+        """
+        État du compteur pour les diagnostics
+
+        Returns:
+            dict: Débits, écarts entre images (ms) et totaux
+        """
+        fps, bps = self.rates()
+        gaps = percentiles(list(self.gaps))
+        return {
+            "name": self.name,
+            "fps": round(fps, 1),
+            "bytes_per_s": round(bps),
+            "frame_gap_ms": {k: round(v * 1000, 1) if v is not None else None for k, v in gaps.items()},
+            "total_frames": self.total_frames,
+            "total_bytes": self.total_bytes,
+            "age_s": round(self.age(), 1)
+        }
+
+
+class UpstreamStats:
+    """Connexions d'un proxy vers une caméra (durées, reconnexions, échecs)"""
+
+    def __init__(self, name, history=50):
+        """
+        Initialise les statistiques
+
+        Args:
+            name (str): Caméra (ip:port)
+            history (int): Nombre de durées de connexion conservées
+        """
+        self.name = name
+        self.connects = 0
+        self.reconnects = 0
+        self.active = 0
+        self.failures = 0
+        self.connect_times = deque(maxlen=history)
+        self.last_connect = None
+
+    def connected(self, seconds):
+        """
+        Enregistre une connexion réussie (à terminer par ended())
+
+        Une connexion ouverte alors qu'aucune autre n'est active sur la caméra
+        est une reconnexion ; un spectateur supplémentaire n'en est pas une.
+
+        Args:
+            seconds (float): Durée d'établissement de la connexion
+        """
+        if self.connects and not self.active:
+            self.reconnects += 1
+        self.connects += 1
+        self.active += 1
+        self.connect_times.append(seconds)
+        self.last_connect = time.time()
+
+    def ended(self):
+        """Enregistre la fin d'une connexion"""
+        self.active = max(0, self.active - 1)
+
+    def failed(self):
+        """Enregistre une connexion échouée"""
+        self.failures += 1
+
+    def snapshot(self):
+        """
+        État des connexions pour les diagnostics
+
+        Returns:
+            dict: Compteurs et percentiles des durées de connexion (ms)
+        """
+        times = percentiles(list(self.connect_times))
+        return {
+            "connects": self.connects,
+            "reconnects": self.reconnects,
+            "active": self.active,
+            "failures": self.failures,
+            "connect_ms": {k: round(v * 1000, 1) if v is not None else None for k, v in times.items()},
+            "last_connect": self.last_connect
+        }
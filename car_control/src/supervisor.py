@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Superviseur du serveur de contrôle avec serveur de secours préchargé
+
+Le superviseur ouvre le socket d'écoute une seule fois et le partage avec deux
+processus serveur :
+- le principal, qui sert les clients et possède les GPIO
+- le secours, déjà initialisé (imports, configuration, TLS, processus matériel
+  lancé) mais sans GPIO ni connexions
+
+Si le principal meurt (ou ne donne plus de battement de cœur), le secours est
+promu : il reprend les GPIO dès que l'ancien propriétaire les a libérés
+(moteurs à l'arrêt), puis accepte les connexions sur le même socket. Les
+clients Socket.IO se reconnectent seuls. Un nouveau secours est ensuite
+préparé en arrière-plan. Le temps de bascule est publié dans /metrics.
+
+Usage: python3 -m src.supervisor
+"""
+
+from multiprocessing.connection import wait
+import multiprocessing
+import logging
+import signal
+import socket
+import time
+import yaml
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+logger = logging.getLogger(__name__)
+
+
+def control_main(config_path, listener, conn, heartbeat):
+    """
+    Processus serveur : se prépare en secours puis attend sa promotion
+
+    Args:
+        config_path (str): Chemin vers le fichier de configuration
+        listener (socket): Socket d'écoute partagé
+        conn (Connection): Canal vers le superviseur
+        heartbeat (RawValue): Dernier battement de cœur (horloge monotone)
+    """
+    # Lancé en arrière-plan (start.sh), SIGINT est ignoré par héritage : le
+    # superviseur s'en sert pour arrêter proprement les serveurs
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+
+    from src.control_server import ControlServer
+
+    server = ControlServer(config_path, standby=True)
+    conn.send({"type": "ready", "pid": os.getpid()})
+
+    try:
+        message = conn.recv()
+    except (EOFError, KeyboardInterrupt):
+        # Jamais promu : libérer le processus matériel préparé et ses canaux
+        if server.hardware:
+            server.hardware.close()
+        return
+
+    server.heartbeat = heartbeat
+    server.activate()
+    server.run(listener=listener, failover=message.get("failover"))
+
+
+class Supervisor:
+    """Principal + secours, bascule sur défaillance"""
+
+    def __init__(self, config_path='config/config.yaml'):
+        """
+        Initialise le superviseur
+
+        Args:
+            config_path (str): Chemin vers le fichier de configuration
+        """
+        self.config_path = config_path
+        with open(config_path, 'r') as f:
+            self.config = yaml.safe_load(f)
+
+        log_config = self.config['logging']
+        os.makedirs('logs', exist_ok=True)
+        logging.basicConfig(
+            level=getattr(logging, log_config['level']),
+            format=log_config['format'],
+            handlers=[
+                logging.FileHandler(log_config['file']),
+                logging.StreamHandler() if log_config['console'] else logging.NullHandler()
+            ]
+        )
+
+        self.supervisor_config = self.config['supervisor']
+        self.context = multiprocessing.get_context("spawn")
+        self.running = True
+        self.failovers = 0
+
+        # Socket d'écoute ouvert une fois, partagé par tous les serveurs
+        port = self.config['network']['control_port']
+        self.listener = socket.create_server(("0.0.0.0", port), backlog=self.supervisor_config['backlog'])
+
+        self.primary = None
+        self.standby = None
+
+    def _spawn(self):
+        """Lance un processus serveur (prêt à être promu)"""
+        parent_conn, child_conn = self.context.Pipe()
+        heartbeat = self.context.RawValue('d', 0.0)
+        process = self.context.Process(target=control_main,
+                                       args=(self.config_path, self.listener, child_conn, heartbeat),
+                                       name="control")
+        process.start()
+        child_conn.close()
+        return {"process": process, "conn": parent_conn, "heartbeat": heartbeat,
+                "ready": False, "started": time.monotonic()}
+
+    def _promote(self, server, failover=None):
+        """Promeut un serveur en principal"""
+        server['conn'].send({"type": "promote", "failover": failover})
+        server['promoted'] = time.monotonic()
+        self.primary = server
+
+    def _handle_messages(self, server):
+        """Lit les messages d'un serveur (secours prêt)"""
+        try:
+            while server['conn'].poll():
+                message = server['conn'].recv()
+                if message['type'] == "ready":
+                    server['ready'] = True
+                    if server is self.standby:
+                        logger.info(f"🛟 Serveur de secours prêt en {time.monotonic() - server['started']:.1f}s "
+                                    f"(PID {message['pid']})")
+        except (EOFError, OSError):
+            pass
+
+    def _heartbeat_lost(self):
+        """Le principal ne donne plus signe de vie (boucle gevent bloquée)"""
+        last = self.primary['heartbeat'].value
+        return last > 0 and time.monotonic() - last > self.supervisor_config['heartbeat_timeout']
+
+    def _failover(self):
+        """Remplace le principal défaillant par le secours"""
+        detected = time.monotonic()
+        last_heartbeat = self.primary['heartbeat'].value
+        failed = self.primary['process']
+        failed.join(timeout=1)
+        self.failovers += 1
+
+        logger.error(f"💥 Serveur principal défaillant (PID {failed.pid}, code {failed.exitcode}) - "
+                     f"bascule n°{self.failovers}")
+
+        # Principal mort juste après sa promotion : éviter une boucle de redémarrages
+        if detected - self.primary['promoted'] < self.supervisor_config['min_uptime']:
+            logger.warning(f"⏳ Défaillance rapprochée - bascule différée de "
+                           f"{self.supervisor_config['restart_backoff']}s")
+            time.sleep(self.supervisor_config['restart_backoff'])
+
+        standby = self.standby or self._spawn()
+        self._promote(standby, failover={
+            "detected_at": detected,
+            "failed_pid": failed.pid,
+            "exit_code": failed.exitcode,
+            "count": self.failovers,
+            # Temps écoulé avant la détection (non compté dans failover_ms)
+            "heartbeat_age_ms": round((detected - last_heartbeat) * 1000, 1) if last_heartbeat else None,
+            "standby_ready": standby['ready']
+        })
+        self.standby = self._spawn()
+
+    def run(self):
+        """Boucle de supervision"""
+        logger.info("=" * 60)
+        logger.info(f"🛡  SUPERVISEUR (PID {os.getpid()}) - port {self.config['network']['control_port']}")
+        logger.info("=" * 60)
+
+        self._promote(self._spawn())
+        self.standby = self._spawn()
+
+        while self.running:
+            primary = self.primary['process']
+            handles = [primary.sentinel, self.primary['conn'], self.standby['conn']]
+            wait(handles, timeout=self.supervisor_config['check_interval'])
+            if not self.running:
+                break
+
+            self._handle_messages(self.primary)
+            self._handle_messages(self.standby)
+
+            if primary.is_alive() and self._heartbeat_lost():
+                logger.error(f"💤 Serveur principal sans battement de cœur depuis "
+                             f"{self.supervisor_config['heartbeat_timeout']}s - arrêt forcé")
+                primary.kill()
+                primary.join(timeout=1)
+
+            if not primary.is_alive():
+                self._failover()
+
+    def stop(self, signum=None, frame=None):
+        """Arrête la supervision et les serveurs (Ctrl+C, SIGTERM)"""
+        self.running = False
+
+    def shutdown(self):
+        """Arrête proprement les serveurs (le principal nettoie ses GPIO)"""
+        for server in (self.primary, self.standby):
+            if server and server['process'].is_alive():
+                os.kill(server['process'].pid, signal.SIGINT)
+        for server in (self.primary, self.standby):
+            if server:
+                server['process'].join(timeout=5)
+                if server['process'].is_alive():
+                    server['process'].terminate()
+        self.listener.close()
+        logger.info("🛡  Superviseur arrêté")
+
+
+if __name__ == "__main__":
+    supervisor = Supervisor()
+    signal.signal(signal.SIGTERM, supervisor.stop)
+    try:
+        supervisor.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        supervisor.shutdown()
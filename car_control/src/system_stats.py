@@ -0,0 +1,99 @@
+"""
+État du Raspberry Pi : température CPU, bridage (throttling), threads
+Lectures peu coûteuses, adaptées à un rafraîchissement chaque seconde
+"""
+
+import subprocess
+import threading
+import time
+import os
+
+THERMAL_ZONE = "/sys/class/thermal/thermal_zone0/temp"
+
+# Bits de `vcgencmd get_throttled`
+THROTTLED_FLAGS = {
+    0: "under_voltage",
+    1: "frequency_capped",
+    2: "throttled",
+    3: "soft_temp_limit",
+    16: "under_voltage_occurred",
+    17: "frequency_capped_occurred",
+    18: "throttled_occurred",
+    19: "soft_temp_limit_occurred"
+}
+
+# vcgencmd lance un processus : résultat gardé quelques secondes
+THROTTLED_CACHE_SECONDS = 5.0
+
+_throttled_cache = {"time": 0.0, "value": None}
+
+
+def cpu_temperature():
+    """
+    Température CPU
+
+    Returns:
+        float: Température en °C, ou None si indisponible
+    """
+    try:
+        with open(THERMAL_ZONE) as f:
+            return round(int(f.read().strip()) / 1000, 1)
+    except (OSError, ValueError):
+        return None
+
+
+def throttled_state():
+    """
+    État de bridage du Pi (sous-tension, fréquence limitée...)
+
+    Returns:
+        dict: Valeur brute et indicateurs actifs, ou None si vcgencmd est absent
+    """
+    now = time.monotonic()
+    if now - _throttled_cache["time"] < THROTTLED_CACHE_SECONDS:
+        return _throttled_cache["value"]
+
+    value = None
+    try:
+        output = subprocess.run(["vcgencmd", "get_throttled"], capture_output=True,
+                                text=True, timeout=1).stdout
+        raw = int(output.strip().split("=")[1], 16)
+        value = {
+            "raw": hex(raw),
+            "flags": [name for bit, name in THROTTLED_FLAGS.items() if raw & (1 << bit)]
+        }
+    except (OSError, subprocess.SubprocessError, IndexError, ValueError):
+        pass
+
+    _throttled_cache["time"] = now
+    _throttled_cache["value"] = value
+    return value
+
+
+def thread_summary():
+    """
+    Threads actifs du processus, regroupés par nom
+
+    Returns:
+        dict: Nombre total et répartition par préfixe de nom
+    """
+    groups = {}
+    for thread in threading.enumerate():
+        prefix = thread.name.split("-")[0].split(" ")[0]
+        groups[prefix] = groups.get(prefix, 0) + 1
+    return {"active": threading.active_count(), "by_name": groups}
+
+
+def system_snapshot():
+    """
+    État système pour les diagnostics
+
+    Returns:
+        dict: Température, bridage, charge et threads
+    """
+    return {
+        "cpu_temperature_c": cpu_temperature(),
+        "throttled": throttled_state(),
+        "load_average": [round(v, 2) for v in os.getloadavg()],
+        "threads": thread_summary()
+    }
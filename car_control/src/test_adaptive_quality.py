@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Script de test de la régulation adaptative de qualité caméra
+Utilise le faux serveur IP Webcam local pour les réglages : aucune caméra ni
+Raspberry Pi requis. Le lien et le temps sont simulés (horloge injectée) :
+le résultat ne dépend pas de la charge de la machine.
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.adaptive_quality import AdaptiveQualityController
+from src.fake_ipwebcam import start_fake_camera
+from src.stream_stats import StreamMeter
+
+# Configuration accélérée pour le test
+CAMERA_CONFIG = {
+    "target_fps": 30,
+    "connection_timeout": 2,
+    "adaptive_quality": {
+        "interval": 0.5,
+        "degrade_ratio": 0.7,
+        "upgrade_ratio": 0.9,
+        "degrade_after": 2,
+        "upgrade_after": 3,
+        "settle_time": 1.0,
+        "capacity_ttl": 5,
+        "capacity_ttl_max": 40,
+        "start_level": 3,
+        "levels": [
+            {"quality": 30, "resolution": "320x240"},
+            {"quality": 50, "resolution": "352x288"},
+            {"quality": 60, "resolution": "640x480"},
+            {"quality": 70, "resolution": "640x480"},
+            {"quality": 80, "resolution": "1280x720"}
+        ]
+    }
+}
+
+# Bande passante simulée du Wi-Fi dégradé (octets/s)
+DEGRADED_BANDWIDTH = 400 * 1024
+
+# Pas de la simulation (secondes)
+TICK = 0.05
+
+
+class SimulatedClock:
+    """Horloge monotone avancée par la simulation"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def run_phase(name, controller, camera, meter, clock, duration, bandwidth=0):
+    """
+    Simule le lien pendant une durée et affiche l'évolution du niveau
+
+    Le client reçoit les images de la caméra, limitées par la bande passante
+    pour les réglages appliqués par le régulateur.
+
+    Returns:
+        tuple: (niveau final, nombre de montées de niveau)
+    """
+    print(f"\n--- {name} ({duration}s simulées) ---")
+    end = clock.now + duration
+    next_evaluation = clock.now + controller.interval
+    pending_frames = 0.0
+    last_level = None
+    upgrades = 0
+
+    while clock.now < end:
+        clock.now += TICK
+        size = camera.frame_size()
+        fps = min(camera.fps, bandwidth / size) if bandwidth else camera.fps
+        pending_frames += fps * TICK
+        frames = int(pending_frames)
+        pending_frames -= frames
+        meter.add(frames * size, frames)
+
+        if clock.now >= next_evaluation:
+            next_evaluation += controller.interval
+            controller.evaluate([meter])
+
+        if controller.level != last_level:
+            if last_level is not None and controller.level > last_level:
+                upgrades += 1
+            print(f"   t={clock.now:6.1f}s niveau {controller.level}: "
+                  f"{camera.resolution} q{camera.quality}")
+            last_level = controller.level
+
+    fps, bps = meter.rates()
+    print(f"   {meter.name}: {fps:.1f} img/s, {bps / 1024:.0f} Ko/s")
+    return controller.level, upgrades
+
+
+def main():
+    """Programme principal"""
+    print("\n" + "=" * 60)
+    print("TEST DE LA QUALITÉ ADAPTATIVE (faux IP Webcam, temps simulé)")
+    print("=" * 60)
+
+    aq_config = CAMERA_CONFIG['adaptive_quality']
+    start = aq_config['levels'][aq_config['start_level']]
+    server, camera = start_fake_camera(port=0, fps=30, quality=start['quality'], resolution=start['resolution'])
+    port = server.server_port
+    failures = []
+
+    clock = SimulatedClock()
+    controller = AdaptiveQualityController(CAMERA_CONFIG, "127.0.0.1", port, clock=clock)
+    meter = StreamMeter("viewer-0", window=2.0, clock=clock)
+
+    level, _ = run_phase("Wi-Fi correct", controller, camera, meter, clock, 20)
+    if level < aq_config['start_level']:
+        failures.append("qualité réduite alors que le lien est bon")
+
+    level, upgrades = run_phase(f"Wi-Fi dégradé ({DEGRADED_BANDWIDTH // 1024} Ko/s)", controller, camera,
+                                meter, clock, 120, DEGRADED_BANDWIDTH)
+    if level > 1:
+        failures.append(f"niveau {level} trop élevé pour le lien dégradé")
+    if camera.quality != aq_config['levels'][level]['quality']:
+        failures.append("réglages non appliqués à la caméra")
+    # Essais espacés de 5, 10, 20, 40, 40 s (sans recul : un essai toutes les ~5 s)
+    if upgrades > 5:
+        failures.append(f"{upgrades} montées sur un lien resté dégradé (essais non espacés)")
+    print(f"   {upgrades} niveau(x) d'essai, validité de la capacité: {controller.ttl}s")
+
+    level, _ = run_phase("Wi-Fi rétabli", controller, camera, meter, clock, 60)
+    if level < aq_config['start_level']:
+        failures.append("la qualité n'est pas remontée après rétablissement")
+
+    # Caméra réglée à 15 img/s sur un lien parfait : pas de dégradation
+    camera.fps = 15
+    camera.quality, camera.resolution = start['quality'], start['resolution']
+    clock = SimulatedClock()
+    controller = AdaptiveQualityController(CAMERA_CONFIG, "127.0.0.1", port, clock=clock)
+    meter = StreamMeter("viewer-15fps", window=2.0, clock=clock)
+    level, _ = run_phase("Caméra à 15 img/s, Wi-Fi correct", controller, camera, meter, clock, 30)
+    if level < aq_config['start_level']:
+        failures.append(f"niveau {level} pour une caméra à 15 img/s sur un lien parfait")
+
+    server.shutdown()
+
+    print("\n" + "=" * 60)
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        print("=" * 60 + "\n")
+        sys.exit(1)
+
+    print("✅ Régulation conforme")
+    print("=" * 60 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Script de test de la grille d'occupation (sans Raspberry Pi ni capteur)
+Vérifie le filtre des mesures, l'estime, l'intégration d'une mesure dans la
+grille, le suivi des tuiles modifiées et le recentrage de la fenêtre
+"""
+
+import math
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.occupancy_grid import DistanceFilter, DeadReckoning, OccupancyGrid
+
+# Configuration de config.yaml (fenêtre de 16 x 16 tuiles de 16 cellules de 5 cm)
+MAPPING_CONFIG = {
+    "cell_cm": 5,
+    "tile_cells": 16,
+    "window_tiles": 16,
+    "recenter_margin_tiles": 4,
+    "max_range_cm": 300,
+    "beam_angle_deg": 30,
+    "hit_thickness_cm": 10,
+    "log_odds_occupied": 0.85,
+    "log_odds_free": -0.4,
+    "log_odds_min": -2.0,
+    "log_odds_max": 3.5
+}
+
+FORWARD = math.pi / 2
+BACKWARD = -math.pi / 2
+
+
+def cell_value(grid, x, y):
+    """Log-odds de la cellule contenant le point (x, y) en cm, None hors fenêtre"""
+    row = math.floor(y / grid.cell_cm) - grid.origin_y
+    col = math.floor(x / grid.cell_cm) - grid.origin_x
+    if 0 <= row < grid.size and 0 <= col < grid.size:
+        return float(grid.grid[row, col])
+    return None
+
+
+def tile_set(tiles):
+    """Coordonnées globales (tx, ty) d'une liste de tuiles"""
+    return {(tile['tx'], tile['ty']) for tile in tiles}
+
+
+def test_distance_filter(failures):
+    """Médiane glissante et mesures hors plage"""
+    print("\n--- Filtre des mesures ---")
+    distance_filter = DistanceFilter(window=3, min_cm=2, max_cm=400)
+    values = [distance_filter.add(d) for d in (100.0, 101.0, 350.0, 99.0)]
+    print(f"   100, 101, 350 (écho parasite), 99 -> {values}")
+    if values[2] != 101.0 or values[3] != 101.0:
+        failures.append("l'écho parasite isolé n'est pas rejeté par la médiane")
+    if distance_filter.add(None) is not None or distance_filter.add(1.0) is not None \
+            or distance_filter.add(500.0) is not None:
+        failures.append("mesure absente ou hors plage acceptée")
+
+
+def test_dead_reckoning(failures):
+    """Ligne droite, virage à droite, marche arrière"""
+    print("\n--- Estime ---")
+    odometry = DeadReckoning(speed_cm_s=120, turn_rate_dps=90)
+    odometry.update(0.5, 0.0, 0.0)
+    odometry.update(0.5, 0.0, 2.0)
+    x, y, heading = odometry.pose
+    print(f"   2 s à mi-vitesse: x={x:.1f} y={y:.1f} cm")
+    if abs(x) > 1e-6 or abs(y - 120.0) > 1e-6:
+        failures.append(f"ligne droite: ({x:.1f}, {y:.1f}) au lieu de (0, 120)")
+
+    odometry.update(0.5, 1.0, 3.0)
+    x, _, forward_heading = odometry.pose
+    print(f"   1 s en virage à droite: x={x:.1f} cm, cap {math.degrees(forward_heading):.0f}°")
+    if x <= 0 or forward_heading >= heading:
+        failures.append("virage à droite en marche avant mal orienté")
+
+    # Marche arrière, volant à droite : l'avant de la voiture part vers la gauche
+    odometry.update(-0.5, 1.0, 4.0)
+    _, _, reverse_heading = odometry.pose
+    print(f"   1 s en marche arrière, volant à droite: cap {math.degrees(reverse_heading):.0f}°")
+    if reverse_heading <= forward_heading:
+        failures.append("virage en marche arrière non inversé")
+
+    odometry.update(0.0, 1.0, 5.0)
+    if odometry.pose[2] != reverse_heading:
+        failures.append("la voiture à l'arrêt a tourné")
+
+
+def test_integrate(failures):
+    """Mesure à 100 cm droit devant depuis l'origine"""
+    print("\n--- Intégration d'une mesure à 100 cm ---")
+    grid = OccupancyGrid(MAPPING_CONFIG)
+    changed = grid.integrate(0.0, 0.0, FORWARD, 100.0)
+    print(f"   {changed} cellules modifiées")
+
+    occupied = [cell_value(grid, 2.5, y) for y in (97.5, 102.5)]
+    free = [cell_value(grid, 2.5, y) for y in (12.5, 50.0, 87.5)]
+    unknown = [cell_value(grid, 2.5, y) for y in (-20.0, 120.0)]
+    print(f"   occupées (97-103 cm): {[round(v, 2) for v in occupied]}, "
+          f"libres (12-88 cm): {[round(v, 2) for v in free]}")
+    if not all(value > 0 for value in occupied):
+        failures.append("cellules de l'écho (~100 cm) non occupées")
+    if not all(value < 0 for value in free):
+        failures.append("cellules avant l'écho non libres")
+    if any(value != 0 for value in unknown):
+        failures.append("cellules hors du faisceau (derrière, après l'écho) modifiées")
+    # Hors du cône de 30° : à 100 cm, le faisceau fait ±27 cm
+    if cell_value(grid, 60.0, 100.0) != 0:
+        failures.append("cellule hors de l'ouverture du faisceau modifiée")
+
+    # Tuiles modifiées = tuiles contenant une cellule non nulle (grille vide au départ)
+    dirty = tile_set(grid.pop_changed_tiles())
+    known = tile_set(grid.known_tiles())
+    total = (grid.size // grid.tile) ** 2
+    print(f"   {len(dirty)} tuile(s) modifiée(s) sur {total}: {sorted(dirty)}")
+    if dirty != known:
+        failures.append(f"tuiles modifiées {sorted(dirty)} différentes des tuiles touchées {sorted(known)}")
+    if grid.pop_changed_tiles():
+        failures.append("tuiles encore marquées après publication")
+
+    # Mesure proche : seules les tuiles autour de la voiture changent
+    grid.integrate(0.0, 0.0, FORWARD, 20.0)
+    near = tile_set(grid.pop_changed_tiles())
+    print(f"   mesure à 20 cm: tuiles {sorted(near)}")
+    if not near or any(ty > 0 or ty < -1 or tx < -1 or tx > 0 for tx, ty in near):
+        failures.append(f"mesure à 20 cm: tuiles inattendues {sorted(near)}")
+
+
+def test_follow(failures):
+    """Recentrage : contenu commun conservé, partie sortie de la fenêtre effacée"""
+    print("\n--- Recentrage de la fenêtre ---")
+    grid = OccupancyGrid(MAPPING_CONFIG)
+    grid.integrate(0.0, 0.0, FORWARD, 100.0)
+    grid.integrate(0.0, 0.0, BACKWARD, 290.0)
+    front = cell_value(grid, 2.5, 97.5)
+    behind = cell_value(grid, 2.5, -287.5)
+    dirty_before = tile_set(grid._tiles(*grid.dirty.nonzero()))
+
+    if grid.follow(0.0, 100.0):
+        failures.append("fenêtre déplacée alors que la voiture est loin des bords")
+
+    origin = (grid.origin_x, grid.origin_y)
+    moved = grid.follow(0.0, 400.0)
+    shift = (grid.origin_y - origin[1]) * grid.cell_cm
+    print(f"   voiture à y=400 cm: fenêtre déplacée de {shift:.0f} cm vers l'avant")
+    if not moved or shift <= 0 or grid.origin_x != origin[0]:
+        failures.append("fenêtre non déplacée vers l'avant")
+
+    if cell_value(grid, 2.5, 97.5) != front:
+        failures.append("obstacle devant perdu ou décalé par le recentrage")
+    if behind <= 0 or cell_value(grid, 2.5, -287.5) is not None:
+        failures.append("l'obstacle derrière devrait être sorti de la fenêtre")
+    # Bande entrée par l'avant : inconnue
+    new_rows = grid.grid[grid.size - (grid.origin_y - origin[1]):, :]
+    if new_rows.any():
+        failures.append("bande entrée dans la fenêtre non remise à inconnu")
+    if cell_value(grid, 2.5, 50.0) >= 0:
+        failures.append("espace libre devant perdu par le recentrage")
+
+    # Tuiles à publier : les mêmes en coordonnées globales, moins celles sorties
+    dirty_after = tile_set(grid.pop_changed_tiles())
+    window = grid.window()
+    kept = {(tx, ty) for tx, ty in dirty_before if ty >= window['ty']}
+    print(f"   tuiles à publier: {len(dirty_before)} avant, {len(dirty_after)} après")
+    if dirty_after != kept:
+        failures.append("tuiles à publier non décalées avec la fenêtre")
+
+    # La mémoire ne change pas
+    if grid.grid.shape != (grid.size, grid.size):
+        failures.append("taille de la grille modifiée")
+
+
+def main():
+    """Programme principal"""
+    print("\n" + "=" * 60)
+    print("TEST DE LA GRILLE D'OCCUPATION")
+    print("=" * 60)
+
+    failures = []
+    test_distance_filter(failures)
+    test_dead_reckoning(failures)
+    test_integrate(failures)
+    test_follow(failures)
+
+    print("\n" + "=" * 60)
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        print("=" * 60 + "\n")
+        sys.exit(1)
+
+    print("✅ Grille d'occupation conforme")
+    print("=" * 60 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ Module de détection d'obstacles avec capteur ultrason HC-SR04
 GPIO 16 = TRIG
 GPIO 24 = ECHO
 Seuil de détection : 20 cm
+Libération : au-delà de 25 cm sur 3 mesures consécutives (hystérésis)
 """
 
 import RPi.GPIO as GPIO
@@ -10,15 +11,13 @@ import time
 import logging
 from threading import Thread, Event
 
-# Configuration du logger
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
 class UltrasonicSensor:
     """Classe pour gérer le capteur ultrason HC-SR04"""
     
-    def __init__(self, trig_pin=16, echo_pin=24, threshold_cm=20):
+    def __init__(self, trig_pin=16, echo_pin=24, threshold_cm=20, clear_margin_cm=5, clear_readings=3):
         """
         Initialise le capteur ultrason
         
@@ -26,15 +25,23 @@ class UltrasonicSensor:
             trig_pin: Pin GPIO pour le trigger
             echo_pin: Pin GPIO pour l'echo
             threshold_cm: Distance seuil en cm pour détecter un obstacle
+            clear_margin_cm: Marge (cm) au-dessus du seuil avant de déclarer l'obstacle dégagé
+            clear_readings: Nombre de mesures consécutives au-delà de la marge avant libération
         """
         self.trig_pin = trig_pin
         self.echo_pin = echo_pin
         self.threshold_cm = threshold_cm
+        self.clear_cm = threshold_cm + clear_margin_cm
+        self.clear_readings = max(1, clear_readings)
+        self.clear_count = 0
         self.is_running = False
         self.stop_event = Event()
         self.obstacle_detected = False
         self.current_distance = None
+        self.last_echo_time = None
         self.callback = None
+        self.clear_callback = None
+        self.distance_callback = None
         
         # Configuration des GPIO
         GPIO.setmode(GPIO.BCM)
@@ -43,7 +50,8 @@ class UltrasonicSensor:
         GPIO.output(self.trig_pin, GPIO.LOW)
         
         logger.info(f"Capteur ultrason initialisé - TRIG: GPIO{trig_pin}, ECHO: GPIO{echo_pin}")
-        logger.info(f"Seuil de détection: {threshold_cm} cm")
+        logger.info(f"Seuil de détection: {threshold_cm} cm, "
+                    f"libération au-delà de {self.clear_cm} cm ({self.clear_readings} mesures)")
     
     def measure_distance(self):
         """
@@ -58,23 +66,27 @@ class UltrasonicSensor:
             time.sleep(0.00001)  # 10 microseconds
             GPIO.output(self.trig_pin, GPIO.LOW)
             
+            # Horloge monotone : l'instant de l'écho sert à mesurer le temps de réaction
+            pulse_start = pulse_end = time.monotonic()
+            
             # Attend que ECHO passe à HIGH avec timeout
-            timeout = time.time() + 0.1  # 100ms timeout
+            timeout = time.monotonic() + 0.1  # 100ms timeout
             while GPIO.input(self.echo_pin) == GPIO.LOW:
-                pulse_start = time.time()
+                pulse_start = time.monotonic()
                 if pulse_start > timeout:
                     return None
             
             # Attend que ECHO repasse à LOW avec timeout
-            timeout = time.time() + 0.1
+            timeout = time.monotonic() + 0.1
             while GPIO.input(self.echo_pin) == GPIO.HIGH:
-                pulse_end = time.time()
+                pulse_end = time.monotonic()
                 if pulse_end > timeout:
                     return None
             
             # Calcul de la distance
             pulse_duration = pulse_end - pulse_start
             distance = (pulse_duration * 34300) / 2  # Vitesse du son = 343 m/s
+            self.last_echo_time = pulse_end
             
             return round(distance, 2)
             
@@ -87,10 +99,28 @@ class UltrasonicSensor:
         Définit la fonction callback appelée lors de la détection d'obstacle
         
         Args:
-            callback: Fonction à appeler avec la distance en paramètre
+            callback: Fonction appelée avec la distance et l'instant (monotone) de l'écho
         """
         self.callback = callback
     
+    def set_clear_callback(self, callback):
+        """
+        Définit la fonction callback appelée quand l'obstacle est dégagé
+        
+        Args:
+            callback: Fonction à appeler avec la distance en paramètre
+        """
+        self.clear_callback = callback
+    
+    def set_distance_callback(self, callback):
+        """
+        Définit la fonction callback appelée à chaque mesure valide
+        
+        Args:
+            callback: Fonction à appeler avec la distance en paramètre
+        """
+        self.distance_callback = callback
+    
     def monitor_loop(self):
         """
         Boucle de monitoring qui vérifie continuellement la distance
@@ -102,20 +132,32 @@ class UltrasonicSensor:
             
             if distance is not None:
                 self.current_distance = distance
+                if self.distance_callback:
+                    self.distance_callback(distance)
                 
                 # Détection d'obstacle
                 if distance <= self.threshold_cm:
+                    self.clear_count = 0
                     if not self.obstacle_detected:
                         self.obstacle_detected = True
-                        logger.warning(f"⚠️  OBSTACLE DÉTECTÉ à {distance} cm!")
                         
-                        # Appelle le callback si défini
+                        # Callback d'abord (arrêt d'urgence), log ensuite
                         if self.callback:
-                            self.callback(distance)
-                else:
-                    if self.obstacle_detected:
-                        logger.info(f"✅ Obstacle dégagé - Distance: {distance} cm")
+                            self.callback(distance, self.last_echo_time)
+                        logger.warning(f"⚠️  OBSTACLE DÉTECTÉ à {distance} cm!")
+                elif self.obstacle_detected:
+                    # Hystérésis : un obstacle à la limite du seuil ne doit pas
+                    # couper et relâcher la marche avant à chaque mesure
+                    if distance > self.clear_cm:
+                        self.clear_count += 1
+                    else:
+                        self.clear_count = 0
+                    if self.clear_count >= self.clear_readings:
                         self.obstacle_detected = False
+                        self.clear_count = 0
+                        if self.clear_callback:
+                            self.clear_callback(distance)
+                        logger.info(f"✅ Obstacle dégagé - Distance: {distance} cm")
             
             # Pause entre les mesures (évite de saturer le CPU)
             time.sleep(0.1)  # Mesure toutes les 100ms
@@ -146,7 +188,9 @@ class UltrasonicSensor:
 
 # Test du module si exécuté directement
 if __name__ == "__main__":
-    def test_callback(distance):
+    logging.basicConfig(level=logging.INFO)
+    
+    def test_callback(distance, echo_time):
         print(f"Callback déclenché! Distance: {distance} cm")
     
     sensor = UltrasonicSensor(trig_pin=16, echo_pin=24, threshold_cm=20)
@@ -0,0 +1,258 @@
+"""
+Détection d'obstacles par analyse du flux FPV
+Les images JPEG sont échantillonnées depuis le stream du proxy caméra
+et analysées dans un pool de processus (NumPy vectorisé)
+"""
+
+from PIL import Image
+import numpy as np
+import multiprocessing
+import logging
+import queue
+import time
+import io
+import os
+from collections import deque
+from threading import Thread, Event, Lock
+
+from src.mjpeg import extract_latest_frame, JPEG_SOI
+
+logger = logging.getLogger(__name__)
+
+# Seuil de gradient (niveaux de gris) pour compter un pixel comme bord
+EDGE_THRESHOLD = 40
+# Densité de bords considérée comme un sol dégagé / encombré
+EDGE_DENSITY_CLEAR = 0.05
+EDGE_DENSITY_BLOCKED = 0.30
+# Gain appliqué à la différence inter-images au centre (objet qui grossit)
+LOOMING_GAIN = 6.0
+
+
+def _init_worker():
+    """Initialise un processus d'analyse (priorité basse)"""
+    try:
+        os.nice(10)
+    except OSError:
+        pass
+
+
+def analyze_frame(jpeg, previous, size):
+    """
+    Analyse une image JPEG et calcule un score d'obstacle
+
+    Args:
+        jpeg (bytes): Image JPEG complète
+        previous (np.ndarray): Image précédente en niveaux de gris (ou None)
+        size (tuple): Résolution d'analyse (largeur, hauteur)
+
+    Returns:
+        dict: Score (0.0 à 1.0), détails et image réduite pour la prochaine analyse
+    """
+    cpu_start = time.process_time()
+
+    # Décodage réduit : le draft JPEG évite de décoder la pleine résolution
+    image = Image.open(io.BytesIO(jpeg))
+    image.draft('L', size)
+    gray = np.asarray(image.convert('L').resize(size), dtype=np.uint8)
+    frame = gray.astype(np.float32)
+    height, width = frame.shape
+
+    # Densité de bords dans la zone du sol (tiers inférieur de l'image)
+    floor = frame[int(height * 0.6):, :]
+    grad_x = np.abs(np.diff(floor, axis=1))[:-1, :]
+    grad_y = np.abs(np.diff(floor, axis=0))[:, :-1]
+    edge_density = float(np.mean((grad_x + grad_y) > EDGE_THRESHOLD))
+    edge_score = (edge_density - EDGE_DENSITY_CLEAR) / (EDGE_DENSITY_BLOCKED - EDGE_DENSITY_CLEAR)
+
+    # Différence inter-images : un objet qui approche change surtout le centre
+    looming = 0.0
+    if previous is not None and previous.shape == gray.shape:
+        rows = slice(height // 4, 3 * height // 4)
+        cols = slice(width // 4, 3 * width // 4)
+        center_diff = np.abs(frame[rows, cols] - previous[rows, cols]).mean() / 255
+        global_diff = np.abs(frame - previous).mean() / 255
+        looming = float(max(0.0, center_diff - global_diff) * LOOMING_GAIN)
+
+    score = float(np.clip(max(edge_score, looming), 0.0, 1.0))
+
+    return {
+        "score": round(score, 3),
+        "edge_density": round(edge_density, 3),
+        "looming": round(looming, 3),
+        "gray": gray,
+        "cpu_time": time.process_time() - cpu_start
+    }
+
+
+class VisionObstacleDetector:
+    """Échantillonne le stream MJPEG et publie un score d'obstacle"""
+
+    def __init__(self, vision_config, publish=None):
+        """
+        Initialise le détecteur
+
+        Args:
+            vision_config (dict): Section 'vision' de config.yaml
+            publish: Fonction appelée avec le résultat de chaque analyse
+        """
+        self.config = vision_config
+        self.publish = publish
+        self.workers = vision_config['workers']
+        self.min_interval = 1.0 / vision_config['sample_fps']
+        self.cpu_budget = vision_config['cpu_budget']
+        self.size = (vision_config['analysis_width'], vision_config['analysis_height'])
+        self.threshold = vision_config['score_threshold']
+
+        self.chunks = queue.Queue(maxsize=vision_config['queue_size'])
+        self.closed_streams = deque()
+        self.stop_event = Event()
+        self.lock = Lock()
+        self.pool = None
+
+        self.in_flight = 0
+        self.next_allowed = 0.0
+        # Image précédente de chaque stream (les scores ne comparent jamais deux caméras)
+        self.previous = {}
+        # Chunks perdus par stream (file pleine) et génération traitée par l'échantillonnage :
+        # chaque perte casse le découpage en images, le stream est resynchronisé
+        self.drops = {}
+        self.generations = {}
+        self.last_result = None
+        self.dropped_chunks = 0
+        self.resyncs = 0
+        self.analyzed_frames = 0
+
+    def start(self):
+        """Démarre le pool d'analyse et le thread d'échantillonnage"""
+        self.pool = multiprocessing.Pool(self.workers, initializer=_init_worker)
+        self.thread = Thread(target=self._sampling_loop, daemon=True)
+        self.thread.start()
+        logger.info(f"👁  Vision activée: {self.workers} worker(s), "
+                    f"{1 / self.min_interval:.0f} img/s max, budget CPU {self.cpu_budget * 100:.0f}%")
+
+    def feed(self, stream_id, chunk):
+        """
+        Transmet un chunk du stream sans jamais bloquer l'envoi aux clients
+
+        Args:
+            stream_id (int): Identifiant du stream d'origine
+            chunk (bytes): Données reçues de la caméra
+        """
+        generation = self.drops.get(stream_id, 0)
+        try:
+            self.chunks.put_nowait((stream_id, generation, chunk))
+        except queue.Full:
+            self.dropped_chunks += 1
+            self.drops[stream_id] = generation + 1
+
+    def close_stream(self, stream_id):
+        """
+        Signale la fin d'un stream (libère son tampon)
+
+        Args:
+            stream_id (int): Identifiant du stream terminé
+        """
+        self.closed_streams.append(stream_id)
+
+    def _sampling_loop(self):
+        """Reconstitue les images JPEG et soumet les plus récentes au pool"""
+        buffers = {}
+        resyncing = set()
+
+        while not self.stop_event.is_set():
+            while self.closed_streams:
+                stream_id = self.closed_streams.popleft()
+                buffers.pop(stream_id, None)
+                resyncing.discard(stream_id)
+                self.drops.pop(stream_id, None)
+                with self.lock:
+                    self.previous.pop(stream_id, None)
+                    self.generations.pop(stream_id, None)
+
+            try:
+                stream_id, generation, chunk = self.chunks.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            if stream_id not in buffers:
+                buffers[stream_id] = bytearray()
+                with self.lock:
+                    self.previous[stream_id] = None
+                    self.generations[stream_id] = generation
+            elif generation != self.generations[stream_id]:
+                # Chunk perdu : l'image en cours et la précédente ne sont plus fiables
+                self.resyncs += 1
+                buffers[stream_id].clear()
+                resyncing.add(stream_id)
+                with self.lock:
+                    self.previous[stream_id] = None
+                    self.generations[stream_id] = generation
+
+            if stream_id in resyncing:
+                # Reprise au prochain début d'image
+                start = chunk.find(JPEG_SOI)
+                if start < 0:
+                    continue
+                chunk = chunk[start:]
+                resyncing.discard(stream_id)
+
+            buffer = buffers[stream_id]
+            buffer += chunk
+
+            frame = extract_latest_frame(buffer)
+            if frame is not None and self._can_submit():
+                self._submit(stream_id, generation, frame)
+
+    def _can_submit(self):
+        """Vérifie qu'un worker est libre et que le budget CPU est respecté"""
+        with self.lock:
+            return self.in_flight < self.workers and time.monotonic() >= self.next_allowed
+
+    def _submit(self, stream_id, generation, frame):
+        """Soumet une image au pool d'analyse"""
+        with self.lock:
+            self.in_flight += 1
+            # Réservation provisoire, recalculée avec le coût réel à la réception
+            self.next_allowed = time.monotonic() + self.min_interval
+            previous = self.previous.get(stream_id)
+        submitted_at = time.monotonic()
+
+        self.pool.apply_async(
+            analyze_frame,
+            (frame, previous, self.size),
+            callback=lambda result: self._on_result(stream_id, generation, result, submitted_at),
+            error_callback=self._on_error
+        )
+
+    def _on_result(self, stream_id, generation, result, submitted_at):
+        """Reçoit le résultat d'une analyse (thread de résultats du pool)"""
+        # Le coût CPU mesuré fixe l'intervalle minimal entre deux analyses
+        interval = max(self.min_interval, result['cpu_time'] / self.cpu_budget)
+        gray = result.pop('gray')
+        with self.lock:
+            self.in_flight -= 1
+            self.next_allowed = max(self.next_allowed, submitted_at + interval)
+            # Stream terminé ou resynchronisé entre-temps : rien à conserver
+            if self.generations.get(stream_id) == generation:
+                self.previous[stream_id] = gray
+        self.analyzed_frames += 1
+        result['obstacle'] = result['score'] >= self.threshold
+        result['timestamp'] = time.time()
+        self.last_result = result
+
+        if self.publish:
+            self.publish(result)
+
+    def _on_error(self, error):
+        """Erreur dans un worker (image corrompue...)"""
+        with self.lock:
+            self.in_flight -= 1
+        logger.debug(f"Analyse d'image impossible: {error}")
+
+    def stop(self):
+        """Arrête l'échantillonnage et le pool"""
+        self.stop_event.set()
+        if self.pool:
+            self.pool.terminate()
+            self.pool.join()
+        logger.info("👁  Vision arrêtée")
@@ -0,0 +1,260 @@
+"""
+Transport vidéo WebRTC pour le FPV (alternative basse latence au MJPEG)
+Les images IP Webcam sont décodées et renvoyées au navigateur comme piste vidéo
+WebRTC (UDP). La signalisation passe par la connexion Socket.IO du serveur de contrôle
+"""
+
+from aiortc import RTCPeerConnection, RTCSessionDescription, MediaStreamTrack
+from fractions import Fraction
+from threading import Thread, Lock, Event
+from PIL import Image
+import numpy as np
+import requests
+import asyncio
+import logging
+import time
+import io
+import av
+
+from src.mjpeg import extract_latest_frame
+
+logger = logging.getLogger(__name__)
+
+# Horloge RTP vidéo (90 kHz)
+VIDEO_CLOCK_RATE = 90000
+VIDEO_TIME_BASE = Fraction(1, VIDEO_CLOCK_RATE)
+
+
+class MJPEGSource:
+    """Lit le flux MJPEG d'une caméra et ne conserve que la dernière image"""
+
+    def __init__(self, stream_url, camera_config, loop):
+        """
+        Initialise la source
+
+        Args:
+            stream_url (str): URL du flux /video IP Webcam
+            camera_config (dict): Section 'camera' de config.yaml
+            loop (asyncio.AbstractEventLoop): Boucle des pistes abonnées
+        """
+        self.stream_url = stream_url
+        self.camera_config = camera_config
+        self.loop = loop
+        self.latest = None
+        self.subscribers = set()
+        self.lock = Lock()
+        self.stop_event = Event()
+        self.thread = None
+
+    def subscribe(self, event):
+        """
+        Abonne une piste (son événement est levé à chaque nouvelle image)
+
+        Args:
+            event (asyncio.Event): Événement de la piste
+        """
+        with self.lock:
+            self.subscribers.add(event)
+            if self.thread is None:
+                # Nouvel événement par lecteur : un ancien lecteur en cours d'arrêt reste arrêté
+                self.stop_event = Event()
+                self.thread = Thread(target=self._read_loop, args=(self.stop_event,), daemon=True)
+                self.thread.start()
+
+    def unsubscribe(self, event):
+        """
+        Désabonne une piste (arrête la lecture s'il n'en reste aucune)
+
+        Args:
+            event (asyncio.Event): Événement de la piste
+        """
+        with self.lock:
+            self.subscribers.discard(event)
+            if not self.subscribers:
+                self.stop_event.set()
+                self.thread = None
+
+    def _read_loop(self, stop_event):
+        """Lit le flux et notifie les pistes (reconnexion automatique)"""
+        logger.info(f"📡 Source WebRTC: {self.stream_url}")
+        while not stop_event.is_set():
+            try:
+                r = requests.get(self.stream_url, stream=True,
+                                 timeout=self.camera_config['connection_timeout'])
+                buffer = bytearray()
+                for chunk in r.iter_content(chunk_size=self.camera_config['chunk_size']):
+                    if stop_event.is_set():
+                        break
+                    buffer += chunk
+                    frame = extract_latest_frame(buffer)
+                    if frame is not None:
+                        self.latest = frame
+                        with self.lock:
+                            subscribers = list(self.subscribers)
+                        for event in subscribers:
+                            self.loop.call_soon_threadsafe(event.set)
+                r.close()
+            except requests.exceptions.RequestException as e:
+                logger.warning(f"Source WebRTC interrompue: {e}")
+                stop_event.wait(1)
+
+
+class MJPEGVideoTrack(MediaStreamTrack):
+    """Piste vidéo WebRTC alimentée par la dernière image de la source"""
+
+    kind = "video"
+
+    def __init__(self, source, max_width):
+        """
+        Initialise la piste
+
+        Args:
+            source (MJPEGSource): Source d'images JPEG
+            max_width (int): Largeur maximale envoyée (0 = inchangée)
+        """
+        super().__init__()
+        self.source = source
+        self.max_width = max_width
+        self.new_frame = asyncio.Event()
+        self.started = time.monotonic()
+        self.source.subscribe(self.new_frame)
+
+    async def recv(self):
+        """Attend l'image suivante (les images en retard sont sautées)"""
+        while True:
+            await self.new_frame.wait()
+            self.new_frame.clear()
+            jpeg = self.source.latest
+            if jpeg is not None:
+                break
+
+        loop = asyncio.get_running_loop()
+        frame = await loop.run_in_executor(None, self._decode, jpeg)
+
+        # Horodatage RTP d'après l'horloge réelle (pas de cadence imposée)
+        frame.pts = int((time.monotonic() - self.started) * VIDEO_CLOCK_RATE)
+        frame.time_base = VIDEO_TIME_BASE
+        return frame
+
+    def _decode(self, jpeg):
+        """Décode une image JPEG en trame vidéo"""
+        image = Image.open(io.BytesIO(jpeg))
+        if self.max_width and image.width > self.max_width:
+            size = (self.max_width, image.height * self.max_width // image.width)
+            image.draft('RGB', size)
+            image = image.convert('RGB').resize(size)
+        else:
+            image = image.convert('RGB')
+        pixels = np.asarray(image)
+
+        # Les encodeurs vidéo exigent des dimensions paires
+        height, width = pixels.shape[0] & ~1, pixels.shape[1] & ~1
+        return av.VideoFrame.from_ndarray(np.ascontiguousarray(pixels[:height, :width]), format='rgb24')
+
+    def stop(self):
+        """Arrête la piste et se désabonne de la source"""
+        self.source.unsubscribe(self.new_frame)
+        super().stop()
+
+
+class WebRTCTransport:
+    """Sessions WebRTC du proxy caméra (une par navigateur)"""
+
+    def __init__(self, camera_config, webrtc_config):
+        """
+        Initialise le transport
+
+        Args:
+            camera_config (dict): Section 'camera' de config.yaml
+            webrtc_config (dict): Section 'camera.webrtc' de config.yaml
+        """
+        self.camera_config = camera_config
+        self.max_width = webrtc_config['max_width']
+        self.peers = {}
+        self.sources = {}
+        self.loop = asyncio.new_event_loop()
+
+    def start(self):
+        """Démarre la boucle asyncio du transport"""
+        Thread(target=self.loop.run_forever, daemon=True).start()
+        logger.info(f"📡 WebRTC activé (largeur max: {self.max_width or 'native'})")
+
+    def handle_offer(self, data, reply):
+        """
+        Traite une offre SDP relayée par le serveur de contrôle
+
+        Args:
+            data (dict): {sid, sdp, type, ip, port}
+            reply: Fonction appelée avec l'événement et les données de réponse
+        """
+        future = asyncio.run_coroutine_threadsafe(self._answer(data), self.loop)
+
+        def done(f):
+            try:
+                reply("webrtc_answer", f.result())
+            except Exception as e:
+                logger.error(f"Session WebRTC impossible: {e}")
+                reply("webrtc_error", {"sid": data['sid'], "error": str(e)})
+
+        future.add_done_callback(done)
+
+    def handle_close(self, data):
+        """
+        Ferme la session d'un navigateur
+
+        Args:
+            data (dict): {sid}
+        """
+        asyncio.run_coroutine_threadsafe(self._close(data['sid']), self.loop)
+
+    def _source(self, android_ip, android_port):
+        """Retourne la source MJPEG partagée de la caméra"""
+        stream_url = f"http://{android_ip}:{android_port}/video"
+        if stream_url not in self.sources:
+            self.sources[stream_url] = MJPEGSource(stream_url, self.camera_config, self.loop)
+        return self.sources[stream_url]
+
+    async def _answer(self, data):
+        """Crée la connexion pair à pair et produit la réponse SDP"""
+        sid = data['sid']
+        await self._close(sid)
+
+        pc = RTCPeerConnection()
+        self.peers[sid] = pc
+        track = None
+        try:
+            track = MJPEGVideoTrack(self._source(data['ip'], data['port']), self.max_width)
+            pc.addTrack(track)
+
+            @pc.on("connectionstatechange")
+            async def on_connection_state():
+                logger.info(f"📡 WebRTC {sid[:8]}: {pc.connectionState}")
+                if pc.connectionState in ("failed", "closed"):
+                    await self._close(sid)
+
+            await pc.setRemoteDescription(RTCSessionDescription(sdp=data['sdp'], type=data['type']))
+            await pc.setLocalDescription(await pc.createAnswer())
+        except Exception:
+            # Négociation échouée : libère la connexion, la piste et le lecteur de la source
+            await self._close(sid)
+            if track is not None:
+                track.stop()
+            raise
+
+        return {"sid": sid, "sdp": pc.localDescription.sdp, "type": pc.localDescription.type}
+
+    async def _close(self, sid):
+        """Ferme la connexion pair à pair d'un navigateur"""
+        pc = self.peers.pop(sid, None)
+        if pc is None:
+            return
+        for sender in pc.getSenders():
+            if sender.track:
+                sender.track.stop()
+        await pc.close()
+
+    def stop(self):
+        """Ferme toutes les sessions et la boucle"""
+        for sid in list(self.peers):
+            asyncio.run_coroutine_threadsafe(self._close(sid), self.loop).result(timeout=2)
+        self.loop.call_soon_threadsafe(self.loop.stop)
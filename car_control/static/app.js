@@ -25,6 +25,8 @@ const state = {
     invertY: false,
     fpvEnabled: false,
     fpvUrl: null,
+    fpvTransport: 'mjpeg',
+    fpvStream: null,
     connected: false
 };
 
@@ -68,6 +70,16 @@ socket.on("obstacle_detected", (data) => {
     sendControl();
 });
 
+socket.on("obstacle_cleared", (data) => {
+    console.info("✅ Obstacle dégagé:", data);
+    
+    const warningEl = document.getElementById('obstacleWarning');
+    if (warningEl) {
+        clearTimeout(obstacleWarningTimeout);
+        warningEl.classList.remove('active');
+    }
+});
+
 socket.on("suggest_direction_change", (data) => {
     console.info("💡 Suggestion:", data);
     
@@ -84,6 +96,108 @@ socket.on("suggest_direction_change", (data) => {
     }
 });
 
+socket.on("vision_obstacle", (data) => {
+    const suggestionEl = document.getElementById('directionSuggestion');
+    
+    if (!data.obstacle || !suggestionEl) return;
+    
+    console.warn("👁 Obstacle visuel probable:", data);
+    suggestionEl.textContent = `👁 Obstacle probable devant (score ${Math.round(data.score * 100)}%)`;
+    suggestionEl.classList.add('active');
+    
+    clearTimeout(directionSuggestionTimeout);
+    directionSuggestionTimeout = setTimeout(() => {
+        suggestionEl.classList.remove('active');
+    }, 3000);
+});
+
+// === CARTE D'OCCUPATION ===
+
+// Champ affiché autour de la voiture (cm)
+const MAP_VIEW_CM = 400;
+
+const occupancyMap = {
+    tiles: new Map(),
+    pose: null,
+    cellCm: 5,
+    tileCells: 16
+};
+
+socket.on("map_tiles", (data) => {
+    occupancyMap.cellCm = data.cell_cm;
+    occupancyMap.tileCells = data.tile_cells;
+    occupancyMap.pose = data.pose;
+    
+    // Tuiles sorties de la fenêtre (oubliées aussi par le serveur)
+    const w = data.window;
+    for (const [key, tile] of occupancyMap.tiles) {
+        if (tile.tx < w.tx || tile.tx >= w.tx + w.tiles || tile.ty < w.ty || tile.ty >= w.ty + w.tiles) {
+            occupancyMap.tiles.delete(key);
+        }
+    }
+    
+    // Seules les tuiles modifiées sont reçues (carte complète à la connexion)
+    data.tiles.forEach((tile) => {
+        const key = `${tile.tx},${tile.ty}`;
+        let entry = occupancyMap.tiles.get(key);
+        if (!entry) {
+            const canvas = document.createElement('canvas');
+            canvas.width = canvas.height = data.tile_cells;
+            entry = { tx: tile.tx, ty: tile.ty, canvas: canvas };
+            occupancyMap.tiles.set(key, entry);
+        }
+        
+        // Probabilité d'occupation (0-255) : occupé en rouge, libre en blanc, inconnu transparent
+        const cells = new Uint8Array(tile.data);
+        const image = new ImageData(data.tile_cells, data.tile_cells);
+        cells.forEach((p, i) => {
+            const occupied = p > 128;
+            image.data[i * 4] = 255;
+            image.data[i * 4 + 1] = occupied ? 71 : 255;
+            image.data[i * 4 + 2] = occupied ? 87 : 255;
+            image.data[i * 4 + 3] = Math.min(255, Math.abs(p - 128) * (occupied ? 2 : 1));
+        });
+        entry.canvas.getContext('2d').putImageData(image, 0, 0);
+    });
+    
+    drawOccupancyMap();
+});
+
+function drawOccupancyMap() {
+    const canvas = document.getElementById('occupancyMap');
+    const pose = occupancyMap.pose;
+    if (!canvas || !pose) return;
+    
+    const ctx = canvas.getContext('2d');
+    const scale = canvas.width / MAP_VIEW_CM;
+    const tileCm = occupancyMap.tileCells * occupancyMap.cellCm;
+    const cx = canvas.width / 2;
+    const cy = canvas.height / 2;
+    
+    ctx.clearRect(0, 0, canvas.width, canvas.height);
+    ctx.imageSmoothingEnabled = false;
+    
+    // Nord en haut, voiture au centre (y du monde vers le haut)
+    for (const tile of occupancyMap.tiles.values()) {
+        const x = cx + (tile.tx * tileCm - pose.x) * scale;
+        const y = cy - ((tile.ty + 1) * tileCm - pose.y) * scale;
+        ctx.drawImage(tile.canvas, x, y, tileCm * scale, tileCm * scale);
+    }
+    
+    // Voiture
+    ctx.save();
+    ctx.translate(cx, cy);
+    ctx.rotate(-pose.heading);
+    ctx.fillStyle = '#00d4ff';
+    ctx.beginPath();
+    ctx.moveTo(12, 0);
+    ctx.lineTo(-8, 7);
+    ctx.lineTo(-8, -7);
+    ctx.closePath();
+    ctx.fill();
+    ctx.restore();
+}
+
 function playAlertSound() {
     try {
         const audioContext = new (window.AudioContext || window.webkitAudioContext)();
@@ -263,10 +377,16 @@ document.getElementById('fpv-connect').onclick = () => {
         return;
     }
     
-    // Construire l'URL du proxy
-    state.fpvUrl = `${CONFIG.proxyUrl}/stream?ip=${ip}&port=${port}`;
+    state.fpvTransport = document.getElementById('fpv-transport').value;
     
-    console.log('📹 Connexion FPV via proxy:', state.fpvUrl);
+    if (state.fpvTransport === 'webrtc') {
+        console.log('📡 Connexion FPV WebRTC:', `${ip}:${port}`);
+        startWebRTC(ip, port);
+    } else {
+        // Construire l'URL du proxy
+        state.fpvUrl = `${CONFIG.proxyUrl}/stream?ip=${ip}&port=${port}`;
+        console.log('📹 Connexion FPV via proxy:', state.fpvUrl);
+    }
     
     enableFPV();
     hideFPVModal();
@@ -280,6 +400,36 @@ document.getElementById('modal-backdrop').onclick = hideFPVModal;
 
 // === GESTION FPV ===
 
+// Éléments d'affichage selon le transport (<img> MJPEG ou <video> WebRTC)
+function fpvElements() {
+    const suffix = state.fpvTransport === 'webrtc' ? '-video' : '';
+    return {
+        background: document.getElementById(`fpv-background${suffix}`),
+        center: document.getElementById(`fpv-center${suffix}`),
+        overlay: document.getElementById('fpv-overlay')
+    };
+}
+
+// Place la vidéo selon l'orientation
+function showFPVMedia() {
+    const isLandscape = window.innerWidth > window.innerHeight;
+    const { background, center, overlay } = fpvElements();
+    const target = isLandscape ? background : center;
+    const other = isLandscape ? center : background;
+    
+    // Mode paysage: vidéo en arrière-plan / mode portrait: vidéo au centre
+    target.style.display = 'block';
+    other.style.display = 'none';
+    overlay.style.display = isLandscape ? 'none' : 'block';
+    
+    if (state.fpvTransport === 'webrtc') {
+        other.srcObject = null;
+        if (state.fpvStream) target.srcObject = state.fpvStream;
+    } else {
+        target.src = state.fpvUrl;
+    }
+}
+
 function enableFPV() {
     state.fpvEnabled = true;
     
@@ -287,27 +437,15 @@ function enableFPV() {
     btn.innerText = "📹 FPV ON";
     btn.classList.add('active');
     
-    const isLandscape = window.innerWidth > window.innerHeight;
-    const fpvBackground = document.getElementById('fpv-background');
-    const fpvCenter = document.getElementById('fpv-center');
-    const fpvOverlay = document.getElementById('fpv-overlay');
-    
-    if (isLandscape) {
-        // Mode paysage: vidéo en arrière-plan
-        fpvBackground.style.display = 'block';
-        fpvCenter.style.display = 'none';
-        fpvOverlay.style.display = 'none';
-        fpvBackground.src = state.fpvUrl;
-    } else {
-        // Mode portrait: vidéo au centre
-        fpvCenter.style.display = 'block';
-        fpvBackground.style.display = 'none';
-        fpvOverlay.style.display = 'block';
-        fpvCenter.src = state.fpvUrl;
-    }
+    showFPVMedia();
     
     console.log('✅ FPV activé');
     
+    if (state.fpvTransport === 'webrtc') return;
+    
+    const fpvBackground = document.getElementById('fpv-background');
+    const fpvCenter = document.getElementById('fpv-center');
+    
     // Gestion des erreurs
     const handleError = () => {
         console.error('❌ Erreur de chargement du stream FPV');
@@ -332,41 +470,95 @@ function disableFPV() {
     btn.innerText = "📹 FPV OFF";
     btn.classList.remove('active');
     
-    const fpvBackground = document.getElementById('fpv-background');
-    const fpvCenter = document.getElementById('fpv-center');
-    const fpvOverlay = document.getElementById('fpv-overlay');
+    stopWebRTC();
     
-    fpvBackground.style.display = 'none';
-    fpvCenter.style.display = 'none';
-    fpvOverlay.style.display = 'none';
+    ['fpv-background', 'fpv-center', 'fpv-background-video', 'fpv-center-video', 'fpv-overlay'].forEach((id) => {
+        document.getElementById(id).style.display = 'none';
+    });
     
-    fpvBackground.src = '';
-    fpvCenter.src = '';
+    document.getElementById('fpv-background').src = '';
+    document.getElementById('fpv-center').src = '';
+    document.getElementById('fpv-background-video').srcObject = null;
+    document.getElementById('fpv-center-video').srcObject = null;
     
     console.log('❌ FPV désactivé');
 }
 
+// === WEBRTC ===
+
+let peerConnection = null;
+
+async function startWebRTC(ip, port) {
+    stopWebRTC();
+    
+    // Réseau local : candidats ICE "host" suffisants, pas de serveur STUN
+    const pc = new RTCPeerConnection({ iceServers: [] });
+    peerConnection = pc;
+    pc.addTransceiver('video', { direction: 'recvonly' });
+    
+    pc.ontrack = (event) => {
+        // Lecture au plus tôt, sans tampon de gigue supplémentaire
+        if ('playoutDelayHint' in event.receiver) event.receiver.playoutDelayHint = 0;
+        if ('jitterBufferTarget' in event.receiver) event.receiver.jitterBufferTarget = 0;
+        
+        state.fpvStream = event.streams[0] || new MediaStream([event.track]);
+        if (state.fpvEnabled) showFPVMedia();
+        console.log('✅ Piste WebRTC reçue');
+    };
+    
+    pc.onconnectionstatechange = () => {
+        console.log('📡 WebRTC:', pc.connectionState);
+        if (pc.connectionState === 'failed' && peerConnection === pc) {
+            alert('⚠ Connexion WebRTC échouée');
+            disableFPV();
+        }
+    };
+    
+    await pc.setLocalDescription(await pc.createOffer());
+    
+    // Signalisation sans "trickle" : attendre la collecte des candidats ICE
+    await new Promise((resolve) => {
+        if (pc.iceGatheringState === 'complete') return resolve();
+        pc.addEventListener('icegatheringstatechange', () => {
+            if (pc.iceGatheringState === 'complete') resolve();
+        });
+    });
+    
+    if (peerConnection !== pc) return;
+    socket.emit('webrtc_offer', {
+        sdp: pc.localDescription.sdp,
+        type: pc.localDescription.type,
+        ip: ip,
+        port: port
+    });
+}
+
+function stopWebRTC() {
+    if (!peerConnection) return;
+    peerConnection.close();
+    peerConnection = null;
+    state.fpvStream = null;
+    socket.emit('webrtc_close');
+}
+
+socket.on('webrtc_answer', async (data) => {
+    if (!peerConnection) return;
+    await peerConnection.setRemoteDescription({ sdp: data.sdp, type: data.type });
+});
+
+socket.on('webrtc_error', (data) => {
+    console.error('❌ Erreur WebRTC:', data.error);
+    alert(`⚠ WebRTC indisponible: ${data.error}`);
+    disableFPV();
+});
+
 // === GESTION ORIENTATION ===
 
 function handleOrientationChange() {
-    if (state.fpvEnabled && state.fpvUrl) {
+    if (state.fpvEnabled) {
         setTimeout(() => {
             const isLandscape = window.innerWidth > window.innerHeight;
-            const fpvBackground = document.getElementById('fpv-background');
-            const fpvCenter = document.getElementById('fpv-center');
-            const fpvOverlay = document.getElementById('fpv-overlay');
-            
-            if (isLandscape) {
-                fpvBackground.style.display = 'block';
-                fpvCenter.style.display = 'none';
-                fpvOverlay.style.display = 'none';
-                fpvBackground.src = state.fpvUrl;
-            } else {
-                fpvCenter.style.display = 'block';
-                fpvBackground.style.display = 'none';
-                fpvOverlay.style.display = 'block';
-                fpvCenter.src = state.fpvUrl;
-            }
+            showFPVMedia();
             
             console.log('🔄 Orientation changée:', isLandscape ? 'paysage' : 'portrait');
         }, 300);